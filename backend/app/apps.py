@@ -10,6 +10,13 @@ class AppConfig(AppConfig):
         
         logger = logging.getLogger(__name__)
         
+        # Attribute Supabase response sizes to the service call that made them
+        from .supabase_service.metrics import install_response_observer
+        install_response_observer()
+        # Clamp every Supabase HTTP timeout to the current request's deadline
+        from .supabase_service.deadline import install_budget_provider
+        install_budget_provider()
+        
         try:
             from app_backend.supabase_utils import (
                 is_supabase_available,
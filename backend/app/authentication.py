@@ -5,6 +5,7 @@
 import logging
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken
+from .supabase_service.tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +17,13 @@ class SupabaseJWTAuthentication(JWTAuthentication):
     since we use Supabase for authentication.
     """
 
+    def authenticate(self, request):
+        """
+        Decode and validate the bearer token, timed as the request's auth span.
+        """
+        with span('auth.jwt', category='auth'):
+            return super().authenticate(request)
+
     def get_user(self, validated_token):
         """
         Override to skip Django user lookup.
@@ -0,0 +1,305 @@
+# Benchmark suite for the API and service layers.
+# Seeds the in-memory Supabase stand-in (SUPABASE_BACKEND=fake) at each dataset
+# size, drives the viewsets through DRF's APIClient and writes per-case timings
+# as JSON. Given a baseline, each case's median is compared with the stored one
+# and the command fails when any case got slower than --threshold allows.
+#
+#   SUPABASE_BACKEND=fake python manage.py benchmark --sizes 1000,10000 --output bench.json
+#   SUPABASE_BACKEND=fake python manage.py benchmark --save-baseline
+#   SUPABASE_BACKEND=fake python manage.py benchmark --baseline benchmarks/baseline.json
+#
+# A dataset of size N is app.synthetic_data's clinic with N patients (about
+# 1.6 appointments each, with their treatments and invoices), N/10 x-rays and
+# N/100 inventory items, all owned by one tenant.
+#
+# benchmarks/baseline.json is picked up automatically when no --baseline is
+# given. It was recorded with the defaults (sizes 1000,10000,100000, 20
+# iterations, no injected latency) via --save-baseline; timings are machine
+# specific, so re-record it on the machine that runs the comparison.
+
+
+import json
+import logging
+import os
+import platform
+import statistics
+import time
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from app.synthetic_data import PLACEHOLDER_IMAGE, ClinicDatasetGenerator
+
+DEFAULT_SIZES = '1000,10000,100000'
+DEFAULT_ITERATIONS = 20
+DEFAULT_THRESHOLD = 0.2
+BENCHMARK_USER_ID = 'benchmark-user'
+# Patient search mixes single and two-word queries, names, phone digits and email parts
+SEARCH_TERMS = ('ami', 'benali', 'sara khelifi', '0555', 'example.com', 'zzz')
+# Denser schedule than the generator's default so 100k appointments fit a few years
+BENCHMARK_PROFILE = {
+    'appointments_per_patient': 1.0,
+    'xrays_per_patient': 0.1,
+    'working_hours': (8, 20),
+    'slot_minutes': 10,
+}
+
+
+class BenchmarkUser:
+    # What the viewsets read from request.user
+    is_authenticated = True
+
+    def __init__(self, user_id):
+        self.id = user_id
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def _default_baseline_path():
+    return os.path.join(settings.BASE_DIR, 'benchmarks', 'baseline.json')
+
+
+def seed_dataset(store, size, seed=0, user_id=BENCHMARK_USER_ID):
+    # Generate the dataset and write it straight into the fake store: going
+    # through the API would dominate the run at 100k rows. Returns the ids the
+    # cases pick from.
+    from app.supabase_service.xrays import XRAY_BUCKET
+
+    generator = ClinicDatasetGenerator(seed=seed, patients=size, **BENCHMARK_PROFILE)
+    generator.inventory_items = max(size // 100, 10)
+    rows = generator.generate(user_id)
+    with store.lock:
+        for table, table_rows in rows.items():
+            store.rows(table).extend(table_rows)
+        for xray in rows['xrays']:
+            store.files[(XRAY_BUCKET, xray['image_url'])] = {'data': PLACEHOLDER_IMAGE, 'content_type': xray['image_type']}
+    return {table: [row['id'] for row in table_rows] for table, table_rows in rows.items()}
+
+
+def build_cases(ids, taken_slot):
+    # (name, method, path(i), body(i), expected status); i is the iteration number
+    def pick(table):
+        return lambda i: ids[table][(i * 7919) % len(ids[table])]
+
+    patient, appointment, treatment = pick('patients'), pick('appointments'), pick('treatments')
+    invoice, item, xray = pick('invoices'), pick('inventory'), pick('xrays')
+    future = date(2100, 1, 1)
+
+    cases = []
+    for resource, record in (
+        ('patients', patient), ('appointments', appointment), ('treatments', treatment),
+        ('invoices', invoice), ('inventory', item), ('xrays', xray),
+    ):
+        cases.append((f'{resource}.list', 'get', lambda i, r=resource: f'/api/{r}/?limit=50', None, 200))
+        cases.append((f'{resource}.retrieve', 'get', lambda i, r=resource, p=record: f'/api/{r}/{p(i)}/', None, 200))
+
+    cases += [
+        ('patients.create', 'post', lambda i: '/api/patients/', lambda i: {
+            'first_name': 'Bench', 'last_name': f'Mark{i}', 'gender': 'F',
+            'birth_date': '1990-05-01', 'phone': '0555000000',
+        }, 201),
+        ('patients.update', 'patch', lambda i: f'/api/patients/{patient(i)}/', lambda i: {'phone': f'0555{i:06d}'}, 200),
+        ('patients.search', 'get', lambda i: f'/api/patients/search/?q={SEARCH_TERMS[i % len(SEARCH_TERMS)]}', None, 200),
+        ('appointments.create', 'post', lambda i: '/api/appointments/', lambda i: {
+            'patient_id': patient(i), 'date': str(future + timedelta(days=i)), 'time': '09:00:00',
+            'reason': 'Benchmark',
+        }, 201),
+        ('appointments.create_conflict', 'post', lambda i: '/api/appointments/', lambda i: {
+            'patient_id': patient(i), 'date': taken_slot['date'], 'time': taken_slot['time'], 'reason': 'Benchmark',
+        }, 400),
+        ('appointments.update', 'patch', lambda i: f'/api/appointments/{appointment(i)}/', lambda i: {'notes': f'n{i}'}, 200),
+        ('treatments.create', 'post', lambda i: '/api/treatments/', lambda i: {
+            'patient_id': patient(i), 'description': 'Filling', 'cost': '80.00', 'date': '2024-01-01',
+        }, 201),
+        ('treatments.update', 'patch', lambda i: f'/api/treatments/{treatment(i)}/', lambda i: {'cost': f'{90 + i}.00'}, 200),
+        ('invoices.create', 'post', lambda i: '/api/invoices/', lambda i: {
+            'patient_id': patient(i), 'treatment_id': treatment(i), 'amount': '80.00',
+        }, 201),
+        ('invoices.update', 'patch', lambda i: f'/api/invoices/{invoice(i)}/', lambda i: {'status': 'Paid'}, 200),
+        ('inventory.create', 'post', lambda i: '/api/inventory/', lambda i: {'item': f'Bench {i}', 'quantity': 5}, 201),
+        ('inventory.update', 'patch', lambda i: f'/api/inventory/{item(i)}/', lambda i: {'quantity': i % 50}, 200),
+        ('xrays.create', 'post', lambda i: '/api/xrays/', lambda i: {
+            'patient_id': patient(i), 'file': SimpleUploadedFile(f'bench{i}.png', b'\x89PNG', content_type='image/png'),
+        }, 201),
+        ('xrays.update', 'patch', lambda i: f'/api/xrays/{xray(i)}/', lambda i: {'description': f'd{i}'}, 200),
+    ]
+    return cases
+
+
+def compare_to_baseline(current, baseline, threshold):
+    # Cases whose median grew by more than threshold (0.2 = 20%) at the same size
+    regressions = []
+    for size, cases in current['sizes'].items():
+        stored = baseline.get('sizes', {}).get(size, {})
+        for name, timing in cases.items():
+            before = stored.get(name)
+            if not before or not before.get('median_ms'):
+                continue
+            ratio = timing['median_ms'] / before['median_ms']
+            timing['baseline_median_ms'] = before['median_ms']
+            timing['ratio'] = round(ratio, 3)
+            if ratio > 1 + threshold:
+                regressions.append((size, name, before['median_ms'], timing['median_ms'], ratio))
+    return regressions
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the API against the in-memory Supabase backend and compare with a baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default=DEFAULT_SIZES, help=f'Dataset sizes (default: {DEFAULT_SIZES})')
+        parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS, help='Timed requests per case')
+        parser.add_argument('--cases', default='', help='Only run cases whose name starts with one of these (comma-separated)')
+        parser.add_argument('--latency-ms', default=None, help='Latency injected per backend call, e.g. 2 or 1-5')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', default=None, help='Write results as JSON to this file')
+        parser.add_argument('--baseline', default=None, help='Baseline JSON to compare against')
+        parser.add_argument('--save-baseline', action='store_true', help='Store this run as the baseline')
+        parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='Allowed slowdown before failing (0.2 = 20%%)')
+        parser.add_argument('--warn-only', action='store_true', help='Report regressions without failing')
+
+    def handle(self, *args, **options):
+        from app_backend.supabase_utils import uses_fake_backend, reset_supabase_client
+        from app_backend.fake_supabase import FakeStore, reset_fake_store
+        from app.supabase_service import (
+            BaseSupabaseService,
+            get_record_cache,
+            reset_autocomplete_indexes,
+            reset_breakers,
+            reset_metrics,
+            reset_schedules,
+        )
+
+        if not uses_fake_backend():
+            raise CommandError('The benchmark only runs against the in-memory backend: set SUPABASE_BACKEND=fake')
+
+        sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        prefixes = tuple(prefix.strip() for prefix in options['cases'].split(',') if prefix.strip())
+        iterations = max(options['iterations'], 1)
+        latency = options['latency_ms'] if options['latency_ms'] is not None else getattr(settings, 'SUPABASE_FAKE_LATENCY_MS', '')
+
+        results = {
+            'created_at': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'iterations': iterations,
+            'latency_ms': latency or 0,
+            'sizes': {},
+        }
+
+        client = APIClient()
+        client.force_authenticate(BenchmarkUser(BENCHMARK_USER_ID))
+        # The conflict case answers 400 on purpose; keep Django from logging every one
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+
+        with override_settings(ALLOWED_HOSTS=list(settings.ALLOWED_HOSTS) + ['testserver']):
+            for size in sizes:
+                # A fresh store, client and caches per size so runs don't leak into each other
+                store = FakeStore(latency_ms=latency)
+                reset_fake_store(store)
+                reset_supabase_client()
+                BaseSupabaseService.reset_client()
+                reset_breakers()
+                reset_metrics()
+                # In-process indexes built over the previous size's store
+                reset_autocomplete_indexes()
+                reset_schedules()
+                record_cache = get_record_cache()
+                if record_cache is not None:
+                    record_cache.clear()
+
+                self.stdout.write(f'Seeding {size} rows...')
+                started = time.perf_counter()
+                ids = seed_dataset(store, size, seed=options['seed'])
+                self.stdout.write(f'  seeded in {time.perf_counter() - started:.1f}s')
+
+                from app.supabase_service import appointment_service
+                first = appointment_service.for_user(BENCHMARK_USER_ID).get_all_appointments(limit=1)[0]
+                taken_slot = {'date': first['date'], 'time': first['time']}
+
+                timings = {}
+                for name, method, path, body, expected in build_cases(ids, taken_slot):
+                    if prefixes and not name.startswith(prefixes):
+                        continue
+                    timings[name] = self._run_case(client, name, method, path, body, expected, iterations)
+                    self.stdout.write(
+                        f"  {size:>7} {name:<32} median {timings[name]['median_ms']:8.2f} ms"
+                        f"  p95 {timings[name]['p95_ms']:8.2f} ms"
+                    )
+                results['sizes'][str(size)] = timings
+
+        # Leave the process with an empty backend rather than the last dataset
+        reset_fake_store()
+        reset_supabase_client()
+        BaseSupabaseService.reset_client()
+
+        baseline_path = options['baseline']
+        if baseline_path is None and not options['save_baseline'] and os.path.exists(_default_baseline_path()):
+            baseline_path = _default_baseline_path()
+        regressions = []
+        if baseline_path:
+            if not os.path.exists(baseline_path):
+                raise CommandError(f'Baseline not found: {baseline_path}')
+            with open(baseline_path) as handle:
+                regressions = compare_to_baseline(results, json.load(handle), options['threshold'])
+            results['baseline'] = baseline_path
+
+        if options['output']:
+            self._write(options['output'], results)
+        if options['save_baseline']:
+            self._write(baseline_path or _default_baseline_path(), results)
+
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS('No regressions' if baseline_path else 'Done (no baseline to compare)'))
+            return
+        for size, name, before, after, ratio in regressions:
+            self.stdout.write(self.style.WARNING(
+                f'  {size:>7} {name:<32} {before:8.2f} ms -> {after:8.2f} ms ({(ratio - 1) * 100:+.0f}%)'
+            ))
+        message = f'{len(regressions)} case(s) slower than the baseline by more than {options["threshold"]:.0%}'
+        if options['warn_only']:
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            raise CommandError(message)
+
+    def _run_case(self, client, name, method, path, body, expected, iterations):
+        request = getattr(client, method)
+        durations = []
+        # One untimed warm-up request per case
+        for i in range(iterations + 1):
+            kwargs = {}
+            if body is not None:
+                data = body(i)
+                kwargs = {'data': data, 'format': 'multipart'} if name == 'xrays.create' else {'data': data, 'format': 'json'}
+            started = time.perf_counter()
+            response = request(path(i), **kwargs)
+            elapsed = time.perf_counter() - started
+            if response.status_code != expected:
+                raise CommandError(
+                    f'{name}: expected HTTP {expected}, got {response.status_code}: {response.content[:300]!r}'
+                )
+            if i:
+                durations.append(elapsed * 1000)
+        return {
+            'runs': len(durations),
+            'min_ms': round(min(durations), 3),
+            'median_ms': round(statistics.median(durations), 3),
+            'mean_ms': round(statistics.fmean(durations), 3),
+            'p95_ms': round(_percentile(durations, 0.95), 3),
+        }
+
+    def _write(self, path, results):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as handle:
+            json.dump(results, handle, indent=2)
+        self.stdout.write(f'Results written to {path}')
@@ -0,0 +1,142 @@
+# Generate a synthetic clinic dataset (see app/synthetic_data.py).
+# Rows can be written through the services' bulk create_many() path into the
+# configured backend (Supabase, or the in-memory one with SUPABASE_BACKEND=fake)
+# and/or saved as NDJSON fixtures, one <table>.ndjson file per table.
+#
+#   python manage.py generate_dataset --tenants 3 --patients 5000 --seed 42 --ndjson fixtures/clinic
+#   python manage.py generate_dataset --user-id <supabase-user-uuid> --patients 2000 --write --upload-files
+#   python manage.py generate_dataset --from-ndjson fixtures/clinic --write
+
+
+import os
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.synthetic_data import PLACEHOLDER_IMAGE, TABLES, ClinicDatasetGenerator, read_ndjson, write_ndjson
+
+
+def _services():
+    from app.supabase_service import (
+        patient_service,
+        appointment_service,
+        treatment_service,
+        invoice_service,
+        inventory_service,
+        xray_service,
+    )
+    return {
+        'patients': patient_service,
+        'inventory': inventory_service,
+        'appointments': appointment_service,
+        'treatments': treatment_service,
+        'invoices': invoice_service,
+        'xrays': xray_service,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Generate a deterministic synthetic clinic dataset into Supabase and/or NDJSON fixtures'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--tenants', type=int, default=1, help='Number of tenants (tenant-1, tenant-2, ...)')
+        parser.add_argument('--user-id', action='append', default=[], help='Explicit tenant user id (repeatable)')
+        parser.add_argument('--patients', type=int, default=1000, help='Patients per tenant')
+        parser.add_argument('--years', type=float, default=3, help='Years of appointment history')
+        parser.add_argument('--appointments-per-patient', type=float, default=4.0)
+        parser.add_argument('--future-fraction', type=float, default=0.1)
+        parser.add_argument('--treatment-rate', type=float, default=0.8)
+        parser.add_argument('--invoice-rate', type=float, default=0.9)
+        parser.add_argument('--paid-rate', type=float, default=0.75)
+        parser.add_argument('--xrays-per-patient', type=float, default=0.3)
+        parser.add_argument('--inventory-items', type=int, default=150, help='Inventory rows per tenant')
+        parser.add_argument('--anchor-date', default=None, help='"Today" for the dataset, YYYY-MM-DD (default 2025-01-01)')
+        parser.add_argument('--ndjson', default=None, help='Write NDJSON fixtures to this directory')
+        parser.add_argument('--from-ndjson', default=None, help='Load an existing fixture directory instead of generating')
+        parser.add_argument('--write', action='store_true', help='Insert the rows through the services (create_many)')
+        parser.add_argument('--chunk-size', type=int, default=None, help='Rows per bulk insert request')
+        parser.add_argument('--upload-files', action='store_true', help='Upload a placeholder file for every x-ray')
+
+    def handle(self, *args, **options):
+        if not options['write'] and not options['ndjson']:
+            raise CommandError('Nothing to do: pass --write, --ndjson DIR or both')
+
+        if options['from_ndjson']:
+            datasets = [(None, self._load_fixtures(options['from_ndjson']))]
+        else:
+            generator = self._generator(options)
+            user_ids = options['user_id'] or [f'tenant-{index + 1}' for index in range(options['tenants'])]
+            # Generated lazily so only one tenant's rows are held in memory at a time
+            datasets = ((user_id, generator.generate(user_id)) for user_id in user_ids)
+
+        totals = dict.fromkeys(TABLES, 0)
+        for position, (user_id, rows) in enumerate(datasets):
+            if options['ndjson']:
+                write_ndjson(options['ndjson'], rows, append=position > 0)
+            if options['write']:
+                self._write(user_id, rows, options)
+            for table, table_rows in rows.items():
+                totals[table] += len(table_rows)
+            if user_id:
+                self.stdout.write(f"  {user_id}: " + ', '.join(f"{len(rows[table])} {table}" for table in TABLES))
+
+        summary = ', '.join(f"{count} {table}" for table, count in totals.items())
+        self.stdout.write(self.style.SUCCESS(f"Generated {summary}"))
+        if options['ndjson']:
+            self.stdout.write(f"Fixtures written to {options['ndjson']}")
+
+    def _generator(self, options):
+        try:
+            anchor = date.fromisoformat(options['anchor_date']) if options['anchor_date'] else None
+            kwargs = {'anchor_date': anchor} if anchor else {}
+            return ClinicDatasetGenerator(
+                seed=options['seed'],
+                patients=options['patients'],
+                years=options['years'],
+                appointments_per_patient=options['appointments_per_patient'],
+                future_fraction=options['future_fraction'],
+                treatment_rate=options['treatment_rate'],
+                invoice_rate=options['invoice_rate'],
+                paid_rate=options['paid_rate'],
+                xrays_per_patient=options['xrays_per_patient'],
+                inventory_items=options['inventory_items'],
+                **kwargs,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+    def _load_fixtures(self, directory):
+        rows = {}
+        for table in TABLES:
+            path = os.path.join(directory, f"{table}.ndjson")
+            rows[table] = list(read_ndjson(path)) if os.path.exists(path) else []
+        if not any(rows.values()):
+            raise CommandError(f'No fixtures found in {directory}')
+        return rows
+
+    def _write(self, user_id, rows, options):
+        services = _services()
+        for table in TABLES:
+            table_rows = rows.get(table) or []
+            if not table_rows:
+                continue
+            if user_id:
+                services[table].for_user(user_id).create_many(table_rows, chunk_size=options['chunk_size'])
+            else:
+                # Fixture rows carry their own user_id; keep each tenant's rows together
+                by_user = {}
+                for row in table_rows:
+                    by_user.setdefault(row['user_id'], []).append(row)
+                for owner, owned in by_user.items():
+                    services[table].for_user(owner).create_many(owned, chunk_size=options['chunk_size'])
+
+        if options['upload_files'] and rows.get('xrays'):
+            from app.supabase_service.xrays import XRAY_BUCKET
+            bucket = services['xrays'].client.storage.from_(XRAY_BUCKET)
+            for row in rows['xrays']:
+                bucket.upload(
+                    path=row['image_url'],
+                    file=PLACEHOLDER_IMAGE,
+                    file_options={'content-type': 'image/png', 'upsert': 'true'},
+                )
@@ -0,0 +1,156 @@
+# Request middleware for the Supabase service layer.
+
+import logging
+import time as time_module
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .supabase_service.identity_map import identity_map_scope
+from .supabase_service.metrics import REQUEST_DURATION
+from .supabase_service.tracing import trace_scope, export_trace
+from .supabase_service.deadline import deadline_scope, get_endpoint_budget
+
+logger = logging.getLogger(__name__)
+
+
+class IdentityMapMiddleware:
+    # Gives every request its own identity map, so duplicate service lookups
+    # within the request are answered from memory and nothing leaks between requests.
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Stay async under ASGI so requests are not bounced through a thread
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with identity_map_scope() as identity_map:
+            response = self.get_response(request)
+            logger.debug(f"Identity map for {request.path} held {len(identity_map)} records")
+            return response
+
+    async def __acall__(self, request):
+        with identity_map_scope() as identity_map:
+            response = await self.get_response(request)
+            logger.debug(f"Identity map for {request.path} held {len(identity_map)} records")
+            return response
+
+
+class MetricsMiddleware:
+    # Records http_request_duration_seconds per method, URL name and status
+    # (URL names rather than paths, so ids don't turn into label values).
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def _observe(self, request, response, start_time):
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name if match else None) or 'unmatched'
+        REQUEST_DURATION.observe(
+            time_module.perf_counter() - start_time, request.method, view, str(response.status_code)
+        )
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        start_time = time_module.perf_counter()
+        response = self.get_response(request)
+        self._observe(request, response, start_time)
+        return response
+
+    async def __acall__(self, request):
+        start_time = time_module.perf_counter()
+        response = await self.get_response(request)
+        self._observe(request, response, start_time)
+        return response
+
+
+class TracingMiddleware:
+    # Traces each request (see supabase_service/tracing.py): the response carries
+    # X-Request-ID and a Server-Timing breakdown, and spans are exported when
+    # TRACE_EXPORT_FILE is set.
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def _finish(self, trace, response, start_time):
+        total_ms = (time_module.perf_counter() - start_time) * 1000
+        response['X-Request-ID'] = trace.request_id
+        response['Server-Timing'] = trace.server_timing(total_ms)
+        export_trace(trace)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        start_time = time_module.perf_counter()
+        with trace_scope(
+            f'{request.method} {request.path}',
+            request_id=request.headers.get('X-Request-ID'),
+            **{'http.method': request.method, 'http.target': request.path},
+        ) as trace:
+            response = self.get_response(request)
+        self._finish(trace, response, start_time)
+        return response
+
+    async def __acall__(self, request):
+        start_time = time_module.perf_counter()
+        with trace_scope(
+            f'{request.method} {request.path}',
+            request_id=request.headers.get('X-Request-ID'),
+            **{'http.method': request.method, 'http.target': request.path},
+        ) as trace:
+            response = await self.get_response(request)
+        self._finish(trace, response, start_time)
+        return response
+
+
+class DeadlineMiddleware:
+    # Gives every request a deadline budget (see supabase_service/deadline.py):
+    # REQUEST_DEADLINE_SECONDS, or the REQUEST_DEADLINES entry for the URL name
+    # once the view is resolved.
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with deadline_scope(get_endpoint_budget(None)) as deadline:
+            request.deadline = deadline
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with deadline_scope(get_endpoint_budget(None)) as deadline:
+            request.deadline = deadline
+            return await self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        deadline = getattr(request, 'deadline', None)
+        match = getattr(request, 'resolver_match', None)
+        if deadline is not None and match is not None and match.view_name:
+            deadline.set_budget(get_endpoint_budget(match.view_name))
+        return None
@@ -13,6 +13,9 @@
 
 
 from rest_framework import serializers
+from .supabase_service.tracing import span
+from .supabase_service.appointments import CONFLICT_MESSAGE
+from .supabase_service.schedule import INACTIVE_STATUSES, MINUTES_PER_DAY, to_minutes
 from .models import (
     GENDER_CHOICES,
     APPOINTMENT_STATUS_CHOICES,
@@ -21,7 +24,35 @@ from .models import (
 )
 
 
-class PatientSerializer(serializers.Serializer):
+class SparseFieldsMixin:
+    # Lets a serializer render partial rows fetched with ?fields=.
+    # computed_fields maps read-only derived fields to the columns they are built from
+    # (an empty tuple means the field needs no column at all).
+    computed_fields = {}
+    
+    def __init__(self, *args, **kwargs):
+        self.requested_fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+    
+    @classmethod
+    def columns_for(cls, fields):
+        columns = ['id']
+        for field in fields:
+            columns.extend(cls.computed_fields.get(field, (field,)))
+        return list(dict.fromkeys(columns))
+    
+    def is_valid(self, *args, **kwargs):
+        # Timed as the request's validate span (Server-Timing)
+        with span(f'{self.__class__.__name__}.is_valid', category='validate'):
+            return super().is_valid(*args, **kwargs)
+    
+    def _sparse(self, data):
+        if self.requested_fields is None:
+            return data
+        return {key: value for key, value in data.items() if key in self.requested_fields}
+
+
+class PatientSerializer(SparseFieldsMixin, serializers.Serializer):
     id = serializers.CharField(read_only=True)
     user_id = serializers.CharField(required=False)
     first_name = serializers.CharField(max_length=100)
@@ -42,17 +73,20 @@ class PatientSerializer(serializers.Serializer):
                 if field in data and data[field] is not None:
                     if hasattr(data[field], 'isoformat'):
                         data[field] = data[field].isoformat()
-            return data
+            return self._sparse(data)
         return super().to_representation(instance)
 
 
-class AppointmentSerializer(serializers.Serializer):
+class AppointmentSerializer(SparseFieldsMixin, serializers.Serializer):
+    computed_fields = {'patient_name': ()}
+
     id = serializers.CharField(read_only=True)
     user_id = serializers.CharField(required=False)
     patient_id = serializers.CharField(required=True)
     patient_name = serializers.SerializerMethodField(read_only=True)
     date = serializers.DateField()
     time = serializers.TimeField()
+    duration_minutes = serializers.IntegerField(required=False, min_value=5, max_value=720)
     status = serializers.ChoiceField(
         choices=APPOINTMENT_STATUS_CHOICES,
         default='Pending'
@@ -70,23 +104,52 @@ class AppointmentSerializer(serializers.Serializer):
         return ""
     
     def validate(self, data):
-        from .supabase_service import appointment_service
+        from .supabase_service import appointment_service, is_conflict_precheck_enabled
+        
+        slot_time, duration = data.get('time'), data.get('duration_minutes')
+        if slot_time is not None and duration is not None and to_minutes(slot_time) + duration > MINUTES_PER_DAY:
+            raise serializers.ValidationError({'duration_minutes': 'The appointment must end by midnight.'})
+        
+        if not any(field in data for field in ('date', 'time', 'duration_minutes', 'status')):
+            # Nothing that decides the time the appointment occupies changes
+            return data
+        if data.get('status') in INACTIVE_STATUSES:
+            # Cancelled appointments free their slot and never conflict
+            return data
+        instance = self.instance if isinstance(self.instance, dict) else {}
         
-        # Check for duplicate appointments with same date and time
-        existing_appointments = appointment_service.get_all_appointments(limit=1000)
+        # Bulk imports check every row against one lazily loaded view of each day
+        slots = self.context.get('appointment_slots')
+        if slots is not None:
+            if data.get('date') is None or slot_time is None:
+                # Half a slot in a bulk update; the database constraint still guards the write
+                return data
+            if slots.is_booked(data['date'], slot_time, duration, exclude_id=instance.get('id')):
+                raise serializers.ValidationError(CONFLICT_MESSAGE)
+            if not self.partial:
+                # Later rows of the same bulk request must not take this slot either
+                slots.book(data['date'], slot_time, duration)
+            return data
+        
+        if not is_conflict_precheck_enabled():
+            # The insert/update itself is the check (sql/appointment_slots.sql)
+            return data
         
-        for appointment in existing_appointments:
-            # Skip if this is an update to the same appointment
-            if self.instance and isinstance(self.instance, dict) and self.instance.get('id') == appointment.get('id'):
-                continue
-            
-            # Check if date and time already exist
-            if (appointment.get('date') == str(data.get('date')) and 
-                appointment.get('time') == str(data.get('time'))):
-                raise serializers.ValidationError(
-                    "An appointment already exists for this date and time."
-                )
+        # Check for an overlapping appointment, within the owner's schedule
+        user_id = data.get('user_id') or instance.get('user_id')
+        appointments = appointment_service.for_user(user_id) if user_id else appointment_service
+        slot = {field: data.get(field) for field in ('date', 'time', 'duration_minutes', 'status')}
+        if instance.get('id') and any(value is None for value in slot.values()):
+            # A partial update keeps the stored values of what it does not send
+            current = appointments.get_appointment(instance['id'], columns=list(slot))
+            if not current:
+                return data
+            slot = {field: value if value is not None else current.get(field) for field, value in slot.items()}
+        if slot['date'] is None or slot['time'] is None or slot['status'] in INACTIVE_STATUSES:
+            return data
         
+        if appointments.find_conflict(slot['date'], slot['time'], slot['duration_minutes'], exclude_id=instance.get('id')):
+            raise serializers.ValidationError(CONFLICT_MESSAGE)
         return data
     
     def to_representation(self, instance):
@@ -106,11 +169,13 @@ class AppointmentSerializer(serializers.Serializer):
                         data[field] = data[field].isoformat()
             if 'patient_name' not in data:
                 data['patient_name'] = self.get_patient_name(instance)
-            return data
+            return self._sparse(data)
         return super().to_representation(instance)
 
 
-class TreatmentSerializer(serializers.Serializer):
+class TreatmentSerializer(SparseFieldsMixin, serializers.Serializer):
+    computed_fields = {'patient_name': ()}
+
     id = serializers.CharField(read_only=True)
     user_id = serializers.CharField(required=False)
     patient_id = serializers.CharField(required=True)
@@ -147,11 +212,13 @@ class TreatmentSerializer(serializers.Serializer):
                 data['cost'] = str(data['cost'])
             if 'patient_name' not in data:
                 data['patient_name'] = self.get_patient_name(instance)
-            return data
+            return self._sparse(data)
         return super().to_representation(instance)
 
 
-class InvoiceSerializer(serializers.Serializer):
+class InvoiceSerializer(SparseFieldsMixin, serializers.Serializer):
+    computed_fields = {'patient_name': (), 'treatment_description': ()}
+
     id = serializers.CharField(read_only=True)
     user_id = serializers.CharField(required=False)
     patient_id = serializers.CharField(required=True)
@@ -201,11 +268,13 @@ class InvoiceSerializer(serializers.Serializer):
                 data['patient_name'] = self.get_patient_name(instance)
             if 'treatment_description' not in data:
                 data['treatment_description'] = self.get_treatment_description(instance)
-            return data
+            return self._sparse(data)
         return super().to_representation(instance)
 
 
-class InventorySerializer(serializers.Serializer):
+class InventorySerializer(SparseFieldsMixin, serializers.Serializer):
+    computed_fields = {'status': ('quantity',)}
+
     id = serializers.CharField(read_only=True)
     user_id = serializers.CharField(required=False)
     item = serializers.CharField(max_length=255)
@@ -228,14 +297,17 @@ class InventorySerializer(serializers.Serializer):
                 if field in data and data[field] is not None:
                     if hasattr(data[field], 'isoformat'):
                         data[field] = data[field].isoformat()
-            if 'status' not in data or data.get('_compute_status', True):
+            # Partial rows without quantity cannot have a status computed
+            if 'quantity' in data and ('status' not in data or data.get('_compute_status', True)):
                 data['status'] = compute_inventory_status(data.get('quantity', 0))
-            return data
+            return self._sparse(data)
         return super().to_representation(instance)
 
 
-class XraySerializer(serializers.Serializer):
+class XraySerializer(SparseFieldsMixin, serializers.Serializer):
     """Serializer for patient X-ray/scan images."""
+    computed_fields = {'signed_url': ('image_url',)}
+
     id = serializers.CharField(read_only=True)
     user_id = serializers.CharField(required=False)
     patient_id = serializers.CharField(required=True)
@@ -259,5 +331,5 @@ class XraySerializer(serializers.Serializer):
                 if field in data and data[field] is not None:
                     if hasattr(data[field], 'isoformat'):
                         data[field] = data[field].isoformat()
-            return data
+            return self._sparse(data)
         return super().to_representation(instance)
@@ -2,11 +2,25 @@
 
 # This package provides lazy-initialized service classes for each entity:
 # - base.py: Base service class with generic CRUD operations
+# - async_base.py: asyncio counterpart of the base class (async Supabase client)
 # - patients.py: Patient CRUD operations
 # - appointments.py: Appointment CRUD operations
 # - treatments.py: Treatment CRUD operations
 # - invoices.py: Invoice CRUD operations
 # - inventory.py: Inventory CRUD operations
+# - cache.py: Read-through record cache shared by all services
+# - identity_map.py: Request-scoped identity map consulted before the cache
+# - fanout.py: gather() for running independent service reads in parallel
+# - metrics.py: Prometheus-format metrics for every Supabase call
+# - tracing.py: Per-request spans, Server-Timing and JSON-lines export
+# - resilience.py: Retries for transient read failures and per-table circuit breakers
+# - deadline.py: Per-request deadline budget applied to every Supabase call
+# - autocomplete.py: Per-tenant in-memory n-gram index behind patient autocomplete
+# - schedule.py: Per-tenant, per-day appointment interval index for overlap checks,
+#   and the cached per-month counts behind the calendar view
+
+# Each entity module also defines an Async*Service with the same methods as
+# coroutines, used by the async views under ASGI.
 
 # Services use lazy initialization to avoid connecting to Supabase until
 # the first actual database operation is performed.
@@ -18,12 +32,46 @@ from .base import (
     SupabaseDatabaseError,
     SupabaseConnectionError,
     SupabaseDocumentNotFoundError,
+    SupabaseDeadlineExceededError,
+    BulkWriteError,
+)
+from .cache import (
+    RecordCache,
+    LRURecordCache,
+    DjangoRecordCache,
+    get_record_cache,
+    set_record_cache,
+)
+from .identity_map import IdentityMap, get_identity_map, identity_map_scope
+from .fanout import Call, call, gather
+from .metrics import record_query, render_metrics, reset_metrics
+from .tracing import span, trace_scope, get_current_trace
+from .resilience import CircuitBreaker, get_breaker, get_breaker_states, reset_breakers
+from .deadline import Deadline, deadline_scope, get_deadline, remaining_budget
+from .autocomplete import (
+    INDEXED_FIELDS as AUTOCOMPLETE_FIELDS,
+    PatientAutocompleteIndex,
+    get_autocomplete_registry,
+    reset_autocomplete_indexes,
+    is_autocomplete_enabled,
+)
+from .schedule import (
+    DaySchedule,
+    get_schedule_registry,
+    reset_schedules,
 )
-from .patients import PatientService
-from .appointments import AppointmentService
-from .treatments import TreatmentService
-from .invoices import InvoiceService
-from .inventory import InventoryService
+from .async_base import AsyncBaseSupabaseService
+from .patients import PatientService, AsyncPatientService
+from .appointments import (
+    AppointmentService,
+    AsyncAppointmentService,
+    AppointmentConflictError,
+    AppointmentSlots,
+    is_conflict_precheck_enabled,
+)
+from .treatments import TreatmentService, AsyncTreatmentService
+from .invoices import InvoiceService, AsyncInvoiceService
+from .inventory import InventoryService, AsyncInventoryService
 from .xrays import XrayService
 
 
@@ -34,6 +82,11 @@ _treatment_service = None
 _invoice_service = None
 _inventory_service = None
 _xray_service = None
+_async_patient_service = None
+_async_appointment_service = None
+_async_treatment_service = None
+_async_invoice_service = None
+_async_inventory_service = None
 
 
 def get_patient_service():
@@ -78,6 +131,41 @@ def get_xray_service():
     return _xray_service
 
 
+def get_async_patient_service():
+    global _async_patient_service
+    if _async_patient_service is None:
+        _async_patient_service = AsyncPatientService()
+    return _async_patient_service
+
+
+def get_async_appointment_service():
+    global _async_appointment_service
+    if _async_appointment_service is None:
+        _async_appointment_service = AsyncAppointmentService()
+    return _async_appointment_service
+
+
+def get_async_treatment_service():
+    global _async_treatment_service
+    if _async_treatment_service is None:
+        _async_treatment_service = AsyncTreatmentService()
+    return _async_treatment_service
+
+
+def get_async_invoice_service():
+    global _async_invoice_service
+    if _async_invoice_service is None:
+        _async_invoice_service = AsyncInvoiceService()
+    return _async_invoice_service
+
+
+def get_async_inventory_service():
+    global _async_inventory_service
+    if _async_inventory_service is None:
+        _async_inventory_service = AsyncInventoryService()
+    return _async_inventory_service
+
+
 class _LazyService:
     
     def __init__(self, getter):
@@ -97,6 +185,11 @@ treatment_service = _LazyService(get_treatment_service)
 invoice_service = _LazyService(get_invoice_service)
 inventory_service = _LazyService(get_inventory_service)
 xray_service = _LazyService(get_xray_service)
+async_patient_service = _LazyService(get_async_patient_service)
+async_appointment_service = _LazyService(get_async_appointment_service)
+async_treatment_service = _LazyService(get_async_treatment_service)
+async_invoice_service = _LazyService(get_async_invoice_service)
+async_inventory_service = _LazyService(get_async_inventory_service)
 
 
 __all__ = [
@@ -105,22 +198,76 @@ __all__ = [
     'SupabaseDatabaseError',
     'SupabaseConnectionError',
     'SupabaseDocumentNotFoundError',
+    'SupabaseDeadlineExceededError',
+    'BulkWriteError',
+    'RecordCache',
+    'LRURecordCache',
+    'DjangoRecordCache',
+    'get_record_cache',
+    'set_record_cache',
+    'IdentityMap',
+    'get_identity_map',
+    'identity_map_scope',
+    'Call',
+    'call',
+    'gather',
+    'record_query',
+    'render_metrics',
+    'reset_metrics',
+    'span',
+    'trace_scope',
+    'get_current_trace',
+    'CircuitBreaker',
+    'get_breaker',
+    'get_breaker_states',
+    'reset_breakers',
+    'Deadline',
+    'deadline_scope',
+    'get_deadline',
+    'remaining_budget',
+    'AUTOCOMPLETE_FIELDS',
+    'PatientAutocompleteIndex',
+    'get_autocomplete_registry',
+    'reset_autocomplete_indexes',
+    'is_autocomplete_enabled',
+    'DaySchedule',
+    'get_schedule_registry',
+    'reset_schedules',
     'PatientService',
     'AppointmentService',
+    'AppointmentConflictError',
+    'AppointmentSlots',
+    'is_conflict_precheck_enabled',
     'TreatmentService',
     'InvoiceService',
     'InventoryService',
     'XrayService',
+    'AsyncBaseSupabaseService',
+    'AsyncPatientService',
+    'AsyncAppointmentService',
+    'AsyncTreatmentService',
+    'AsyncInvoiceService',
+    'AsyncInventoryService',
     'get_patient_service',
     'get_appointment_service',
     'get_treatment_service',
     'get_invoice_service',
     'get_inventory_service',
     'get_xray_service',
+    'get_async_patient_service',
+    'get_async_appointment_service',
+    'get_async_treatment_service',
+    'get_async_invoice_service',
+    'get_async_inventory_service',
     'patient_service',
     'appointment_service',
     'treatment_service',
     'invoice_service',
     'inventory_service',
     'xray_service',
+    'async_patient_service',
+    'async_appointment_service',
+    'async_treatment_service',
+    'async_invoice_service',
+    'async_inventory_service',
 ]
@@ -1,28 +1,500 @@
 #Appointment CRUD operations for Supabase.
+# An appointment occupies [time, time + duration_minutes) on its date, and a
+# tenant's active (not Cancelled) appointments may not overlap. Bookings are
+# checked with find_conflict() against the day's interval index (schedule.py),
+# and the constraint from sql/appointment_slots.sql makes the write itself the
+# final check: its violation surfaces as AppointmentConflictError. With
+# APPOINTMENT_CONFLICT_PRECHECK=False the index is skipped and the constraint
+# alone rejects double bookings. find_free_slots() sweeps the same indexes
+# against the working hours. get_month_counts() serves the calendar view with
+# per-day counts by status, counted in the database and cached per month.
+# Until sql/appointment_slots.sql has added duration_minutes, reads and writes
+# leave the column out and every appointment lasts APPOINTMENT_DEFAULT_DURATION.
+import functools
+import logging
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
 from typing import Dict, List, Any, Optional
-from .base import BaseSupabaseService
+from .base import (
+    BaseSupabaseService,
+    BulkWriteError,
+    SupabaseServiceError,
+    UNIQUE_VIOLATION,
+    EXCLUSION_VIOLATION,
+    _quote_filter_value,
+    is_unique_violation,
+    operation,
+)
+from .async_base import AsyncBaseSupabaseService
+from .schedule import (
+    SCHEDULE_FIELDS,
+    INACTIVE_STATUSES,
+    CALENDAR_STATUSES,
+    MINUTES_PER_DAY,
+    DaySchedule,
+    default_duration,
+    format_minutes,
+    get_schedule_registry,
+    slot_step,
+    to_minutes,
+    working_windows,
+)
+
+CONFLICT_MESSAGE = "An appointment already exists for this date and time."
+# Calendar order: date, then time (then id); served by the (user_id, date, time, id) index
+SCHEDULE_ORDER = 'date,time'
+MAX_FREE_SLOT_DAYS = 31
+# Rows per request when reading a date range of schedules
+RANGE_PAGE_SIZE = 1000
+CALENDAR_FIELDS = ('date', 'status')
+# Columns added by sql/appointment_slots.sql, which may not have run yet
+OPTIONAL_COLUMNS = ('duration_minutes',)
+# PostgREST's "column does not exist" (reads) and "column not in the schema cache" (writes)
+MISSING_COLUMN_CODES = ('42703', 'PGRST204')
+
+logger = logging.getLogger(__name__)
+
+# Optional columns PostgREST reported missing; left out until the process restarts
+_missing_columns = set()
+
+
+class AppointmentConflictError(ValueError):
+    #Raised when a write would double-book a slot
+    
+    def __init__(self, message: str = CONFLICT_MESSAGE):
+        super().__init__(message)
+
+
+def _get_setting(name: str, default: Any) -> Any:
+    try:
+        from django.conf import settings
+        return getattr(settings, name, default)
+    except Exception:
+        return default
+
+
+def is_conflict_precheck_enabled() -> bool:
+    return bool(_get_setting('APPOINTMENT_CONFLICT_PRECHECK', True))
+
+
+@contextmanager
+def _slot_conflicts():
+    # Turn the slot constraints' violations into the booking error
+    try:
+        yield
+    except SupabaseServiceError as e:
+        if is_unique_violation(e, codes=(UNIQUE_VIOLATION, EXCLUSION_VIOLATION)):
+            raise AppointmentConflictError() from e
+        raise
+
+
+def _column_went_missing(exception: Optional[BaseException]) -> bool:
+    # True when the error is about an optional column not known to be missing yet,
+    # which is remembered from now on
+    while exception is not None:
+        if str(getattr(exception, 'code', '')) in MISSING_COLUMN_CODES:
+            message = str(getattr(exception, 'message', '') or exception)
+            for column in OPTIONAL_COLUMNS:
+                if column in message and column not in _missing_columns:
+                    logger.warning(
+                        f"Column appointments.{column} is missing (run sql/appointment_slots.sql); "
+                        f"appointments last APPOINTMENT_DEFAULT_DURATION minutes until it exists"
+                    )
+                    _missing_columns.add(column)
+                    return True
+            return False
+        exception = exception.__cause__ or exception.__context__
+    return False
+
+
+def _tolerating_missing_columns(steps):
+    # For operations that may read or write OPTIONAL_COLUMNS: when the database
+    # reports one missing, the operation runs again without it
+    @functools.wraps(steps)
+    def retrying(self, *args, **kwargs):
+        while True:
+            try:
+                return (yield from steps(self, *args, **kwargs))
+            except SupabaseServiceError as e:
+                if not _column_went_missing(e):
+                    raise
+    return retrying
+
+
+def _as_conflict(result: Any) -> Any:
+    # A bulk write result, with slot constraint violations turned into the booking error
+    if isinstance(result, Exception) and is_unique_violation(result, codes=(UNIQUE_VIOLATION, EXCLUSION_VIOLATION)):
+        return AppointmentConflictError()
+    return result
+
+
+def _interval(slot_time: Any, duration_minutes: Optional[int]) -> tuple:
+    start = to_minutes(slot_time)
+    return start, start + int(duration_minutes or default_duration())
+
+
+def _days_between(start: date, end: date) -> List[str]:
+    if end < start:
+        raise ValueError("'to' must not be before 'from'")
+    if (end - start).days >= MAX_FREE_SLOT_DAYS:
+        raise ValueError(f"At most {MAX_FREE_SLOT_DAYS} days per request")
+    return [str(start + timedelta(days=offset)) for offset in range((end - start).days + 1)]
+
+
+def _group_by_day(rows: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    by_day: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        by_day.setdefault(str(row.get('date')), []).append(row)
+    return by_day
+
+
+def _free_slot_days(schedules: Dict[str, DaySchedule], duration: int, step: int, not_before: Optional[datetime]) -> List[Dict[str, Any]]:
+    days = []
+    for day, schedule in schedules.items():
+        current = date.fromisoformat(day)
+        slots = schedule.free_slots(working_windows(current), duration, step)
+        if not_before is not None and current <= not_before.date():
+            # Nothing already started; the cached list itself stays untouched
+            earliest = not_before.hour * 60 + not_before.minute if current == not_before.date() else MINUTES_PER_DAY
+            slots = [slot for slot in slots if slot >= earliest]
+        days.append({'date': day, 'slots': [format_minutes(slot) for slot in slots]})
+    return days
+
+
+def _month_end(month: date) -> date:
+    return (month.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+
+
+def _count_by_day(month: date, rows: List[Dict[str, Any]]) -> List[List[int]]:
+    # Per day of the month (the 1st first), the appointments per CALENDAR_STATUSES.
+    # Rows are {'date', 'status'} projections or {'date', 'status', 'count'} groups.
+    column = {status: position for position, status in enumerate(CALENDAR_STATUSES)}
+    counts = [[0] * len(CALENDAR_STATUSES) for _ in range(_month_end(month).day)]
+    for row in rows:
+        position = column.get(row.get('status'))
+        if position is not None:
+            counts[int(str(row['date'])[8:10]) - 1][position] += int(row.get('count', 1))
+    return counts
+
+
+class AppointmentSlots:
+    # Booked intervals of one tenant while validating a batch (bulk import): each date
+    # is read once, on first use, and rows accepted earlier in the batch count as booked
+    
+    def __init__(self, service: 'AppointmentService'):
+        self._service = service
+        self._days: Dict[str, DaySchedule] = {}
+    
+    def _day(self, slot_date: Any) -> DaySchedule:
+        key = str(slot_date)
+        if key not in self._days:
+            # A private copy: tentative bookings must not leak into the shared index
+            self._days[key] = DaySchedule(self._service._load_day(key))
+        return self._days[key]
+    
+    def is_booked(self, slot_date: Any, slot_time: Any, duration_minutes: Optional[int] = None, exclude_id: Optional[str] = None) -> bool:
+        return self._day(slot_date).overlapping(*_interval(slot_time, duration_minutes), exclude_id=exclude_id) is not None
+    
+    def book(self, slot_date: Any, slot_time: Any, duration_minutes: Optional[int] = None) -> None:
+        self._day(slot_date).add(None, *_interval(slot_time, duration_minutes))
 
 
 class AppointmentService(BaseSupabaseService):  
     table_name = 'appointments'
     
-    def create_appointment(self, appointment_data: Dict[str, Any]) -> str:
+    # Columns the database does not have yet are never selected or written
+    
+    def _select_columns(self, columns: Optional[List[str]], *required: str) -> str:
+        if columns:
+            columns = [column for column in columns if column not in _missing_columns] or ['id']
+        return super()._select_columns(columns, *required)
+    
+    def _prepare_insert(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return super()._prepare_insert({key: value for key, value in data.items() if key not in _missing_columns})
+    
+    def _prepare_update(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return super()._prepare_update({key: value for key, value in data.items() if key not in _missing_columns})
+    
+    @operation
+    @_tolerating_missing_columns
+    def get(self, record_id: str, columns: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        return (yield from super().get.steps(record_id, columns=columns))
+    
+    @operation
+    @_tolerating_missing_columns
+    def get_all(
+        self,
+        limit: Optional[int] = None,
+        order_by: str = 'created_at',
+        descending: bool = True,
+        cursor: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        columns: Optional[List[str]] = None,
+        bounds: Optional[Dict[str, tuple]] = None,
+    ) -> List[Dict[str, Any]]:
+        return (yield from super().get_all.steps(
+            limit=limit, order_by=order_by, descending=descending,
+            cursor=cursor, filters=filters, columns=columns, bounds=bounds,
+        ))
+    
+    # Writes keep the loaded days of the interval index current
+    
+    @operation
+    @_tolerating_missing_columns
+    def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        with _slot_conflicts():
+            record = yield from super().create.steps(data)
+        get_schedule_registry().appointments_changed([record], self.scope_user_id)
+        return record
+    
+    @operation
+    @_tolerating_missing_columns
+    def update(self, record_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with _slot_conflicts():
+            record = yield from super().update.steps(record_id, data)
+        if record:
+            get_schedule_registry().appointments_changed([record], self.scope_user_id)
+        return record
+    
+    @operation
+    def delete(self, record_id: str) -> bool:
+        deleted = yield from super().delete.steps(record_id)
+        if deleted:
+            get_schedule_registry().appointments_removed([record_id], self.scope_user_id)
+        return deleted
+    
+    @operation
+    @_tolerating_missing_columns
+    def create_many(self, records: List[Dict[str, Any]], chunk_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        try:
+            with _slot_conflicts():
+                created = yield from super().create_many.steps(records, chunk_size=chunk_size)
+        except BulkWriteError as e:
+            # Some chunks went through: index those, and report double bookings per row
+            get_schedule_registry().appointments_changed(e.written, self.scope_user_id)
+            e.results = [_as_conflict(result) for result in e.results]
+            raise
+        get_schedule_registry().appointments_changed(created, self.scope_user_id)
+        return created
+    
+    @operation
+    @_tolerating_missing_columns
+    def update_many(self, data: Dict[str, Any], ids: Optional[List[str]] = None, filters: Optional[Dict[str, Any]] = None, chunk_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        with _slot_conflicts():
+            updated = yield from super().update_many.steps(data, ids=ids, filters=filters, chunk_size=chunk_size)
+        get_schedule_registry().appointments_changed(updated, self.scope_user_id)
+        return updated
+    
+    @operation
+    def delete_many(self, ids: Optional[List[str]] = None, filters: Optional[Dict[str, Any]] = None, chunk_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        deleted = yield from super().delete_many.steps(ids=ids, filters=filters, chunk_size=chunk_size)
+        get_schedule_registry().appointments_removed([row.get('id') for row in deleted], self.scope_user_id)
+        return deleted
+    
+    def _day_query(self, client, day: Any):
+        # The day's active appointments, only the columns the interval index needs
+        query = client.table(self.table_name).select(self._select_columns(list(SCHEDULE_FIELDS))).eq('date', str(day))
+        for inactive in INACTIVE_STATUSES:
+            query = query.neq('status', inactive)
+        return self._apply_scope(query)
+    
+    @operation
+    @_tolerating_missing_columns
+    def _load_day(self, day: Any) -> List[Dict[str, Any]]:
+        try:
+            response = yield (lambda client: self._day_query(client, day)), 'schedule'
+            return response.data or []
+        except SupabaseServiceError:
+            raise
+        except Exception as e:
+            raise SupabaseServiceError(f"Failed to load the appointment schedule: {e}")
+    
+    @operation
+    def get_day_schedule(self, day: Any, reload: bool = False) -> DaySchedule:
+        # The tenant's interval index for one day; unscoped services read it every time,
+        # reload=True reads it even when a fresh copy is loaded
+        if self.scope_user_id is None:
+            rows = yield from self._load_day.steps(day)
+            return DaySchedule(rows)
+        registry = get_schedule_registry()
+        schedule = None if reload else registry.fresh(self.scope_user_id, day)
+        if schedule is None:
+            rows = yield from self._load_day.steps(day)
+            schedule = registry.store(self.scope_user_id, day, rows)
+        return schedule
+    
+    @operation
+    def find_conflict(self, slot_date: Any, slot_time: Any, duration_minutes: Optional[int] = None, exclude_id: Optional[str] = None) -> Optional[str]:
+        # Id of another active appointment overlapping this one, or None. A free slot is
+        # taken from the loaded day; a conflict is always confirmed against the day as
+        # stored now, since another worker may have cancelled, moved or deleted it
+        interval = _interval(slot_time, duration_minutes)
+        cached = get_schedule_registry().fresh(self.scope_user_id, slot_date) if self.scope_user_id else None
+        if cached is not None and cached.overlapping(*interval, exclude_id=exclude_id) is None:
+            return None
+        schedule = yield from self.get_day_schedule.steps(slot_date, reload=True)
+        return schedule.overlapping(*interval, exclude_id=exclude_id)
+    
+    def _range_query(self, client, start: Any, end: Any, offset: int, fields: tuple = SCHEDULE_FIELDS, active_only: bool = True):
+        query = client.table(self.table_name).select(self._select_columns(list(fields))).gte('date', str(start)).lte('date', str(end))
+        for inactive in INACTIVE_STATUSES if active_only else ():
+            query = query.neq('status', inactive)
+        query = self._apply_scope(query).order('date').order('time').order('id')
+        return query.range(offset, offset + RANGE_PAGE_SIZE - 1)
+    
+    @operation
+    @_tolerating_missing_columns
+    def _load_range(self, start: Any, end: Any, fields: tuple = SCHEDULE_FIELDS, active_only: bool = True) -> List[Dict[str, Any]]:
+        # Active (or all) appointments of a date range, paged past PostgREST's row cap
+        rows: List[Dict[str, Any]] = []
+        try:
+            while True:
+                response = yield (lambda client: self._range_query(client, start, end, len(rows), fields, active_only)), 'schedule'
+                page = response.data or []
+                rows.extend(page)
+                if len(page) < RANGE_PAGE_SIZE:
+                    return rows
+        except SupabaseServiceError:
+            raise
+        except Exception as e:
+            raise SupabaseServiceError(f"Failed to load the appointment schedule: {e}")
+    
+    @operation
+    def get_day_schedules(self, start: date, end: date) -> Dict[str, DaySchedule]:
+        # Interval indexes for every day from start to end; the days not loaded yet
+        # are read together with one range query
+        days = _days_between(start, end)
+        if self.scope_user_id is None:
+            by_day = _group_by_day((yield from self._load_range.steps(start, end)))
+            return {day: DaySchedule(by_day.get(day, [])) for day in days}
+        registry = get_schedule_registry()
+        schedules = {day: registry.fresh(self.scope_user_id, day) for day in days}
+        missing = [day for day, schedule in schedules.items() if schedule is None]
+        if missing:
+            by_day = _group_by_day((yield from self._load_range.steps(missing[0], missing[-1])))
+            for day in missing:
+                schedules[day] = registry.store(self.scope_user_id, day, by_day.get(day, []))
+        return schedules
+    
+    @operation
+    def find_free_slots(self, start: date, end: date, duration_minutes: Optional[int] = None, not_before: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        # Per day from start to end: the 'HH:MM' starts of every free slot of the given
+        # length within working hours (APPOINTMENT_WORKING_HOURS), on the
+        # APPOINTMENT_SLOT_STEP grid, skipping anything before not_before
+        duration = int(duration_minutes or default_duration())
+        schedules = yield from self.get_day_schedules.steps(start, end)
+        return _free_slot_days(schedules, duration, slot_step(), not_before)
+    
+    def _calendar_function(self) -> Optional[str]:
+        # Grouped count in the database (sql/appointment_calendar.sql), used when
+        # APPOINTMENT_CALENDAR_RPC names the function; only for tenant-scoped services
+        function = _get_setting('APPOINTMENT_CALENDAR_RPC', '')
+        if not function or self.scope_user_id is None:
+            return None
+        return function
+    
+    def _calendar_rpc(self, client, function: str, month: date):
+        return client.rpc(function, {
+            'p_user_id': self.scope_user_id,
+            'p_start': str(month),
+            'p_end': str(_month_end(month)),
+        })
+    
+    @operation
+    def _count_month(self, month: date) -> List[List[int]]:
+        try:
+            function = self._calendar_function()
+            if function is None:
+                # Two narrow columns per appointment of the month, counted in one pass
+                rows = yield from self._load_range.steps(month, _month_end(month), CALENDAR_FIELDS, active_only=False)
+            else:
+                response = yield (lambda client: self._calendar_rpc(client, function, month)), 'calendar'
+                rows = response.data or []
+            return _count_by_day(month, rows)
+        except SupabaseServiceError:
+            raise
+        except Exception as e:
+            raise SupabaseServiceError(f"Failed to count appointments: {e}")
+    
+    @operation
+    def get_month_counts(self, month: date) -> List[List[int]]:
+        # Appointments per day of the month holding `month` (the 1st first) and status
+        # (CALENDAR_STATUSES order); counted once per APPOINTMENT_CALENDAR_TTL
+        month = month.replace(day=1)
+        if self.scope_user_id is None:
+            return (yield from self._count_month.steps(month))
+        registry = get_schedule_registry()
+        counts = registry.month_counts(self.scope_user_id, month.isoformat()[:7])
+        if counts is None:
+            counted = yield from self._count_month.steps(month)
+            counts = registry.store_month_counts(self.scope_user_id, month.isoformat()[:7], counted)
+        return counts
+    
+    @operation
+    def get_calendar_counts(self, start: date, end: date) -> List[List[int]]:
+        # Per day from start to end, like get_month_counts(); a week may span two months
+        days = [date.fromisoformat(day) for day in _days_between(start, end)]
+        months = {day.replace(day=1): None for day in days}
+        for month in months:
+            months[month] = yield from self.get_month_counts.steps(month)
+        return [months[day.replace(day=1)][day.day - 1] for day in days]
+    
+    def create_appointment(self, appointment_data: Dict[str, Any]) -> Dict[str, Any]:
         return self.create(appointment_data)
     
-    def get_appointment(self, appointment_id: str) -> Optional[Dict[str, Any]]:
-        return self.get(appointment_id)
+    def get_appointment(self, appointment_id: str, columns: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        return self.get(appointment_id, columns=columns)
     
     def get_all_appointments(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
-        return self.get_all(limit=limit, order_by='date')
+        return self.get_all(limit=limit, order_by=SCHEDULE_ORDER)
+    
+    def get_appointments_page(self, limit: int, cursor: Optional[str] = None, columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        return self.get_page(limit, order_by=SCHEDULE_ORDER, cursor=cursor, columns=columns)
+    
+    def get_appointments_in_range(self, start: Optional[date], end: Optional[date], limit: int = 100, cursor: Optional[str] = None, columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        # Appointments dated start..end (inclusive, either side may be open) in
+        # calendar order, one keyset page at a time
+        return self.get_page(
+            limit, order_by=SCHEDULE_ORDER, descending=False, cursor=cursor,
+            columns=columns, bounds={'date': (start, end)},
+        )
     
-    def get_patient_appointments(self, patient_id: str) -> List[Dict[str, Any]]:
-        return self.query_by_field('patient_id', patient_id)
+    def _upcoming_query(self, client, limit: int, now: datetime, columns: Optional[List[str]]):
+        today = now.date().isoformat()
+        query = client.table(self.table_name).select(self._select_columns(columns, 'id', 'date', 'time'))
+        # date >= today keeps the index scan a range; the or_ drops today's past hours
+        query = self._apply_scope(query).gte('date', today).or_(
+            f"date.gt.{_quote_filter_value(today)},"
+            f"and(date.eq.{_quote_filter_value(today)},time.gte.{_quote_filter_value(now.strftime('%H:%M:%S'))})"
+        )
+        for inactive in INACTIVE_STATUSES:
+            query = query.neq('status', inactive)
+        return query.order('date').order('time').order('id').limit(limit)
     
-    def get_appointments_by_status(self, status: str) -> List[Dict[str, Any]]:
-        return self.query_by_field('status', status)
+    @operation
+    def get_upcoming(self, limit: int = 10, now: Optional[datetime] = None, columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        # The next `limit` active appointments from `now` (server local time) on
+        now = now or datetime.now()
+        try:
+            response = yield (lambda client: self._upcoming_query(client, limit, now, columns)), 'upcoming'
+            return response.data or []
+        except SupabaseServiceError:
+            raise
+        except Exception as e:
+            raise SupabaseServiceError(f"Failed to retrieve upcoming appointments: {e}")
     
-    def update_appointment(self, appointment_id: str, appointment_data: Dict[str, Any]) -> bool:
+    def get_patient_appointments(self, patient_id: str, columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        return self.query_by_field('patient_id', patient_id, columns=columns)
+    
+    def get_appointments_by_status(self, status: str, columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        return self.query_by_field('status', status, columns=columns)
+    
+    def update_appointment(self, appointment_id: str, appointment_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         return self.update(appointment_id, appointment_data)
     
     def delete_appointment(self, appointment_id: str) -> bool:
         return self.delete(appointment_id)
+
+
+class AsyncAppointmentService(AsyncBaseSupabaseService, AppointmentService):
+    pass
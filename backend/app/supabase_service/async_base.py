@@ -0,0 +1,68 @@
+# Asyncio counterpart of BaseSupabaseService.
+# Every @operation method (CRUD, bulk *_many(), and the entity services' own
+# queries) is inherited as is: only the round-trips differ, awaited on the async
+# Supabase client so one process can keep many requests in flight.
+
+
+import logging
+
+from .base import (
+    BaseSupabaseService,
+    SupabaseServiceError,
+    SupabaseConnectionError,
+)
+from .metrics import record_query, count_rows
+from .resilience import acall_with_resilience
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncBaseSupabaseService(BaseSupabaseService):
+    _async_client = None  # Set to pin one async client (e.g. a fake) for every event loop
+
+    async def get_async_client(self):
+        if AsyncBaseSupabaseService._async_client is not None:
+            return AsyncBaseSupabaseService._async_client
+        try:
+            from app_backend.supabase_utils import (
+                get_async_supabase_client,
+                SupabaseConfigurationError,
+                SupabaseConnectionError as UtilsConnectionError,
+            )
+            return await get_async_supabase_client()
+        except SupabaseConfigurationError as e:
+            logger.error(f"Supabase configuration error: {e}")
+            raise SupabaseServiceError(f"Supabase configuration error: {e}")
+        except UtilsConnectionError as e:
+            raise SupabaseConnectionError(f"Failed to connect to Supabase: {e}")
+        except Exception as e:
+            logger.error(f"Unexpected error connecting to Supabase: {e}", exc_info=True)
+            raise SupabaseServiceError(f"Failed to connect to Supabase: {str(e)}")
+
+    async def _execute_async(self, query, operation: str):
+        retry = getattr(query, 'retry', None)
+        if callable(retry):
+            query = retry(False)
+
+        async def attempt():
+            with record_query(self.table_name, operation) as outcome:
+                response = await query.execute()
+                outcome.rows = count_rows(response.data)
+            return response
+
+        return await acall_with_resilience(self.table_name, operation, attempt)
+
+    async def _run(self, steps):
+        # Drive an @operation generator on the async client: the same steps as
+        # BaseSupabaseService._run(), with each round-trip awaited
+        response, error = None, None
+        while True:
+            try:
+                build, name = steps.throw(error) if error is not None else steps.send(response)
+            except StopIteration as done:
+                return done.value
+            try:
+                client = await self.get_async_client()
+                response, error = await self._execute_async(build(client), name), None
+            except Exception as e:
+                response, error = None, e
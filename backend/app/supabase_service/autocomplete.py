@@ -0,0 +1,368 @@
+# In-process n-gram index for instant patient lookup (/api/patients/autocomplete/).
+# One PatientAutocompleteIndex per tenant, built lazily from PatientService on the
+# tenant's first lookup and then kept current by the patient write paths
+# (create/update/delete, single and bulk), so a keystroke costs no round-trip.
+#
+# Each patient's names, email and phone digits are split into tokens; every
+# token's 1- and 2-character prefixes and all of its trigrams map to postings of
+# document numbers stored in array('I') (4 bytes per entry). A query word of 3+
+# characters intersects the postings of its trigrams, shorter words use the
+# prefix postings; candidates are then checked against the stored tokens and
+# ranked: token prefix matches before substring matches, then by name.
+# Builds load patients in name order, so document order is ranking order and a
+# lookup stops as soon as it has `limit` prefix matches.
+#
+# Memory is bounded: at most PATIENT_AUTOCOMPLETE_MAX_TENANTS indexes are kept
+# (least recently used are dropped), deleted/replaced documents are tombstoned, and
+# an index older than PATIENT_AUTOCOMPLETE_TTL seconds is rebuilt to pick up writes
+# made by other worker processes. Every write appends its patient after the
+# name-ordered region, where lookups must check it; once tombstones outnumber live
+# documents or that tail passes MAX_UNSORTED_DOCS, the index is compacted back
+# into name order.
+
+
+import heapq
+import logging
+import re
+import threading
+import time as time_module
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_TENANTS = 100
+DEFAULT_TTL = 300
+DEFAULT_LIMIT = 10
+MAX_QUERY_WORDS = 5
+# Candidates checked per lookup before settling for the best hits found so far
+MAX_CHECKED = 500
+# Documents added since the last build are scanned on every lookup; past this many
+# (or 1/UNSORTED_FRACTION of the live ones, whichever is larger, so rebuilds stay
+# amortised on large tenants) the index is compacted back into name order
+MAX_UNSORTED_DOCS = 256
+UNSORTED_FRACTION = 64
+INDEXED_FIELDS = ('id', 'first_name', 'last_name', 'phone', 'email')
+
+_TOKEN_SPLIT = re.compile(r'[^0-9a-z]+')
+
+
+def _get_setting(name: str, default: Any) -> Any:
+    try:
+        from django.conf import settings
+        return getattr(settings, name, default)
+    except Exception:
+        return default
+
+
+def is_autocomplete_enabled() -> bool:
+    return bool(_get_setting('PATIENT_AUTOCOMPLETE_INDEX', False))
+
+
+def _normalize(text: Optional[str]) -> str:
+    return (text or '').strip().lower()
+
+
+def _tokens(patient: Dict[str, Any]) -> List[str]:
+    tokens = []
+    for field in ('first_name', 'last_name', 'email'):
+        tokens.extend(token for token in _TOKEN_SPLIT.split(_normalize(patient.get(field))) if token)
+    digits = re.sub(r'\D', '', patient.get('phone') or '')
+    if digits:
+        tokens.append(digits)
+    # Order kept for prefix ranking; duplicates dropped
+    return list(dict.fromkeys(tokens))
+
+
+def _sort_key(patient: Dict[str, Any]) -> str:
+    return f"{_normalize(patient.get('last_name'))} {_normalize(patient.get('first_name'))}"
+
+
+def _grams(token: str) -> Set[str]:
+    grams = {token[:1], token[:2]}
+    grams.update(token[i:i + 3] for i in range(len(token) - 2))
+    return grams
+
+
+def _contains(posting: array, doc: int) -> bool:
+    position = bisect_left(posting, doc)
+    return position < len(posting) and posting[position] == doc
+
+
+def _query_grams(word: str) -> List[str]:
+    if len(word) < 3:
+        return [word]
+    return list({word[i:i + 3] for i in range(len(word) - 2)})
+
+
+class PatientAutocompleteIndex:
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.built_at = time_module.monotonic()
+        self._lock = threading.RLock()
+        self._postings: Dict[str, array] = {}
+        # Per document number: patient id, display row and tokens; None once deleted
+        self._ids: List[Optional[str]] = []
+        self._rows: List[Optional[Dict[str, Any]]] = []
+        self._doc_tokens: List[Optional[List[str]]] = []
+        self._sort_keys: List[Optional[str]] = []
+        self._doc_of: Dict[str, int] = {}
+        self._dead = 0
+        # Documents below this number were loaded in name order (see load())
+        self._sorted_docs = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_of)
+
+    # -- writes --------------------------------------------------------------
+
+    def load(self, patients: Iterable[Dict[str, Any]]) -> None:
+        # Bulk load in name order, so document order is ranking order for search()
+        with self._lock:
+            for patient in sorted(patients, key=_sort_key):
+                self._add(patient)
+            self._sorted_docs = len(self._ids)
+
+    def add(self, patient: Dict[str, Any]) -> None:
+        # Insert or replace one patient; rows without the indexed fields are ignored
+        with self._lock:
+            self._add(patient)
+            self._compact_if_needed()
+
+    def _add(self, patient: Dict[str, Any]) -> None:
+        # Caller holds the lock
+        patient_id = patient.get('id')
+        if not patient_id:
+            return
+        self._remove(patient_id)
+        doc = len(self._ids)
+        tokens = _tokens(patient)
+        self._ids.append(patient_id)
+        self._rows.append({field: patient.get(field) for field in INDEXED_FIELDS})
+        self._doc_tokens.append(tokens)
+        self._sort_keys.append(_sort_key(patient))
+        self._doc_of[patient_id] = doc
+        grams = set()
+        for token in tokens:
+            grams.update(_grams(token))
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting is None:
+                posting = self._postings[gram] = array('I')
+            # Document numbers only grow, so every posting stays sorted
+            posting.append(doc)
+
+    def update(self, patient: Dict[str, Any]) -> None:
+        # Partial rows (e.g. a PATCH of the phone) are merged over the indexed row
+        patient_id = patient.get('id')
+        with self._lock:
+            doc = self._doc_of.get(patient_id)
+            if doc is None:
+                self.add(patient)
+                return
+            merged = dict(self._rows[doc])
+            merged.update({field: patient[field] for field in INDEXED_FIELDS if field in patient})
+            self.add(merged)
+
+    def remove(self, patient_id: str) -> None:
+        with self._lock:
+            self._remove(patient_id)
+            self._compact_if_needed()
+
+    def _compact_if_needed(self) -> None:
+        unsorted_limit = max(MAX_UNSORTED_DOCS, len(self._doc_of) // UNSORTED_FRACTION)
+        if self._dead > max(len(self._doc_of), 1000) or len(self._ids) - self._sorted_docs > unsorted_limit:
+            self._compact()
+
+    def _remove(self, patient_id: str) -> None:
+        doc = self._doc_of.pop(patient_id, None)
+        if doc is None:
+            return
+        self._ids[doc] = None
+        self._rows[doc] = None
+        self._doc_tokens[doc] = None
+        self._sort_keys[doc] = None
+        self._dead += 1
+
+    def _compact(self) -> None:
+        # Renumber the live documents in name order and remap the postings; tokens
+        # and grams are kept, so this costs a sort plus one pass over the postings
+        order = sorted((doc for doc, key in enumerate(self._sort_keys) if key is not None),
+                       key=self._sort_keys.__getitem__)
+        renumbered = [-1] * len(self._ids)
+        for new_doc, doc in enumerate(order):
+            renumbered[doc] = new_doc
+        postings = {}
+        for gram, posting in self._postings.items():
+            docs = sorted(renumbered[doc] for doc in posting if renumbered[doc] >= 0)
+            if docs:
+                postings[gram] = array('I', docs)
+        self._postings = postings
+        self._ids = [self._ids[doc] for doc in order]
+        self._rows = [self._rows[doc] for doc in order]
+        self._doc_tokens = [self._doc_tokens[doc] for doc in order]
+        self._sort_keys = [self._sort_keys[doc] for doc in order]
+        self._doc_of = {patient_id: doc for doc, patient_id in enumerate(self._ids)}
+        self._dead = 0
+        self._sorted_docs = len(order)
+        logger.debug(f"Compacted autocomplete index for tenant {self.user_id}: {len(order)} patients")
+
+    # -- reads ---------------------------------------------------------------
+
+    def _candidates(self, word: str, start: int = 0) -> Iterator[int]:
+        # Documents (from `start`, in document order) holding every gram of the word.
+        # Lazy: the shortest posting drives, the others are probed by binary search.
+        postings = []
+        for gram in _query_grams(word):
+            posting = self._postings.get(gram)
+            if posting is None:
+                return
+            postings.append(posting)
+        postings.sort(key=len)
+        driver, others = postings[0], postings[1:]
+        for position in range(bisect_left(driver, start), len(driver)):
+            doc = driver[position]
+            if all(_contains(posting, doc) for posting in others):
+                yield doc
+
+    @staticmethod
+    def _rank(tokens: List[str], words: List[str]) -> Optional[int]:
+        # Number of words that only match inside a token (0 = all are prefixes), or None
+        rank = 0
+        for word in words:
+            if any(token.startswith(word) for token in tokens):
+                continue
+            if any(word in token for token in tokens):
+                rank += 1
+                continue
+            return None
+        return rank
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> List[Dict[str, Any]]:
+        # Top `limit` patients matching every word of the query
+        words = [word for word in _TOKEN_SPLIT.split(_normalize(query)) if word][:MAX_QUERY_WORDS]
+        if not words:
+            return []
+        with self._lock:
+            # The longest word has the rarest grams and drives the scan; the rest are
+            # checked against each candidate's tokens
+            words.sort(key=len, reverse=True)
+            hits = []
+            prefix_hits = checked = 0
+            for doc in self._candidates(words[0]):
+                if doc >= self._sorted_docs:
+                    break
+                tokens = self._doc_tokens[doc]
+                if tokens is None:
+                    continue
+                checked += 1
+                rank = self._rank(tokens, words)
+                if rank is None:
+                    continue
+                hits.append((rank, self._sort_keys[doc], doc))
+                prefix_hits += rank == 0
+                # The sorted region is in name order: no later document can beat
+                # `limit` prefix matches, and the scan per keystroke stays bounded
+                if prefix_hits >= limit or (checked >= MAX_CHECKED and len(hits) >= limit):
+                    break
+            # Patients added since the last build are out of order and always checked;
+            # with `limit` prefix matches in hand, only names sorting before them can rank
+            cutoff = None
+            if prefix_hits >= limit:
+                cutoff = heapq.nsmallest(limit, (key for rank, key, _ in hits if rank == 0))[-1]
+            for doc in self._candidates(words[0], start=self._sorted_docs):
+                if cutoff is not None and (self._sort_keys[doc] is None or self._sort_keys[doc] >= cutoff):
+                    continue
+                tokens = self._doc_tokens[doc]
+                rank = self._rank(tokens, words) if tokens is not None else None
+                if rank is not None:
+                    hits.append((rank, self._sort_keys[doc], doc))
+            best = heapq.nsmallest(limit, hits)
+            return [dict(self._rows[doc]) for _, _, doc in best]
+
+    def memory_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = sum(len(posting) for posting in self._postings.values())
+            return {
+                'patients': len(self._doc_of),
+                'tombstones': self._dead,
+                'grams': len(self._postings),
+                'posting_entries': entries,
+                'posting_bytes': entries * array('I').itemsize,
+            }
+
+
+class AutocompleteRegistry:
+    # Per-tenant indexes, least recently used first
+
+    def __init__(self):
+        self._indexes: 'OrderedDict[str, PatientAutocompleteIndex]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_locks: Dict[str, threading.Lock] = {}
+
+    def peek(self, user_id: str) -> Optional[PatientAutocompleteIndex]:
+        # The tenant's index if one is loaded; never builds
+        return self._indexes.get(user_id)
+
+    def get(self, user_id: str, loader: Callable[[], Iterable[Dict[str, Any]]]) -> PatientAutocompleteIndex:
+        ttl = float(_get_setting('PATIENT_AUTOCOMPLETE_TTL', DEFAULT_TTL))
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is not None and (not ttl or time_module.monotonic() - index.built_at < ttl):
+                self._indexes.move_to_end(user_id)
+                return index
+            build_lock = self._build_locks.setdefault(user_id, threading.Lock())
+
+        # One build per tenant at a time; concurrent lookups wait for it
+        with build_lock:
+            with self._lock:
+                current = self._indexes.get(user_id)
+            if current is not None and current is not index:
+                return current
+            started = time_module.monotonic()
+            fresh = PatientAutocompleteIndex(user_id)
+            fresh.load(loader())
+            logger.info(
+                f"Built autocomplete index for tenant {user_id}: {len(fresh)} patients "
+                f"in {time_module.monotonic() - started:.2f}s"
+            )
+            with self._lock:
+                self._indexes[user_id] = fresh
+                self._indexes.move_to_end(user_id)
+                max_tenants = int(_get_setting('PATIENT_AUTOCOMPLETE_MAX_TENANTS', DEFAULT_MAX_TENANTS))
+                while len(self._indexes) > max_tenants:
+                    evicted, _ = self._indexes.popitem(last=False)
+                    self._build_locks.pop(evicted, None)
+            return fresh
+
+    def patients_changed(self, rows: Iterable[Dict[str, Any]], user_id: Optional[str] = None) -> None:
+        for row in rows:
+            index = self.peek(user_id or row.get('user_id'))
+            if index is not None:
+                index.update(row)
+
+    def patients_removed(self, patient_ids: Iterable[str], user_id: Optional[str] = None) -> None:
+        indexes = [self.peek(user_id)] if user_id else list(self._indexes.values())
+        for index in indexes:
+            if index is not None:
+                for patient_id in patient_ids:
+                    index.remove(patient_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexes.clear()
+            self._build_locks.clear()
+
+
+_registry = AutocompleteRegistry()
+
+
+def get_autocomplete_registry() -> AutocompleteRegistry:
+    return _registry
+
+
+def reset_autocomplete_indexes() -> None:
+    _registry.clear()
@@ -3,6 +3,10 @@
 # that can be inherited by entity-specific services.
 
 
+import base64
+import copy
+import functools
+import json
 import logging
 import time as time_module
 import uuid
@@ -10,8 +14,17 @@ from datetime import datetime, date, time
 from decimal import Decimal
 from typing import Dict, List, Optional, Any
 
+from .cache import get_record_cache, get_cache_ttl, limit_ttl
+from .identity_map import MISSING, get_identity_map
+from .metrics import record_query, count_rows
+from .resilience import call_with_resilience
+
 logger = logging.getLogger(__name__)
 
+# PostgreSQL SQLSTATEs for unique and exclusion constraint violations
+UNIQUE_VIOLATION = '23505'
+EXCLUSION_VIOLATION = '23P01'
+
 
 class SupabaseServiceError(Exception):
     #Custom exception for Supabase service errors
@@ -32,9 +45,118 @@ class SupabaseDocumentNotFoundError(SupabaseServiceError):
     #Exception raised when a document is not found
     pass
 
+
+class SupabaseDeadlineExceededError(SupabaseServiceError):
+    #Exception raised when the request's deadline budget ran out before Supabase answered
+    pass
+
+
+class BulkWriteError(SupabaseServiceError):
+    #Exception raised when only some chunks of a bulk write went through.
+    # `results` follows the input order: the written row, or the error of its chunk.
+    
+    def __init__(self, message: str, results: List[Any]):
+        super().__init__(message)
+        self.results = results
+    
+    @property
+    def written(self) -> List[Dict[str, Any]]:
+        return [result for result in self.results if isinstance(result, dict)]
+
+def order_columns(order_by: str) -> List[str]:
+    # 'date,time' orders by date, then time (then id, like every keyset order)
+    return [column.strip() for column in order_by.split(',')]
+
+
+def encode_cursor(order_by: str, row: Dict[str, Any], backwards: bool = False) -> str:
+    # Opaque keyset cursor: the (order_by value, id) of the row a page starts after.
+    # A composite order_by stores the list of its columns' values.
+    columns = order_columns(order_by)
+    value = row.get(columns[0]) if len(columns) == 1 else [row.get(column) for column in columns]
+    payload = {'o': order_by, 'v': value, 'id': row.get('id'), 'b': backwards}
+    raw = json.dumps(payload, separators=(',', ':'), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, order_by: str) -> Dict[str, Any]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(payload, dict) or payload.get('o') != order_by or not payload.get('id'):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return payload
+
+
+def _quote_filter_value(value: Any) -> str:
+    # Double-quote values inside PostgREST logic trees so ',', '.', ':' and
+    # parentheses in timestamps or text cannot break the filter syntax.
+    text = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{text}"'
+
+
+def is_unique_violation(exception: Optional[BaseException], codes: tuple = (UNIQUE_VIOLATION,)) -> bool:
+    # True when a write was rejected by a unique constraint (or another of `codes`); the
+    # PostgREST error may sit under the SupabaseServiceError a service raised
+    while exception is not None:
+        if str(getattr(exception, 'code', '')) in codes:
+            return True
+        exception = exception.__cause__
+    return False
+
+
+def is_integrity_violation(exception: Optional[BaseException]) -> bool:
+    # True when PostgreSQL rejected the data itself (SQLSTATE class 23: unique,
+    # exclusion, foreign key, not null and check violations)
+    while exception is not None:
+        if str(getattr(exception, 'code', '')).startswith('23'):
+            return True
+        exception = exception.__cause__
+    return False
+
+
+class operation:
+    # Decorator for service methods that talk to Supabase, written once for the sync and
+    # async services. The method is a generator: each `yield build, name` is one
+    # round-trip, where build(client) returns the PostgREST query and name is the
+    # operation recorded in metrics. The yield evaluates to the response, or raises
+    # the round-trip's error at that point. Calling the method hands the generator to
+    # the service's _run(), which executes the steps on the sync client or awaits them
+    # on the async one (returning a coroutine). Operations compose with
+    # `yield from self.other.steps(...)`.
+    
+    def __init__(self, steps):
+        self.steps = steps
+        functools.update_wrapper(self, steps)
+    
+    def __get__(self, service, owner=None):
+        if service is None:
+            return self
+        return _BoundOperation(self.steps, service)
+
+
+class _BoundOperation:
+    
+    def __init__(self, steps, service):
+        self._steps = steps
+        self._service = service
+        self.__qualname__ = steps.__qualname__
+    
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self._service._run(self._steps(self._service, *args, **kwargs))
+    
+    def steps(self, *args: Any, **kwargs: Any):
+        # The bare generator, for running inside another operation
+        return self._steps(self._service, *args, **kwargs)
+
+
 class BaseSupabaseService:
     table_name: str = None
     _client = None  # Cached Supabase client (class-level shared)
+    scope_user_id: Optional[str] = None  # Tenant filter set by for_user()
+    bulk_chunk_size: int = 500  # Rows per request in *_many(); SUPABASE_BULK_CHUNK_SIZE overrides
+    cache_ttl: Optional[float] = None  # Seconds get() results stay in the record cache; None disables
     
     def __init__(self):
         if self.table_name is None:
@@ -47,9 +169,13 @@ class BaseSupabaseService:
             try:
                 from app_backend.supabase_utils import (
                     get_supabase_client,
+                    uses_per_thread_clients,
                     SupabaseConfigurationError,
                     SupabaseConnectionError as UtilsConnectionError,
                 )
+                # Per-thread clients are looked up on every access instead of pinned here
+                if uses_per_thread_clients():
+                    return get_supabase_client()
                 logger.info("Initializing Supabase client for service...")
                 BaseSupabaseService._client = get_supabase_client()
                 logger.info("Supabase client ready")
@@ -68,6 +194,98 @@ class BaseSupabaseService:
         cls._client = None
         logger.debug("Supabase client cache reset")
     
+    def for_user(self, user_id: str) -> 'BaseSupabaseService':
+        # Return a copy of this service whose queries only touch rows owned by user_id.
+        # The filter is applied by PostgREST, so other tenants' rows never leave the database.
+        if not user_id:
+            raise ValueError("for_user() requires a user_id")
+        scoped = copy.copy(self)
+        scoped.scope_user_id = user_id
+        return scoped
+    
+    def _select_columns(self, columns: Optional[List[str]], *required: str) -> str:
+        # Explicit PostgREST column list for sparse reads; None keeps select("*")
+        if not columns:
+            return "*"
+        return ",".join(dict.fromkeys([*required, *columns]))
+    
+    def _apply_scope(self, query):
+        if self.scope_user_id is not None:
+            query = query.eq('user_id', self.scope_user_id)
+        return query
+    
+    def _execute(self, query, operation: str):
+        # Every PostgREST round-trip goes through here so it is timed and counted per table,
+        # retried when it is a read that hit a transient error, and short-circuited while
+        # the table's breaker is open (see resilience.py)
+        retry = getattr(query, 'retry', None)
+        if callable(retry):
+            # postgrest's own retry would multiply ours
+            query = retry(False)
+        
+        def attempt():
+            with record_query(self.table_name, operation) as outcome:
+                response = query.execute()
+                outcome.rows = count_rows(response.data)
+            return response
+        
+        return call_with_resilience(self.table_name, operation, attempt)
+    
+    def _run(self, steps):
+        # Drive an @operation generator on the sync client, one round-trip per step
+        response, error = None, None
+        while True:
+            try:
+                build, name = steps.throw(error) if error is not None else steps.send(response)
+            except StopIteration as done:
+                return done.value
+            try:
+                response, error = self._execute(build(self.client), name), None
+            except Exception as e:
+                response, error = None, e
+    
+    def _record_cache(self):
+        # (cache, ttl) for this table, or (None, None) when it is not cached
+        ttl = get_cache_ttl(self.table_name, self.cache_ttl)
+        if not ttl:
+            return None, None
+        cache = get_record_cache()
+        if cache is None:
+            return None, None
+        ttl = limit_ttl(cache, ttl)
+        return (cache, ttl) if ttl else (None, None)
+    
+    def _cache_key(self, record_id: Any) -> tuple:
+        return (self.table_name, str(record_id), self.scope_user_id)
+    
+    def _project(self, row: Dict[str, Any], columns: Optional[List[str]]) -> Dict[str, Any]:
+        return {column: row.get(column) for column in columns} if columns else row
+    
+    def _invalidate_cached(self, rows: List[Dict[str, Any]]) -> None:
+        # Drop every cached copy of the written rows (record cache and the request's
+        # identity map): the owner's, the unscoped one and the one under this scope
+        cache, _ = self._record_cache()
+        identity_map = get_identity_map()
+        if cache is None and identity_map is None:
+            return
+        for row in rows:
+            record_id = row.get('id')
+            if record_id is None:
+                continue
+            for tenant in {None, self.scope_user_id, row.get('user_id')}:
+                key = (self.table_name, str(record_id), tenant)
+                if cache is not None:
+                    cache.delete(key)
+                if identity_map is not None:
+                    identity_map.discard(key)
+    
+    def _remember_written(self, record_id: Any, row: Optional[Dict[str, Any]]) -> None:
+        # The write already returned the full row (None after a delete), so a later
+        # get() in the same request needs no round-trip
+        identity_map = get_identity_map()
+        if identity_map is not None:
+            identity_map.put(self._cache_key(record_id), row)
+    
     def _convert_dates_to_strings(self, data: Dict[str, Any]) -> Dict[str, Any]:
         converted = {}
         for key, value in data.items():
@@ -104,21 +322,41 @@ class BaseSupabaseService:
     def _generate_id(self) -> str:
         return str(uuid.uuid4())
     
-    def create(self, data: Dict[str, Any]) -> str:
+    def _prepare_insert(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        record_data = data.copy()
+        
+        if 'id' not in record_data:
+            record_data['id'] = self._generate_id()
+        if self.scope_user_id is not None:
+            record_data['user_id'] = self.scope_user_id
+        
+        return self._add_timestamps(record_data, created=True)
+    
+    def _prepare_update(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        update_data = self._add_timestamps(data.copy(), created=False)
+        update_data.pop('id', None)
+        if self.scope_user_id is not None:
+            # Rows cannot be moved to another tenant through a scoped service
+            update_data.pop('user_id', None)
+        return update_data
+    
+    @operation
+    def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        # Returns the inserted row as PostgREST sent it back (Prefer: return=representation),
+        # so callers never need a follow-up get() to read defaults or timestamps.
         try:
-            record_data = data.copy()
-            
-            if 'id' not in record_data:
-                record_data['id'] = self._generate_id()
+            record_data = self._prepare_insert(data)
             
-            record_data = self._add_timestamps(record_data, created=True)
-            
-            response = self.client.table(self.table_name).insert(record_data).execute()
+            response = yield (lambda client: client.table(self.table_name).insert(
+                record_data, returning='representation'
+            )), 'insert'
             
             if response.data and len(response.data) > 0:
-                record_id = response.data[0].get('id', record_data['id'])
-                logger.info(f"Created record in {self.table_name}: {record_id}")
-                return record_id
+                record = response.data[0]
+                self._invalidate_cached([record])
+                self._remember_written(record.get('id', record_data['id']), record)
+                logger.info(f"Created record in {self.table_name}: {record.get('id', record_data['id'])}")
+                return record
             
             raise SupabaseServiceError("No data returned from insert operation")
             
@@ -126,16 +364,66 @@ class BaseSupabaseService:
             raise
         except Exception as e:
             logger.error(f"Failed to create record in {self.table_name}: {e}")
-            raise SupabaseServiceError(f"Failed to create record: {e}")
+            raise SupabaseServiceError(f"Failed to create record: {e}") from e
+    
+    def _recall(self, record_id: Any) -> Any:
+        # A remembered full row from the request's identity map or the record cache,
+        # MISSING for a remembered miss, or None when the row has to be fetched
+        cache_key = self._cache_key(record_id)
+        identity_map = get_identity_map()
+        if identity_map is not None:
+            known = identity_map.get(cache_key)
+            if known is not None:
+                return known
+        cache, _ = self._record_cache()
+        if cache is not None:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.debug(f"Record cache hit for {record_id} in {self.table_name}")
+                if identity_map is not None:
+                    identity_map.put(cache_key, cached)
+                return cached
+        return None
+    
+    def _remember_read(self, record_id: Any, row: Optional[Dict[str, Any]], columns: Optional[List[str]]) -> None:
+        # Full rows go to both caches; sparse rows are never remembered, misses only per request
+        cache_key = self._cache_key(record_id)
+        identity_map = get_identity_map()
+        if row is None:
+            if identity_map is not None:
+                identity_map.put(cache_key, None)
+            return
+        if columns:
+            return
+        cache, ttl = self._record_cache()
+        if cache is not None:
+            cache.set(cache_key, row, ttl)
+        if identity_map is not None:
+            identity_map.put(cache_key, row)
     
-    def get(self, record_id: str) -> Optional[Dict[str, Any]]:
+    def _get_query(self, client, record_id: str, columns: Optional[List[str]]):
+        query = client.table(self.table_name).select(self._select_columns(columns)).eq('id', record_id)
+        return self._apply_scope(query)
+    
+    @operation
+    def get(self, record_id: str, columns: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        # Lookup order: the request's identity map, the record cache, then Supabase.
+        # Full rows are remembered per (table, id, tenant); sparse reads are answered
+        # from a remembered full row but never populate the caches themselves.
+        known = self._recall(record_id)
+        if known is MISSING:
+            return None
+        if known is not None:
+            return self._project(known, columns)
         try:
-            response = self.client.table(self.table_name).select("*").eq('id', record_id).execute()   
+            response = yield (lambda client: self._get_query(client, record_id, columns)), 'get'
             if response.data and len(response.data) > 0:
                 logger.debug(f"Retrieved record {record_id} from {self.table_name}")
+                self._remember_read(record_id, response.data[0], columns)
                 return response.data[0]
             
             logger.debug(f"Record {record_id} not found in {self.table_name}")
+            self._remember_read(record_id, None, columns)
             return None
             
         except SupabaseServiceError:
@@ -144,24 +432,160 @@ class BaseSupabaseService:
             logger.error(f"Failed to get record {record_id} from {self.table_name}: {e}")
             raise SupabaseServiceError(f"Failed to retrieve record: {e}")
     
-    def get_all(self, limit: Optional[int] = None, order_by: str = 'created_at', descending: bool = True) -> List[Dict[str, Any]]:
+    def _split_known(self, record_ids: List[str], columns: Optional[List[str]]):
+        # ({id: row} answered from memory, [ids still to fetch]) for load_many()
+        found: Dict[str, Dict[str, Any]] = {}
+        pending: List[str] = []
+        for record_id in dict.fromkeys(str(record_id) for record_id in record_ids if record_id):
+            known = self._recall(record_id)
+            if known is MISSING:
+                continue
+            if known is not None:
+                found[record_id] = self._project(known, columns)
+            else:
+                pending.append(record_id)
+        return found, pending
+    
+    def _load_query(self, client, record_ids: List[str], columns: Optional[List[str]]):
+        query = client.table(self.table_name).select(self._select_columns(columns, 'id')).in_('id', record_ids)
+        return self._apply_scope(query)
+    
+    def _remember_loaded(self, found: Dict[str, Dict[str, Any]], chunk: List[str], rows: List[Dict[str, Any]], columns: Optional[List[str]]) -> None:
+        for row in rows:
+            record_id = str(row.get('id'))
+            found[record_id] = row
+            self._remember_read(record_id, row, columns)
+        for record_id in chunk:
+            if record_id not in found:
+                self._remember_read(record_id, None, columns)
+    
+    @operation
+    def load_many(self, record_ids: List[str], columns: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        # Batch counterpart of get(): ids already in the identity map or record cache
+        # are served from memory, the rest are fetched with one in_('id', ...) query
+        # per chunk. Returns {id: row} for the ids that exist; misses are left out.
+        found, pending = self._split_known(record_ids, columns)
+        for chunk in self._chunked(pending, None):
+            try:
+                response = yield (lambda client: self._load_query(client, chunk, columns)), 'load_many'
+            except SupabaseServiceError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to load {len(chunk)} records from {self.table_name}: {e}")
+                raise SupabaseServiceError(f"Failed to retrieve records: {e}")
+            self._remember_loaded(found, chunk, response.data or [], columns)
+        
+        logger.debug(
+            f"Loaded {len(found)} of {len(record_ids)} records from {self.table_name} "
+            f"({len(pending)} fetched)"
+        )
+        return found
+    
+    def _apply_keyset(self, query, order_by: str, position: Dict[str, Any], descending: bool):
+        # Seek past the cursor row with an indexed comparison instead of OFFSET,
+        # using id as the tie-breaker for rows sharing the same order_by value.
+        # Composite orders compare lexicographically: a > x, or a = x and b > y, ...
+        columns = order_columns(order_by)
+        values = position.get('v') if len(columns) > 1 else [position.get('v')]
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("Invalid cursor")
+        keys = [*columns, 'id']
+        values = [*values, position['id']]
+        terms = []
+        for depth in range(len(keys)):
+            after = self._keyset_after(keys[depth], values[depth], descending, nullable=keys[depth] != 'id')
+            if after is None:
+                continue
+            equal = [self._keyset_equal(keys[i], values[i]) for i in range(depth)]
+            terms.append(f"and({','.join(equal + [after])})" if equal else after)
+        return query.or_(','.join(terms))
+    
+    @staticmethod
+    def _keyset_equal(column: str, value: Any) -> str:
+        return f"{column}.is.null" if value is None else f"{column}.eq.{_quote_filter_value(value)}"
+    
+    @staticmethod
+    def _keyset_after(column: str, value: Any, descending: bool, nullable: bool = True) -> Optional[str]:
+        # Rows strictly after `value` in the scan order, or None when there are none.
+        # NULLs sort as the largest value (PostgreSQL's default NULLS LAST ascending,
+        # NULLS FIRST descending), so they follow every value ascending and precede
+        # every value descending.
+        if value is None:
+            return f"{column}.not.is.null" if descending else None
+        quoted = _quote_filter_value(value)
+        if descending:
+            return f"{column}.lt.{quoted}"
+        if not nullable:
+            return f"{column}.gt.{quoted}"
+        return f"or({column}.gt.{quoted},{column}.is.null)"
+    
+    def _list_query(
+        self,
+        client,
+        limit: Optional[int],
+        order_by: str,
+        descending: bool,
+        position: Optional[Dict[str, Any]],
+        filters: Optional[Dict[str, Any]],
+        columns: Optional[List[str]],
+        bounds: Optional[Dict[str, tuple]] = None,
+    ):
+        # The cursor needs order_by and id even when the caller projects them away
+        ordering = order_columns(order_by)
+        select = self._select_columns(columns, 'id', *ordering)
+        query = self._apply_scope(client.table(self.table_name).select(select))
+        for field, value in (filters or {}).items():
+            query = query.eq(field, value)
+        # Inclusive (low, high) ranges; None leaves that side open
+        for field, (low, high) in (bounds or {}).items():
+            if low is not None:
+                query = query.gte(field, str(low))
+            if high is not None:
+                query = query.lte(field, str(high))
+        if position:
+            query = self._apply_keyset(query, order_by, position, descending)
+        for column in ordering:
+            query = query.order(column, desc=descending)
+        query = query.order('id', desc=descending)
+        if limit:
+            query = query.limit(limit)
+        return query
+    
+    def _log_list_timing(self, results: List[Dict[str, Any]], start_time: float) -> None:
+        elapsed = time_module.time() - start_time    
+        if elapsed > 1.0: 
+            logger.warning(
+                f"Slow query: {self.table_name} took {elapsed:.2f}s to fetch {len(results)} items"
+            )
+        else:
+            logger.debug(
+                f"Retrieved {len(results)} records from {self.table_name} in {elapsed:.2f}s"
+            )
+    
+    @operation
+    def get_all(
+        self,
+        limit: Optional[int] = None,
+        order_by: str = 'created_at',
+        descending: bool = True,
+        cursor: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        columns: Optional[List[str]] = None,
+        bounds: Optional[Dict[str, tuple]] = None,
+    ) -> List[Dict[str, Any]]:
+        position = decode_cursor(cursor, order_by) if cursor else None
+        backwards = bool(position and position.get('b'))
+        # A backwards cursor walks the index in the opposite direction, then flips the rows back
+        scan_descending = descending != backwards
         try:
             start_time = time_module.time()           
-            query = self.client.table(self.table_name).select("*")
-            query = query.order(order_by, desc=descending)
-            if limit:
-                query = query.limit(limit)
-            response = query.execute() 
+            response = yield (lambda client: self._list_query(
+                client, limit, order_by, scan_descending, position, filters, columns, bounds
+            )), 'list'
             results = response.data or []
-            elapsed = time_module.time() - start_time    
-            if elapsed > 1.0: 
-                logger.warning(
-                    f"Slow query: {self.table_name} took {elapsed:.2f}s to fetch {len(results)} items"
-                )
-            else:
-                logger.debug(
-                    f"Retrieved {len(results)} records from {self.table_name} in {elapsed:.2f}s"
-                )
+            if backwards:
+                results.reverse()
+            self._log_list_timing(results, start_time)
             
             return results           
         except SupabaseServiceError:
@@ -171,29 +595,75 @@ class BaseSupabaseService:
             logger.error(f"Failed to retrieve records from {self.table_name}: {e}")
             raise SupabaseServiceError(f"Failed to retrieve records: {error_msg}")
     
-    def update(self, record_id: str, data: Dict[str, Any]) -> bool:
+    def _build_page(self, rows: List[Dict[str, Any]], limit: int, order_by: str, cursor: Optional[str]) -> Dict[str, Any]:
+        backwards = bool(cursor and decode_cursor(cursor, order_by).get('b'))
+        has_more = len(rows) > limit
+        if has_more:
+            rows = rows[1:] if backwards else rows[:limit]
+        
+        next_cursor = None
+        previous_cursor = None
+        if rows:
+            if has_more or backwards:
+                next_cursor = encode_cursor(order_by, rows[-1])
+            if (has_more and backwards) or (cursor and not backwards):
+                previous_cursor = encode_cursor(order_by, rows[0], backwards=True)
+        return {'results': rows, 'next': next_cursor, 'previous': previous_cursor}
+    
+    @operation
+    def get_page(
+        self,
+        limit: int,
+        order_by: str = 'created_at',
+        descending: bool = True,
+        cursor: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        columns: Optional[List[str]] = None,
+        bounds: Optional[Dict[str, tuple]] = None,
+    ) -> Dict[str, Any]:
+        # One keyset page plus opaque next/previous cursors. Fetches a single extra
+        # row to learn whether another page exists, so every page costs the same.
+        rows = yield from self.get_all.steps(
+            limit=limit + 1, order_by=order_by, descending=descending,
+            cursor=cursor, filters=filters, columns=columns, bounds=bounds,
+        )
+        return self._build_page(rows, limit, order_by, cursor)
+    
+    @operation
+    def update(self, record_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # Returns the updated row from the same round-trip, or None when no row matched.
+        # On a scoped service the owner filter is part of the UPDATE, so a None also
+        # covers "owned by someone else" without a separate ownership read.
         try:
-            update_data = data.copy()
-            update_data = self._add_timestamps(update_data, created=False)
-            update_data.pop('id', None)   
-            response = self.client.table(self.table_name).update(update_data).eq('id', record_id).execute()
+            update_data = self._prepare_update(data)
+            response = yield (lambda client: self._apply_scope(client.table(self.table_name).update(
+                update_data, returning='representation'
+            ).eq('id', record_id))), 'update'
             if response.data and len(response.data) > 0:
+                self._invalidate_cached(response.data)
+                self._remember_written(record_id, response.data[0])
                 logger.info(f"Updated record {record_id} in {self.table_name}")
-                return True
+                return response.data[0]
             logger.debug(f"Update returned no data for record {record_id} in {self.table_name}")
-            return False
+            return None
             
         except SupabaseServiceError:
             raise
         except Exception as e:
             logger.error(f"Failed to update record {record_id} in {self.table_name}: {e}")
-            raise SupabaseServiceError(f"Failed to update record: {e}")
+            raise SupabaseServiceError(f"Failed to update record: {e}") from e
     
+    @operation
     def delete(self, record_id: str) -> bool:
+        # False when no row matched; scoped services carry the owner filter in the DELETE
         try:
-            response = self.client.table(self.table_name).delete().eq('id', record_id).execute()
+            response = yield (lambda client: self._apply_scope(
+                client.table(self.table_name).delete().eq('id', record_id)
+            )), 'delete'
             
             if response.data and len(response.data) > 0:
+                self._invalidate_cached(response.data)
+                self._remember_written(record_id, None)
                 logger.info(f"Deleted record {record_id} from {self.table_name}")
                 return True
             logger.debug(f"Delete returned no data for record {record_id} in {self.table_name}")
@@ -205,9 +675,12 @@ class BaseSupabaseService:
             logger.error(f"Failed to delete record {record_id} from {self.table_name}: {e}")
             raise SupabaseServiceError(f"Failed to delete record: {e}")
     
-    def query_by_field(self, field: str, value: Any) -> List[Dict[str, Any]]:
+    @operation
+    def query_by_field(self, field: str, value: Any, columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         try:
-            response = self.client.table(self.table_name).select("*").eq(field, value).execute()
+            response = yield (lambda client: self._apply_scope(
+                client.table(self.table_name).select(self._select_columns(columns)).eq(field, value)
+            )), 'query'
             
             results = response.data or []
             logger.debug(
@@ -220,3 +693,147 @@ class BaseSupabaseService:
         except Exception as e:
             logger.error(f"Failed to query {self.table_name} by {field}: {e}")
             raise SupabaseServiceError(f"Failed to query records: {e}")
+    
+    @operation
+    def exists(self, record_id: str) -> bool:
+        # Unscoped id probe, used to tell "not yours" (403) from "not there" (404)
+        # after a tenant-scoped lookup came back empty.
+        try:
+            response = yield (lambda client: client.table(self.table_name).select("id").eq('id', record_id).limit(1)), 'exists'
+            return bool(response.data)
+        except SupabaseServiceError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to check record {record_id} in {self.table_name}: {e}")
+            raise SupabaseServiceError(f"Failed to retrieve record: {e}")
+    
+    def _chunked(self, items: List[Any], chunk_size: Optional[int]) -> List[List[Any]]:
+        if not chunk_size:
+            try:
+                from django.conf import settings
+                chunk_size = getattr(settings, 'SUPABASE_BULK_CHUNK_SIZE', None)
+            except Exception:
+                chunk_size = None
+            chunk_size = int(chunk_size or self.bulk_chunk_size)
+        return [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    
+    def _apply_bulk_filters(self, query, ids: Optional[List[str]], filters: Optional[Dict[str, Any]]):
+        if ids is not None:
+            query = query.in_('id', ids)
+        for field, value in (filters or {}).items():
+            query = query.eq(field, value)
+        return self._apply_scope(query)
+    
+    @operation
+    def create_many(self, records: List[Dict[str, Any]], chunk_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        # Insert rows as PostgREST array inserts, one request per chunk.
+        # Returns the created rows in input order. Each chunk commits on its own: when
+        # some fail after others were written, BulkWriteError says which rows made it.
+        prepared = [self._prepare_insert(record) for record in records]
+        # Array inserts need one column set per request; missing keys are sent as null
+        columns = list(dict.fromkeys(key for record in prepared for key in record))
+        prepared = [{column: record.get(column) for column in columns} for record in prepared]
+        
+        results: List[Any] = []
+        errors: List[SupabaseServiceError] = []
+        for chunk in self._chunked(prepared, chunk_size):
+            try:
+                results.extend((yield from self._insert_chunk(chunk)))
+                continue
+            except SupabaseServiceError as e:
+                # Earlier chunks are already committed; try the rest and report per row
+                logger.error(f"Failed to bulk create {len(chunk)} records in {self.table_name}: {e}")
+                if len(chunk) == 1 or not is_integrity_violation(e):
+                    errors.append(e)
+                    results.extend([e] * len(chunk))
+                    continue
+            # The database rejected some row of the chunk: insert its rows one by one
+            # so only the offending ones fail
+            for row in chunk:
+                try:
+                    results.extend((yield from self._insert_chunk([row])))
+                except SupabaseServiceError as e:
+                    errors.append(e)
+                    results.append(e)
+        created = [result for result in results if isinstance(result, dict)]
+        if errors and not created:
+            raise errors[0]
+        if errors:
+            raise BulkWriteError(
+                f"Failed to create records ({len(created)} of {len(prepared)} created): {errors[0]}", results
+            )
+        logger.info(f"Created {len(created)} records in {self.table_name}")
+        return created
+    
+    def _insert_chunk(self, chunk: List[Dict[str, Any]]):
+        # Steps of create_many(): one array insert
+        try:
+            response = yield (lambda client: client.table(self.table_name).insert(chunk)), 'insert_many'
+        except SupabaseServiceError:
+            raise
+        except Exception as e:
+            raise SupabaseServiceError(f"Failed to create records: {e}") from e
+        self._invalidate_cached(response.data or [])
+        return response.data or []
+    
+    @operation
+    def update_many(
+        self,
+        data: Dict[str, Any],
+        ids: Optional[List[str]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        chunk_size: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        # Apply the same patch to every row matching ids (sent as in_() chunks) and/or
+        # equality filters. Returns the rows that were actually updated.
+        if ids is None and not filters:
+            raise ValueError("update_many() requires ids or filters")
+        update_data = self._prepare_update(data)
+        
+        updated: List[Dict[str, Any]] = []
+        # With only filters there is a single request (chunk None means "no id list")
+        batches = self._chunked(list(ids), chunk_size) if ids is not None else [None]
+        for chunk in batches:
+            try:
+                response = yield (lambda client: self._apply_bulk_filters(
+                    client.table(self.table_name).update(update_data), chunk, filters
+                )), 'update_many'
+            except SupabaseServiceError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to bulk update records in {self.table_name}: {e}")
+                raise SupabaseServiceError(f"Failed to update records: {e}") from e
+            self._invalidate_cached(response.data or [])
+            updated.extend(response.data or [])
+        logger.info(f"Updated {len(updated)} records in {self.table_name}")
+        return updated
+    
+    @operation
+    def delete_many(
+        self,
+        ids: Optional[List[str]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        chunk_size: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        # Delete every row matching ids (sent as in_() chunks) and/or equality filters.
+        # Returns the rows that were actually deleted.
+        if ids is None and not filters:
+            raise ValueError("delete_many() requires ids or filters")
+        
+        deleted: List[Dict[str, Any]] = []
+        # With only filters there is a single request (chunk None means "no id list")
+        batches = self._chunked(list(ids), chunk_size) if ids is not None else [None]
+        for chunk in batches:
+            try:
+                response = yield (lambda client: self._apply_bulk_filters(
+                    client.table(self.table_name).delete(), chunk, filters
+                )), 'delete_many'
+            except SupabaseServiceError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to bulk delete records from {self.table_name}: {e}")
+                raise SupabaseServiceError(f"Failed to delete records: {e}")
+            self._invalidate_cached(response.data or [])
+            deleted.extend(response.data or [])
+        logger.info(f"Deleted {len(deleted)} records from {self.table_name}")
+        return deleted
@@ -0,0 +1,222 @@
+# Read-through record cache used by BaseSupabaseService.get().
+# Entries are keyed by (table, record id, tenant) and expire after a per-table TTL.
+# Off unless SUPABASE_RECORD_CACHE_BACKEND picks one of two backends:
+# - LRURecordCache: in-process, bounded by entry count. Other workers' writes do not
+#   invalidate it, so its TTLs are capped at SUPABASE_RECORD_CACHE_LOCAL_MAX_TTL.
+# - DjangoRecordCache: delegates to a Django cache alias (shared across workers)
+
+
+import logging
+import threading
+import time as time_module
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, Optional[str]]
+
+DEFAULT_LOCAL_MAX_TTL = 5.0
+
+
+class RecordCache(ABC):
+    # Backend interface plus the hit/miss counters shared by every backend; a backend
+    # implements the abstract storage methods below.
+    # Rows are copied on the way in and out, since callers mutate what they get back.
+
+    # True when every worker reads and invalidates the same entries
+    shared = False
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._stats_lock = threading.Lock()
+
+    def get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        row = self._get(key)
+        with self._stats_lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return dict(row) if row is not None else None
+
+    def set(self, key: CacheKey, row: Dict[str, Any], ttl: float) -> None:
+        if ttl and ttl > 0:
+            self._set(key, dict(row), ttl)
+
+    def delete(self, key: CacheKey) -> None:
+        self._delete(key)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'backend': self.__class__.__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self.hits = self.misses = self.evictions = 0
+
+    @abstractmethod
+    def _get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def _set(self, key: CacheKey, row: Dict[str, Any], ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    def _delete(self, key: CacheKey) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+
+class LRURecordCache(RecordCache):
+    # Per-process cache; each gunicorn worker holds its own copy, so the TTL
+    # bounds how long a write made through another worker can go unseen.
+
+    def __init__(self, max_entries: int = 10000):
+        super().__init__()
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, row = entry
+            if expires_at <= time_module.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return row
+
+    def _set(self, key: CacheKey, row: Dict[str, Any], ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time_module.monotonic() + ttl, row)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _delete(self, key: CacheKey) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        data = super().stats()
+        data.update({'entries': len(self._entries), 'max_entries': self.max_entries})
+        return data
+
+
+class DjangoRecordCache(RecordCache):
+    # Shared cache through the Django cache framework (e.g. Redis or Memcached),
+    # so an invalidation in one worker is seen by all of them.
+    shared = True
+
+    def __init__(self, alias: str = 'default', prefix: str = 'sbrec'):
+        super().__init__()
+        from django.core.cache import caches
+        self._cache = caches[alias]
+        self.prefix = prefix
+
+    def _key(self, key: CacheKey) -> str:
+        table, record_id, tenant = key
+        return f"{self.prefix}:{table}:{tenant or '*'}:{record_id}"
+
+    def _get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        return self._cache.get(self._key(key))
+
+    def _set(self, key: CacheKey, row: Dict[str, Any], ttl: float) -> None:
+        self._cache.set(self._key(key), row, timeout=ttl)
+
+    def _delete(self, key: CacheKey) -> None:
+        self._cache.delete(self._key(key))
+
+    def clear(self) -> None:
+        # Clears the whole alias, so point SUPABASE_RECORD_CACHE_ALIAS at a dedicated cache
+        self._cache.clear()
+
+
+_record_cache: Optional[RecordCache] = None
+_record_cache_configured = False
+_record_cache_lock = threading.Lock()
+
+
+def _build_record_cache() -> Optional[RecordCache]:
+    try:
+        from django.conf import settings
+        backend = getattr(settings, 'SUPABASE_RECORD_CACHE_BACKEND', 'none')
+        max_entries = getattr(settings, 'SUPABASE_RECORD_CACHE_MAX_ENTRIES', 10000)
+        alias = getattr(settings, 'SUPABASE_RECORD_CACHE_ALIAS', 'default')
+    except Exception:
+        backend, max_entries, alias = 'none', 10000, 'default'
+
+    backend = (backend or 'none').lower()
+    if backend == 'lru':
+        return LRURecordCache(max_entries=int(max_entries))
+    if backend == 'django':
+        return DjangoRecordCache(alias=alias)
+    if backend != 'none':
+        logger.warning(f"Unknown SUPABASE_RECORD_CACHE_BACKEND '{backend}', record cache disabled")
+    return None
+
+
+def get_record_cache() -> Optional[RecordCache]:
+    # Process-wide cache instance, or None when caching is disabled
+    global _record_cache, _record_cache_configured
+    if not _record_cache_configured:
+        with _record_cache_lock:
+            if not _record_cache_configured:
+                _record_cache = _build_record_cache()
+                _record_cache_configured = True
+                if _record_cache is not None:
+                    logger.info(f"Record cache enabled: {_record_cache.__class__.__name__}")
+    return _record_cache
+
+
+def set_record_cache(cache: Optional[RecordCache]) -> None:
+    # Swap the process-wide cache (None disables caching)
+    global _record_cache, _record_cache_configured
+    with _record_cache_lock:
+        _record_cache = cache
+        _record_cache_configured = True
+
+
+def get_cache_ttl(table_name: str, default: Optional[float]) -> Optional[float]:
+    # SUPABASE_RECORD_CACHE_TTLS overrides the service's own cache_ttl per table
+    try:
+        from django.conf import settings
+        ttls = getattr(settings, 'SUPABASE_RECORD_CACHE_TTLS', None) or {}
+    except Exception:
+        ttls = {}
+    return ttls.get(table_name, default)
+
+
+def limit_ttl(cache: RecordCache, ttl: float) -> float:
+    # Writes through another worker never reach a per-process cache, so its entries
+    # only live long enough to absorb bursts of repeated reads
+    if cache.shared:
+        return ttl
+    try:
+        from django.conf import settings
+        limit = float(getattr(settings, 'SUPABASE_RECORD_CACHE_LOCAL_MAX_TTL', DEFAULT_LOCAL_MAX_TTL))
+    except Exception:
+        limit = DEFAULT_LOCAL_MAX_TTL
+    return min(ttl, limit)
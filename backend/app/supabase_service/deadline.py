@@ -0,0 +1,90 @@
+# Per-request deadline budget.
+# DeadlineMiddleware opens a Deadline for every request (REQUEST_DEADLINE_SECONDS,
+# overridable per URL name through REQUEST_DEADLINES). While it is active:
+# - every PostgREST/Storage HTTP call gets at most the remaining budget as its
+#   connect/read/write timeout (the pooled transport in supabase_utils asks
+#   remaining_budget() before each request)
+# - no new attempt or retry is started once the budget is spent; the call fails
+#   with SupabaseDeadlineExceededError, which the views turn into a 504
+# - gather() never waits past the deadline
+# Code outside a request (management commands, shell) runs without a deadline.
+
+
+import contextvars
+import time as time_module
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+DEFAULT_REQUEST_DEADLINE = 10.0
+
+
+class Deadline:
+    # Mutable so DeadlineMiddleware.process_view can apply the per-endpoint budget
+    # after URL resolution; worker threads share it through the copied context
+
+    def __init__(self, budget: Optional[float]):
+        self.started_at = time_module.monotonic()
+        self.budget = budget
+
+    def set_budget(self, budget: Optional[float]) -> None:
+        self.budget = budget
+
+    def remaining(self) -> Optional[float]:
+        if not self.budget or self.budget <= 0:
+            return None
+        return self.budget - (time_module.monotonic() - self.started_at)
+
+    @property
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+
+_current_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar(
+    'request_deadline', default=None
+)
+
+
+def get_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+def remaining_budget() -> Optional[float]:
+    # Seconds left for the current request, or None when there is no deadline
+    deadline = _current_deadline.get()
+    return deadline.remaining() if deadline is not None else None
+
+
+def check_deadline(what: str = 'Supabase request') -> None:
+    deadline = _current_deadline.get()
+    if deadline is not None and deadline.expired:
+        from .base import SupabaseDeadlineExceededError
+        raise SupabaseDeadlineExceededError(
+            f"{what} not sent: request deadline of {deadline.budget:g}s exceeded"
+        )
+
+
+@contextmanager
+def deadline_scope(budget: Optional[float]) -> Iterator[Deadline]:
+    deadline = Deadline(budget)
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def get_endpoint_budget(view_name: Optional[str]) -> Optional[float]:
+    try:
+        from django.conf import settings
+        default = getattr(settings, 'REQUEST_DEADLINE_SECONDS', DEFAULT_REQUEST_DEADLINE)
+        per_endpoint = getattr(settings, 'REQUEST_DEADLINES', None) or {}
+    except Exception:
+        default, per_endpoint = DEFAULT_REQUEST_DEADLINE, {}
+    budget = per_endpoint.get(view_name, default) if view_name else default
+    return float(budget) if budget else None
+
+
+def install_budget_provider() -> None:
+    from app_backend.supabase_utils import set_budget_provider
+    set_budget_provider(remaining_budget)
@@ -0,0 +1,131 @@
+# Parallel fan-out for independent service reads.
+# gather() runs zero-argument callables on a bounded, process-wide thread pool
+# and returns their results in order, so a screen that needs patients,
+# appointments, treatments, invoices and x-rays waits for its slowest query
+# rather than the sum of all of them.
+#
+#   patient, appointments = gather(
+#       partial(patients.get_patient, pk),
+#       call(appointments.get_patient_appointments, pk, timeout=5),
+#   )
+#
+# Each call runs in a copy of the caller's context, so the request's identity
+# map and tenant-scoped services behave exactly as they would inline.
+# The first failure (in argument order) is re-raised unchanged, so views can
+# keep passing it to handle_supabase_exception.
+# Inside a request deadline no call is waited on past the deadline.
+
+
+import contextvars
+import logging
+import threading
+import time as time_module
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, List, Optional
+
+from .base import SupabaseConnectionError, SupabaseDeadlineExceededError
+from .deadline import remaining_budget
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FANOUT_WORKERS = 16
+DEFAULT_FANOUT_TIMEOUT = 10.0
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+# Set inside pool threads: a nested gather() runs inline instead of waiting on its own pool
+_worker_state = threading.local()
+
+
+class Call:
+    # A deferred service call with an optional timeout of its own
+
+    def __init__(self, func: Callable[..., Any], *args: Any, timeout: Optional[float] = None, **kwargs: Any):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.timeout = timeout
+
+    def __call__(self) -> Any:
+        return self.func(*self.args, **self.kwargs)
+
+    def __repr__(self) -> str:
+        return f"Call({getattr(self.func, '__qualname__', self.func)!r})"
+
+
+def call(func: Callable[..., Any], *args: Any, timeout: Optional[float] = None, **kwargs: Any) -> Call:
+    return Call(func, *args, timeout=timeout, **kwargs)
+
+
+def _get_setting(name: str, default: Any) -> Any:
+    try:
+        from django.conf import settings
+        return getattr(settings, name, default)
+    except Exception:
+        return default
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = int(_get_setting('SUPABASE_FANOUT_WORKERS', DEFAULT_FANOUT_WORKERS))
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='supabase-fanout')
+                logger.info(f"Fan-out executor started with {workers} workers")
+    return _executor
+
+
+def _run_in_worker(context: contextvars.Context, func: Callable[[], Any]) -> Any:
+    _worker_state.active = True
+    try:
+        return context.run(func)
+    finally:
+        _worker_state.active = False
+
+
+def gather(*calls: Callable[[], Any], timeout: Optional[float] = None) -> List[Any]:
+    # Results in argument order. timeout applies to calls that don't carry their own;
+    # it defaults to SUPABASE_FANOUT_TIMEOUT. A call that overruns raises
+    # SupabaseConnectionError (the worker itself finishes in the background,
+    # bounded by the HTTP client's read timeout).
+    if not calls:
+        return []
+    if timeout is None:
+        timeout = float(_get_setting('SUPABASE_FANOUT_TIMEOUT', DEFAULT_FANOUT_TIMEOUT))
+
+    if len(calls) == 1 or getattr(_worker_state, 'active', False):
+        return [func() for func in calls]
+
+    executor = get_executor()
+    start_time = time_module.monotonic()
+    budget = remaining_budget()
+    # Each call needs its own copy: one Context cannot be entered by two threads at once
+    futures = [
+        executor.submit(_run_in_worker, contextvars.copy_context(), func)
+        for func in calls
+    ]
+
+    results = []
+    try:
+        for func, future in zip(calls, futures):
+            limit = getattr(func, 'timeout', None) or timeout
+            capped = budget is not None and budget < limit
+            if capped:
+                limit = max(budget, 0)
+            remaining = max(limit - (time_module.monotonic() - start_time), 0)
+            try:
+                results.append(future.result(timeout=remaining))
+            except FutureTimeoutError:
+                logger.error(f"Fan-out call {func!r} timed out after {limit:g}s")
+                if capped:
+                    raise SupabaseDeadlineExceededError(f"Request deadline reached waiting for {func!r}")
+                raise SupabaseConnectionError(f"Supabase request timed out after {limit:g}s")
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+
+    elapsed = time_module.monotonic() - start_time
+    logger.debug(f"Fan-out of {len(calls)} calls finished in {elapsed:.3f}s")
+    return results
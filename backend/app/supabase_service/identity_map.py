@@ -0,0 +1,63 @@
+# Request-scoped identity map for service lookups.
+# While a map is active (see IdentityMapMiddleware), every row a service reads
+# or writes is remembered by (table, id, tenant), so repeated get() calls for the
+# same record within one request cost a single Supabase round-trip.
+# Misses are remembered too; writes made through the services discard entries.
+
+
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+IdentityKey = Tuple[str, str, Optional[str]]
+
+# Stored for ids looked up and known not to exist (or not visible to the tenant)
+MISSING = object()
+
+
+class IdentityMap:
+
+    def __init__(self):
+        self._rows: Dict[IdentityKey, Any] = {}
+
+    def __contains__(self, key: IdentityKey) -> bool:
+        return key in self._rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get(self, key: IdentityKey) -> Any:
+        # The stored row (copied), MISSING for a known miss, or None when not seen yet
+        row = self._rows.get(key)
+        if row is None or row is MISSING:
+            return row
+        return dict(row)
+
+    def put(self, key: IdentityKey, row: Optional[Dict[str, Any]]) -> None:
+        self._rows[key] = dict(row) if row is not None else MISSING
+
+    def discard(self, key: IdentityKey) -> None:
+        self._rows.pop(key, None)
+
+    def clear(self) -> None:
+        self._rows.clear()
+
+
+_current_map: contextvars.ContextVar[Optional[IdentityMap]] = contextvars.ContextVar(
+    'supabase_identity_map', default=None
+)
+
+
+def get_identity_map() -> Optional[IdentityMap]:
+    # The map for the current request, or None outside of identity_map_scope()
+    return _current_map.get()
+
+
+@contextmanager
+def identity_map_scope() -> Iterator[IdentityMap]:
+    identity_map = IdentityMap()
+    token = _current_map.set(identity_map)
+    try:
+        yield identity_map
+    finally:
+        _current_map.reset(token)
@@ -1,6 +1,7 @@
 #Inventory CRUD operations for Supabase.
 from typing import Dict, List, Any, Optional
-from .base import BaseSupabaseService
+from .base import BaseSupabaseService, operation
+from .async_base import AsyncBaseSupabaseService
 
 
 def compute_inventory_status(quantity: int) -> str:
@@ -15,40 +16,62 @@ def compute_inventory_status(quantity: int) -> str:
 
 class InventoryService(BaseSupabaseService):
     
-    table_name = 'inventory'  
+    table_name = 'inventory'
+    cache_ttl = 60  # Quantities change more often than patient or treatment records
     def _add_status_to_item(self, item: Dict[str, Any]) -> Dict[str, Any]:
-        if item:
+        # Partial rows selected without quantity carry no status
+        if item and 'quantity' in item:
             item['status'] = compute_inventory_status(item.get('quantity', 0))
         return item
     
-    def create_item(self, item_data: Dict[str, Any]) -> str:
+    @operation
+    def create_item(self, item_data: Dict[str, Any]) -> Dict[str, Any]:
         if 'quantity' in item_data:
             item_data['quantity'] = int(item_data['quantity'])
-        return self.create(item_data)
+        item = yield from self.create.steps(item_data)
+        return self._add_status_to_item(item)
     
-    def get_item(self, item_id: str) -> Optional[Dict[str, Any]]:
-        item = self.get(item_id)
+    @operation
+    def get_item(self, item_id: str, columns: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        item = yield from self.get.steps(item_id, columns=columns)
         return self._add_status_to_item(item)
     
+    @operation
     def get_all_items(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
-        items = self.get_all(limit=limit, order_by='created_at')
+        items = yield from self.get_all.steps(limit=limit, order_by='created_at')
         return [self._add_status_to_item(item) for item in items]
     
+    @operation
+    def get_items_page(self, limit: int, cursor: Optional[str] = None, columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        page = yield from self.get_page.steps(limit, order_by='created_at', cursor=cursor, columns=columns)
+        page['results'] = [self._add_status_to_item(item) for item in page['results']]
+        return page
+    
+    @operation
     def get_items_by_status(self, status: str) -> List[Dict[str, Any]]:
-        all_items = self.get_all_items()
+        all_items = yield from self.get_all_items.steps()
         return [item for item in all_items if item.get('status') == status]
     
+    @operation
     def get_low_stock_items(self) -> List[Dict[str, Any]]:
-        all_items = self.get_all_items()
+        all_items = yield from self.get_all_items.steps()
         return [item for item in all_items if item.get('status') in ["Out of stock", "Low stock"]]
     
-    def update_item(self, item_id: str, item_data: Dict[str, Any]) -> bool:
+    @operation
+    def update_item(self, item_id: str, item_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         if 'quantity' in item_data:
             item_data['quantity'] = int(item_data['quantity'])
-        return self.update(item_id, item_data)
+        item = yield from self.update.steps(item_id, item_data)
+        return self._add_status_to_item(item)
     
     def delete_item(self, item_id: str) -> bool:
         return self.delete(item_id)
     
-    def update_quantity(self, item_id: str, quantity: int) -> bool:
-        return self.update(item_id, {'quantity': int(quantity)})
+    @operation
+    def update_quantity(self, item_id: str, quantity: int) -> Optional[Dict[str, Any]]:
+        item = yield from self.update.steps(item_id, {'quantity': int(quantity)})
+        return self._add_status_to_item(item)
+
+
+class AsyncInventoryService(AsyncBaseSupabaseService, InventoryService):
+    pass
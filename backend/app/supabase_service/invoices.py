@@ -2,7 +2,8 @@
 from datetime import datetime
 from decimal import Decimal
 from typing import Dict, List, Any, Optional
-from .base import BaseSupabaseService
+from .base import BaseSupabaseService, operation
+from .async_base import AsyncBaseSupabaseService
 
 
 class InvoiceService(BaseSupabaseService):
@@ -39,27 +40,45 @@ class InvoiceService(BaseSupabaseService):
         data['updated_at'] = now
         return data
     
-    def create_invoice(self, invoice_data: Dict[str, Any]) -> str:
-        return self.create(invoice_data)
+    @operation
+    def create_invoice(self, invoice_data: Dict[str, Any]) -> Dict[str, Any]:
+        invoice = yield from self.create.steps(invoice_data)
+        return self._convert_decimal_in_result(invoice)
     
-    def get_invoice(self, invoice_id: str) -> Optional[Dict[str, Any]]:
-        invoice = self.get(invoice_id)
+    @operation
+    def get_invoice(self, invoice_id: str, columns: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        invoice = yield from self.get.steps(invoice_id, columns=columns)
         return self._convert_decimal_in_result(invoice) if invoice else None
     
+    @operation
     def get_all_invoices(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
-        results = self.get_all(limit=limit, order_by='issued_at')
+        results = yield from self.get_all.steps(limit=limit, order_by='issued_at')
         return self._convert_decimals_in_results(results)
     
-    def get_patient_invoices(self, patient_id: str) -> List[Dict[str, Any]]:
-        results = self.query_by_field('patient_id', patient_id)
+    @operation
+    def get_invoices_page(self, limit: int, cursor: Optional[str] = None, columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        page = yield from self.get_page.steps(limit, order_by='issued_at', cursor=cursor, columns=columns)
+        page['results'] = self._convert_decimals_in_results(page['results'])
+        return page
+    
+    @operation
+    def get_patient_invoices(self, patient_id: str, columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        results = yield from self.query_by_field.steps('patient_id', patient_id, columns=columns)
         return self._convert_decimals_in_results(results)
     
-    def get_invoices_by_status(self, status: str) -> List[Dict[str, Any]]:
-        results = self.query_by_field('status', status)
+    @operation
+    def get_invoices_by_status(self, status: str, columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        results = yield from self.query_by_field.steps('status', status, columns=columns)
         return self._convert_decimals_in_results(results)
     
-    def update_invoice(self, invoice_id: str, invoice_data: Dict[str, Any]) -> bool:
-        return self.update(invoice_id, invoice_data)
+    @operation
+    def update_invoice(self, invoice_id: str, invoice_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        invoice = yield from self.update.steps(invoice_id, invoice_data)
+        return self._convert_decimal_in_result(invoice) if invoice else None
     
     def delete_invoice(self, invoice_id: str) -> bool:
         return self.delete(invoice_id)
+
+
+class AsyncInvoiceService(AsyncBaseSupabaseService, InvoiceService):
+    pass
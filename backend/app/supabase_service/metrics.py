@@ -0,0 +1,203 @@
+# In-process metrics for Supabase calls and API requests, rendered in the
+# Prometheus text exposition format at /api/metrics.
+# - supabase_query_duration_seconds{table,operation}: latency histogram per call
+# - supabase_query_rows_total{table,operation}: rows returned or written
+# - supabase_response_bytes_total{table,operation}: response bytes off the wire
+# - supabase_query_errors_total{table,operation,error}: failed calls
+# - http_request_duration_seconds{method,view,status}: per-endpoint latency (MetricsMiddleware)
+# p50/p95/p99 come from the histograms on the Prometheus side, e.g.
+#   histogram_quantile(0.95, sum by (le, table) (rate(supabase_query_duration_seconds_bucket[5m])))
+# Counters are per process: scrape every worker, or run a single worker per container.
+
+
+import contextvars
+import threading
+import time as time_module
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .tracing import span
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}')
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        # labels -> ([count per bucket], [sum, count])
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = ([0] * len(self.buckets), [0.0, 0])
+                self._series[labels] = series
+            counts, totals = series
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            totals[0] += value
+            totals[1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = sorted((labels, (list(counts), list(totals))) for labels, (counts, totals) in self._series.items())
+        for labels, (counts, (total, count)) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                label_text = _format_labels(self.labelnames, labels, ('le', _format_value(bound)))
+                lines.append(f'{self.name}_bucket{label_text} {cumulative}')
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{label_text} {repr(float(total))}')
+            lines.append(f'{self.name}_count{label_text} {int(count)}')
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+QUERY_DURATION = Histogram(
+    'supabase_query_duration_seconds', 'Latency of Supabase calls', ('table', 'operation'),
+)
+QUERY_ROWS = Counter(
+    'supabase_query_rows_total', 'Rows returned or written by Supabase calls', ('table', 'operation'),
+)
+RESPONSE_BYTES = Counter(
+    'supabase_response_bytes_total', 'Response bytes received from Supabase', ('table', 'operation'),
+)
+QUERY_ERRORS = Counter(
+    'supabase_query_errors_total', 'Failed Supabase calls', ('table', 'operation', 'error'),
+)
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Latency of API requests', ('method', 'view', 'status'),
+)
+
+REGISTRY = [QUERY_DURATION, QUERY_ROWS, RESPONSE_BYTES, QUERY_ERRORS, REQUEST_DURATION]
+
+
+# (table, operation) of the Supabase call in progress; lets the HTTP transport
+# attribute response bytes to it
+_current_operation: contextvars.ContextVar[Optional[Tuple[str, str]]] = contextvars.ContextVar(
+    'supabase_current_operation', default=None
+)
+
+
+class QueryOutcome:
+    # Filled in by the caller inside record_query()
+    rows = 0
+
+
+@contextmanager
+def record_query(table: str, operation: str) -> Iterator[QueryOutcome]:
+    # Also a trace span, so the call shows up in Server-Timing as db or storage time
+    outcome = QueryOutcome()
+    category = 'storage' if table.startswith('storage:') else 'db'
+    with span(f'supabase.{operation}', category=category, **{'db.table': table, 'db.operation': operation}) as current:
+        token = _current_operation.set((table, operation))
+        start_time = time_module.perf_counter()
+        try:
+            yield outcome
+        except BaseException as e:
+            QUERY_ERRORS.inc(table, operation, type(e).__name__)
+            raise
+        finally:
+            QUERY_DURATION.observe(time_module.perf_counter() - start_time, table, operation)
+            if outcome.rows:
+                QUERY_ROWS.inc(table, operation, amount=outcome.rows)
+            if current is not None:
+                current.set_attribute('db.rows', outcome.rows)
+            _current_operation.reset(token)
+
+
+def count_rows(data) -> int:
+    if isinstance(data, list):
+        return len(data)
+    return 1 if data else 0
+
+
+def _record_response_bytes(request, nbytes: int) -> None:
+    operation = _current_operation.get()
+    if operation is not None and nbytes:
+        RESPONSE_BYTES.inc(*operation, amount=nbytes)
+
+
+def install_response_observer() -> None:
+    from app_backend.supabase_utils import add_response_observer
+    add_response_observer(_record_response_bytes)
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def reset_metrics() -> None:
+    for metric in REGISTRY:
+        metric.reset()
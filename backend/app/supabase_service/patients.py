@@ -1,38 +1,258 @@
 
 #Patient CRUD operations for Supabase.
 
+import logging
+import re
 from typing import Dict, List, Any, Optional
-from .base import BaseSupabaseService
+from .base import (
+    BaseSupabaseService,
+    BulkWriteError,
+    SupabaseServiceError,
+    _quote_filter_value,
+    decode_cursor,
+    encode_cursor,
+    operation,
+)
+from .async_base import AsyncBaseSupabaseService
+from .autocomplete import INDEXED_FIELDS, get_autocomplete_registry
+
+logger = logging.getLogger(__name__)
+
+# Columns matched by search_patients(); sql/patient_search.sql has their trigram indexes
+SEARCH_COLUMNS = ('first_name', 'last_name', 'phone', 'email')
+# Words beyond this are ignored, each one adds an OR group to the query
+MAX_SEARCH_TERMS = 5
+DEFAULT_SEARCH_LIMIT = 20
+# Page size used to load a tenant's patients into the autocomplete index
+AUTOCOMPLETE_LOAD_PAGE = 1000
+# PostgREST's "function not found" error
+MISSING_FUNCTION = 'PGRST202'
+# Search cursors carry a row offset instead of a keyset position
+SEARCH_CURSOR_ORDER = 'offset'
+
+# Search functions PostgREST reported missing (sql/patient_search.sql not applied);
+# searches use the filter query until the process restarts
+_missing_functions = set()
+
+
+def _search_terms(search_term: str) -> List[str]:
+    # * is PostgREST's wildcard; it is never matched literally
+    terms = [term for term in re.split(r'\s+', search_term.replace('*', ' ').strip()) if term]
+    if not terms:
+        raise ValueError("Search term required")
+    return terms[:MAX_SEARCH_TERMS]
+
+
+def _escape_like(term: str) -> str:
+    # Match %, _ and \ literally instead of as LIKE wildcards
+    return re.sub(r'([%_\\])', r'\\\1', term)
+
+
+def _is_missing_function(exception: Optional[BaseException]) -> bool:
+    while exception is not None:
+        if str(getattr(exception, 'code', '')) == MISSING_FUNCTION:
+            return True
+        exception = exception.__cause__
+    return False
+
+
+def _encode_search_cursor(terms: List[str], offset: int) -> str:
+    # Opaque like the keyset cursors; tied to the words searched for, so a cursor
+    # cannot be replayed against a different query
+    return encode_cursor(SEARCH_CURSOR_ORDER, {SEARCH_CURSOR_ORDER: offset, 'id': ' '.join(terms)})
+
+
+def _decode_search_cursor(cursor: Optional[str], terms: List[str]) -> int:
+    if not cursor:
+        return 0
+    position = decode_cursor(cursor, SEARCH_CURSOR_ORDER)
+    offset = position.get('v')
+    if position['id'] != ' '.join(terms) or not isinstance(offset, int) or offset < 0:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return offset
+
+
+def _search_rank(patient: Dict[str, Any], terms: List[str]) -> int:
+    # 0: a field equals a term, 1: a field starts with one, 2: substring match only
+    values = [(patient.get(column) or '').lower() for column in SEARCH_COLUMNS]
+    best = 2
+    for term in (term.lower() for term in terms):
+        for value in values:
+            if value == term:
+                return 0
+            if value.startswith(term):
+                best = 1
+    return best
+
+
+def _get_setting(name: str, default: Any) -> Any:
+    try:
+        from django.conf import settings
+        return getattr(settings, name, default)
+    except Exception:
+        return default
+
 
 class PatientService(BaseSupabaseService):
     table_name = 'patients'
+    cache_ttl = 300
     
-    def create_patient(self, patient_data: Dict[str, Any]) -> str:
-        return self.create(patient_data)
+    @operation
+    def create_patient(self, patient_data: Dict[str, Any]) -> Dict[str, Any]:
+        patient = yield from self.create.steps(patient_data)
+        get_autocomplete_registry().patients_changed([patient], self.scope_user_id)
+        return patient
     
-    def get_patient(self, patient_id: str) -> Optional[Dict[str, Any]]:
-        return self.get(patient_id)
+    def get_patient(self, patient_id: str, columns: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        return self.get(patient_id, columns=columns)
     
     def get_all_patients(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         return self.get_all(limit=limit, order_by='created_at')
     
-    def search_patients(self, search_term: str) -> List[Dict[str, Any]]:
-        all_patients = self.get_all()
-        search_term_lower = search_term.lower()
-        
-        results = []
-        for patient in all_patients:
-            if any([
-                search_term_lower in (patient.get('first_name') or '').lower(),
-                search_term_lower in (patient.get('last_name') or '').lower(),
-                search_term_lower in (patient.get('phone') or '').lower(),
-                search_term_lower in (patient.get('email') or '').lower(),
-            ]):
-                results.append(patient)   
-        return results
-    
-    def update_patient(self, patient_id: str, patient_data: Dict[str, Any]) -> bool:
-        return self.update(patient_id, patient_data)
+    def get_patients_page(self, limit: int, cursor: Optional[str] = None, columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        return self.get_page(limit, order_by='created_at', cursor=cursor, columns=columns)
+    
+    def _search_query(self, client, terms: List[str], limit: int, offset: int, columns: Optional[List[str]]):
+        # Every word must match one of the search columns (case-insensitive substring);
+        # ordered by name so pages are stable, one extra row tells whether more exist
+        select = self._select_columns(columns, 'id', *SEARCH_COLUMNS)
+        query = self._apply_scope(client.table(self.table_name).select(select))
+        for term in terms:
+            pattern = _quote_filter_value(f"*{_escape_like(term)}*")
+            query = query.or_(','.join(f"{column}.ilike.{pattern}" for column in SEARCH_COLUMNS))
+        return query.order('last_name').order('first_name').order('id').range(offset, offset + limit)
+    
+    def _search_function(self) -> Optional[str]:
+        # The ranked search function to call, or None to use the filter query
+        function = _get_setting('PATIENT_SEARCH_RPC', '')
+        if not function or function in _missing_functions or self.scope_user_id is None:
+            return None
+        return function
+    
+    def _search_function_missing(self, function: str) -> None:
+        logger.warning(
+            f"Search function {function} is not installed (run sql/patient_search.sql); "
+            f"patient search falls back to filters ranked within each page"
+        )
+        _missing_functions.add(function)
+    
+    def _search_rpc(self, client, function: str, search_term: str, limit: int, offset: int):
+        # Trigram-ranked search in the database (sql/patient_search.sql): matches are
+        # ordered by similarity across all pages; only for tenant-scoped services
+        return client.rpc(function, {
+            'p_user_id': self.scope_user_id,
+            'p_query': search_term.strip(),
+            'p_limit': limit + 1,
+            'p_offset': offset,
+        })
+    
+    def _search_page(self, rows: List[Dict[str, Any]], terms: List[str], limit: int, offset: int,
+                     columns: Optional[List[str]], rank_within_page: bool) -> Dict[str, Any]:
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if rank_within_page:
+            # Filter query results come in name order: move exact and prefix matches
+            # to the top of this page only (a better match may sit on a later page);
+            # sorted() is stable, so ties keep the name order
+            rows = sorted(rows, key=lambda row: _search_rank(row, terms))
+        return {
+            'results': [self._project(row, columns) for row in rows],
+            'next': _encode_search_cursor(terms, offset + limit) if has_more else None,
+            'previous': _encode_search_cursor(terms, max(offset - limit, 0)) if offset else None,
+        }
+    
+    @operation
+    def search_patients(
+        self,
+        search_term: str,
+        limit: int = DEFAULT_SEARCH_LIMIT,
+        cursor: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        # One page of matches: {'results', 'next', 'previous'}, where next/previous
+        # are opaque cursors for the same search. The search runs in the database, so
+        # only the page is transferred: through the PATIENT_SEARCH_RPC function (best
+        # matches first across pages) when it is installed, else as ilike filters in
+        # name order.
+        terms = _search_terms(search_term)
+        offset = _decode_search_cursor(cursor, terms)
+        try:
+            function = self._search_function()
+            if function:
+                try:
+                    response = yield (lambda client: self._search_rpc(client, function, search_term, limit, offset)), 'query'
+                    return self._search_page(response.data or [], terms, limit, offset, columns, False)
+                except Exception as e:
+                    if not _is_missing_function(e):
+                        raise
+                    self._search_function_missing(function)
+            response = yield (lambda client: self._search_query(client, terms, limit, offset, columns)), 'query'
+            return self._search_page(response.data or [], terms, limit, offset, columns, True)
+        except SupabaseServiceError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to search {self.table_name}: {e}")
+            raise SupabaseServiceError(f"Failed to search patients: {e}")
+    
+    @operation
+    def update_patient(self, patient_id: str, patient_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        patient = yield from self.update.steps(patient_id, patient_data)
+        if patient:
+            get_autocomplete_registry().patients_changed([patient], self.scope_user_id)
+        return patient
     
+    @operation
     def delete_patient(self, patient_id: str) -> bool:
-        return self.delete(patient_id)
+        deleted = yield from self.delete.steps(patient_id)
+        if deleted:
+            get_autocomplete_registry().patients_removed([patient_id], self.scope_user_id)
+        return deleted
+    
+    # Bulk writes keep loaded autocomplete indexes current too
+    
+    @operation
+    def create_many(self, records: List[Dict[str, Any]], chunk_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        try:
+            created = yield from super().create_many.steps(records, chunk_size=chunk_size)
+        except BulkWriteError as e:
+            get_autocomplete_registry().patients_changed(e.written, self.scope_user_id)
+            raise
+        get_autocomplete_registry().patients_changed(created, self.scope_user_id)
+        return created
+    
+    @operation
+    def update_many(self, data: Dict[str, Any], ids: Optional[List[str]] = None,
+                    filters: Optional[Dict[str, Any]] = None, chunk_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        updated = yield from super().update_many.steps(data, ids=ids, filters=filters, chunk_size=chunk_size)
+        get_autocomplete_registry().patients_changed(updated, self.scope_user_id)
+        return updated
+    
+    @operation
+    def delete_many(self, ids: Optional[List[str]] = None, filters: Optional[Dict[str, Any]] = None,
+                    chunk_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        deleted = yield from super().delete_many.steps(ids=ids, filters=filters, chunk_size=chunk_size)
+        get_autocomplete_registry().patients_removed([row['id'] for row in deleted], self.scope_user_id)
+        return deleted
+    
+    def _iter_index_rows(self):
+        # Every patient of the tenant, page by page (PostgREST caps rows per response)
+        cursor = None
+        while True:
+            page = self.get_page(
+                AUTOCOMPLETE_LOAD_PAGE, order_by='created_at', cursor=cursor, columns=list(INDEXED_FIELDS),
+            )
+            yield from page['results']
+            cursor = page['next']
+            if not cursor:
+                return
+    
+    def autocomplete_patients(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        # Top matches from the tenant's in-memory index, loaded on first use
+        if self.scope_user_id is None:
+            raise ValueError("Autocomplete needs a tenant-scoped service (for_user)")
+        index = get_autocomplete_registry().get(self.scope_user_id, self._iter_index_rows)
+        return index.search(query, limit)
+
+
+class AsyncPatientService(AsyncBaseSupabaseService, PatientService):
+    pass
@@ -0,0 +1,253 @@
+# Retries and circuit breaking for Supabase round-trips.
+# BaseSupabaseService._execute() and XrayService's Storage calls run through
+# call_with_resilience():
+# - transient failures (connection resets, timeouts, 5xx from the gateway) of
+#   idempotent reads are retried with full-jitter exponential backoff
+# - every table (and Storage bucket) has its own circuit breaker; after
+#   SUPABASE_BREAKER_FAILURE_THRESHOLD consecutive transient failures it opens
+#   and calls fail fast with SupabaseConnectionError for
+#   SUPABASE_BREAKER_RESET_TIMEOUT seconds, then a single probe call decides
+#   whether it closes again (a probe cut short by cancellation or the request
+#   deadline gives no verdict; the next call probes instead)
+# Errors that mean Supabase answered (bad filter, unique violation, 404) are
+# neither retried nor counted against the breaker.
+# Within a request deadline (deadline.py) no attempt starts once the budget is
+# spent, a retry is skipped when its backoff would overrun the budget, and a
+# timeout caused by the deadline itself does not count against the breaker.
+
+
+import asyncio
+import logging
+import random
+import threading
+import time as time_module
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from .deadline import check_deadline, remaining_budget
+
+logger = logging.getLogger(__name__)
+
+# Operation names (as passed to _execute) that are safe to send twice
+IDEMPOTENT_OPERATIONS = frozenset({'get', 'load_many', 'list', 'query', 'exists', 'sign_url', 'remove'})
+
+DEFAULT_READ_RETRIES = 2
+DEFAULT_RETRY_BASE_DELAY = 0.1
+DEFAULT_RETRY_MAX_DELAY = 1.0
+DEFAULT_BREAKER_FAILURE_THRESHOLD = 5
+DEFAULT_BREAKER_RESET_TIMEOUT = 30.0
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def _get_setting(name: str, default: Any) -> Any:
+    try:
+        from django.conf import settings
+        return getattr(settings, name, default)
+    except Exception:
+        return default
+
+
+def is_transient(exception: BaseException) -> bool:
+    # True for failures worth retrying: the request never got a real answer
+    if isinstance(exception, httpx.TransportError):
+        return True
+    code = getattr(exception, 'code', None)
+    try:
+        status_code = int(code)
+    except (TypeError, ValueError):
+        status_code = None
+    if status_code is not None and 500 <= status_code <= 599:
+        return True
+    # Storage errors carry the HTTP status separately
+    status_code = getattr(exception, 'status', None) or getattr(exception, 'status_code', None)
+    try:
+        return 500 <= int(status_code) <= 599
+    except (TypeError, ValueError):
+        return False
+
+
+class CircuitBreaker:
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            if self.state == OPEN and time_module.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+        from .base import SupabaseConnectionError
+        raise SupabaseConnectionError(f"Circuit open for {self.name}: Supabase is failing, not sending request")
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(f"Circuit for {self.name} closed")
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                    logger.warning(
+                        f"Circuit for {self.name} opened after {self.consecutive_failures} failures"
+                    )
+                self.state = OPEN
+                self.opened_at = time_module.monotonic()
+                self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        # The half-open probe ended without an answer either way (deadline, cancellation):
+        # stay half-open and let the next call probe
+        with self._lock:
+            self._probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = max(self.reset_timeout - (time_module.monotonic() - self.opened_at), 0)
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'times_opened': self.times_opened,
+                'retry_in': round(retry_in, 1) if retry_in is not None else None,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(name)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    name,
+                    failure_threshold=int(_get_setting(
+                        'SUPABASE_BREAKER_FAILURE_THRESHOLD', DEFAULT_BREAKER_FAILURE_THRESHOLD
+                    )),
+                    reset_timeout=float(_get_setting(
+                        'SUPABASE_BREAKER_RESET_TIMEOUT', DEFAULT_BREAKER_RESET_TIMEOUT
+                    )),
+                )
+                _breakers[name] = breaker
+    return breaker
+
+
+def get_breaker_states() -> Dict[str, Dict[str, Any]]:
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {name: breaker.snapshot() for name, breaker in sorted(breakers.items())}
+
+
+def reset_breakers() -> None:
+    with _breakers_lock:
+        _breakers.clear()
+
+
+def _retry_delay(attempt: int) -> float:
+    base = float(_get_setting('SUPABASE_RETRY_BASE_DELAY', DEFAULT_RETRY_BASE_DELAY))
+    cap = float(_get_setting('SUPABASE_RETRY_MAX_DELAY', DEFAULT_RETRY_MAX_DELAY))
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def _max_attempts(operation: str) -> int:
+    if operation not in IDEMPOTENT_OPERATIONS:
+        return 1
+    return 1 + int(_get_setting('SUPABASE_READ_RETRIES', DEFAULT_READ_RETRIES))
+
+
+def _on_transient(breaker: CircuitBreaker, name: str, operation: str, attempt: int, attempts: int, error: Exception) -> Optional[float]:
+    # Delay before the next attempt, or None when the error should be raised
+    remaining = remaining_budget()
+    if remaining is not None and remaining <= 0:
+        from .base import SupabaseDeadlineExceededError
+        breaker.release_probe()
+        raise SupabaseDeadlineExceededError(f"{name}.{operation} ran past the request deadline: {error}") from error
+    breaker.record_failure()
+    if attempt + 1 >= attempts:
+        return None
+    delay = _retry_delay(attempt)
+    if remaining is not None and delay >= remaining:
+        logger.warning(f"Not retrying {name}.{operation}: only {remaining:.2f}s left in the request deadline")
+        return None
+    logger.warning(
+        f"Transient error on {name}.{operation} (attempt {attempt + 1}/{attempts}), "
+        f"retrying in {delay:.2f}s: {error}"
+    )
+    return delay
+
+
+def call_with_resilience(name: str, operation: str, func: Callable[[], Any]) -> Any:
+    breaker = get_breaker(name)
+    attempts = _max_attempts(operation)
+    for attempt in range(attempts):
+        check_deadline(f"{name}.{operation}")
+        breaker.before_call()
+        try:
+            result = func()
+        except Exception as e:
+            if not is_transient(e):
+                breaker.record_success()
+                raise
+            delay = _on_transient(breaker, name, operation, attempt, attempts, e)
+            if delay is None:
+                raise
+            time_module.sleep(delay)
+            continue
+        except BaseException:
+            # Cancelled or interrupted: no verdict on Supabase, but a probe must not stay claimed
+            breaker.release_probe()
+            raise
+        breaker.record_success()
+        return result
+
+
+async def acall_with_resilience(name: str, operation: str, func: Callable[[], Awaitable[Any]]) -> Any:
+    breaker = get_breaker(name)
+    attempts = _max_attempts(operation)
+    for attempt in range(attempts):
+        check_deadline(f"{name}.{operation}")
+        breaker.before_call()
+        try:
+            result = await func()
+        except Exception as e:
+            if not is_transient(e):
+                breaker.record_success()
+                raise
+            delay = _on_transient(breaker, name, operation, attempt, attempts, e)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+            continue
+        except BaseException:
+            # e.g. asyncio.CancelledError when the client disconnects
+            breaker.release_probe()
+            raise
+        breaker.record_success()
+        return result
@@ -0,0 +1,341 @@
+# Per-tenant, per-day interval index over appointments, behind
+# AppointmentService.find_conflict() and get_day_schedule().
+#
+# An appointment occupies [start, start + duration_minutes) in minutes since
+# midnight; Cancelled appointments occupy nothing. A DaySchedule keeps one day's
+# intervals sorted by start, with the positions of the two longest-reaching ends of
+# every prefix: the intervals starting before `end` are a prefix found by
+# bisection, and one of them (other than an excluded appointment) reaches past
+# `start` exactly when the prefix's best or, if that is the excluded one, its
+# second-best end does, so an overlap test is O(log n).
+#
+# Days held by the registry are never changed in place: a write replaces the day
+# with a changed copy, so requests on other threads read a consistent day
+# without taking the lock.
+#
+# Days are loaded lazily (one query for the day's active appointments) and kept
+# current by the appointment write paths. A day older than APPOINTMENT_SCHEDULE_TTL
+# seconds is reloaded to pick up bookings made by other worker processes, and at most
+# APPOINTMENT_SCHEDULE_MAX_DAYS days are kept (least recently used are dropped).
+# Within the TTL a day can be stale both ways: the overlap constraint from
+# sql/appointment_slots.sql catches a booking it missed, and find_conflict()
+# re-reads the day before reporting a slot that may have been freed since.
+#
+# The registry also keeps per-month appointment counts by day and status for the
+# calendar view. Any appointment write drops the tenant's cached months (an update
+# may move an appointment between months), and a month older than
+# APPOINTMENT_CALENDAR_TTL seconds is recounted.
+
+
+import threading
+import time as time_module
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import date, time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_DURATION = 30
+DEFAULT_TTL = 5
+DEFAULT_MAX_DAYS = 10000
+DEFAULT_CALENDAR_TTL = 5
+MAX_CACHED_MONTHS = 1000
+DEFAULT_SLOT_STEP = 15
+MINUTES_PER_DAY = 24 * 60
+WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+# Monday to Saturday, 08:00-18:00
+DEFAULT_WORKING_HOURS = {weekday: ['08:00-18:00'] for weekday in WEEKDAYS[:6]}
+SCHEDULE_FIELDS = ('id', 'date', 'time', 'duration_minutes', 'status')
+INACTIVE_STATUSES = ('Cancelled',)
+# Column order of the calendar counts
+CALENDAR_STATUSES = ('Pending', 'Confirmed', 'Completed', 'Cancelled')
+
+
+def _get_setting(name: str, default: Any) -> Any:
+    try:
+        from django.conf import settings
+        return getattr(settings, name, default)
+    except Exception:
+        return default
+
+
+def default_duration() -> int:
+    return int(_get_setting('APPOINTMENT_DEFAULT_DURATION', DEFAULT_DURATION))
+
+
+def slot_step() -> int:
+    return int(_get_setting('APPOINTMENT_SLOT_STEP', DEFAULT_SLOT_STEP))
+
+
+def to_minutes(value: Any) -> int:
+    # Minutes since midnight of a time or an 'HH:MM[:SS]' string
+    if isinstance(value, time):
+        return value.hour * 60 + value.minute
+    hours, minutes = str(value).split(':')[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def format_minutes(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def working_windows(day: date) -> List[Tuple[int, int]]:
+    # Opening hours of the day as (opens, closes) minutes; none on closed days
+    hours = _get_setting('APPOINTMENT_WORKING_HOURS', DEFAULT_WORKING_HOURS) or {}
+    windows = []
+    for window in hours.get(WEEKDAYS[day.weekday()]) or []:
+        opens, closes = window.split('-')
+        windows.append((to_minutes(opens), to_minutes(closes)))
+    return sorted(windows)
+
+
+def interval_of(appointment: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+    # (start, end) in minutes, or None when the appointment occupies no time
+    if appointment.get('status') in INACTIVE_STATUSES or not appointment.get('time'):
+        return None
+    start = to_minutes(appointment['time'])
+    return start, start + int(appointment.get('duration_minutes') or default_duration())
+
+
+class DaySchedule:
+
+    def __init__(self, appointments: Iterable[Dict[str, Any]] = ()):
+        self.loaded_at = time_module.monotonic()
+        entries = []
+        for appointment in appointments:
+            interval = interval_of(appointment)
+            if interval is not None:
+                entries.append((interval[0], interval[1], appointment.get('id')))
+        entries.sort(key=lambda entry: entry[0])
+        self._starts = [entry[0] for entry in entries]
+        self._ends = [entry[1] for entry in entries]
+        self._ids = [entry[2] for entry in entries]
+        # Per prefix: its largest end, and the positions holding its largest and
+        # second-largest ends (-1 when there is none)
+        self._max_end: List[int] = []
+        self._best: List[int] = []
+        self._second: List[int] = []
+        self._rebuild(0)
+        # free_slots() results, dropped whenever the day changes
+        self._free: Dict[tuple, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def copy(self) -> 'DaySchedule':
+        # Same day and load time, to be changed without touching this one
+        clone = DaySchedule()
+        clone.loaded_at = self.loaded_at
+        clone._starts, clone._ends, clone._ids = list(self._starts), list(self._ends), list(self._ids)
+        clone._max_end, clone._best, clone._second = list(self._max_end), list(self._best), list(self._second)
+        return clone
+
+    def _rebuild(self, position: int) -> None:
+        # Prefix maxima of the ends from `position` on
+        self._free = {}
+        del self._max_end[position:], self._best[position:], self._second[position:]
+        best = self._best[-1] if self._best else -1
+        second = self._second[-1] if self._second else -1
+        ends = self._ends
+        for index in range(position, len(ends)):
+            end = ends[index]
+            if best < 0 or end > ends[best]:
+                best, second = index, best
+            elif second < 0 or end > ends[second]:
+                second = index
+            self._max_end.append(ends[best])
+            self._best.append(best)
+            self._second.append(second)
+
+    def add(self, appointment_id: Optional[str], start: int, end: int) -> None:
+        position = bisect_right(self._starts, start)
+        self._starts.insert(position, start)
+        self._ends.insert(position, end)
+        self._ids.insert(position, appointment_id)
+        self._rebuild(position)
+
+    def remove(self, appointment_id: str) -> bool:
+        try:
+            position = self._ids.index(appointment_id)
+        except ValueError:
+            return False
+        del self._starts[position], self._ends[position], self._ids[position]
+        self._rebuild(position)
+        return True
+
+    def overlapping(self, start: int, end: int, exclude_id: Optional[str] = None) -> Optional[str]:
+        # Id of an appointment overlapping [start, end) other than exclude_id, or None
+        # ('' for a tentative booking without an id)
+        position = bisect_left(self._starts, end) - 1
+        if position < 0:
+            return None
+        for candidate in (self._best[position], self._second[position]):
+            if candidate < 0 or self._ends[candidate] <= start:
+                return None
+            appointment_id = self._ids[candidate]
+            if exclude_id is None or appointment_id != exclude_id:
+                return appointment_id or ''
+        return None
+
+    def intervals(self) -> List[Tuple[int, int, Optional[str]]]:
+        # (start, end, id) sorted by start
+        return list(zip(self._starts, self._ends, self._ids))
+
+    def free_slots(self, windows: Iterable[Tuple[int, int]], duration: int, step: int) -> List[int]:
+        # Start minutes (aligned to `step` from each window's opening) of every
+        # `duration`-long slot inside the working windows that overlaps no appointment
+        key = (tuple(windows), duration, step)
+        cached = self._free.get(key)
+        if cached is None:
+            cached = self._free[key] = self._sweep(key[0], duration, step)
+        return cached
+
+    def _sweep(self, windows: Tuple[Tuple[int, int], ...], duration: int, step: int) -> List[int]:
+        # One pass over the bookings (sorted by start) per window, emitting the gaps
+        slots = []
+        for opens, closes in windows:
+            cursor = opens
+            # Bookings before this position all end by the opening (the max-ends are sorted)
+            for position in range(bisect_right(self._max_end, opens), len(self._starts)):
+                start, end = self._starts[position], self._ends[position]
+                if start >= closes:
+                    break
+                if end <= cursor:
+                    continue
+                self._emit(slots, opens, cursor, min(start, closes), duration, step)
+                cursor = max(cursor, end)
+            self._emit(slots, opens, cursor, closes, duration, step)
+        return slots
+
+    @staticmethod
+    def _emit(slots: List[int], opens: int, gap_start: int, gap_end: int, duration: int, step: int) -> None:
+        first = opens + -(-(gap_start - opens) // step) * step
+        slots.extend(range(first, gap_end - duration + 1, step))
+
+
+class ScheduleRegistry:
+    # Loaded days keyed by (user_id, date), least recently used first
+
+    def __init__(self):
+        self._days: 'OrderedDict[Tuple[str, str], DaySchedule]' = OrderedDict()
+        # (user_id, appointment id) -> key of the loaded day holding it
+        self._day_of: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        # (user_id, 'YYYY-MM') -> (counted at, per-day status counts), least recently used first
+        self._months: 'OrderedDict[Tuple[str, str], Tuple[float, List[List[int]]]]' = OrderedDict()
+        self._lock = threading.RLock()
+
+    def fresh(self, user_id: str, day: Any) -> Optional[DaySchedule]:
+        # The loaded day if it is within the TTL; never loads
+        ttl = float(_get_setting('APPOINTMENT_SCHEDULE_TTL', DEFAULT_TTL))
+        key = (user_id, str(day))
+        with self._lock:
+            schedule = self._days.get(key)
+            if schedule is None or not ttl or time_module.monotonic() - schedule.loaded_at >= ttl:
+                return None
+            self._days.move_to_end(key)
+            return schedule
+
+    def store(self, user_id: str, day: Any, appointments: Iterable[Dict[str, Any]]) -> DaySchedule:
+        # Index a freshly read day (its active appointments) and keep it if caching is on
+        schedule = DaySchedule(appointments)
+        if not float(_get_setting('APPOINTMENT_SCHEDULE_TTL', DEFAULT_TTL)):
+            return schedule
+        key = (user_id, str(day))
+        with self._lock:
+            self._drop(key)
+            self._days[key] = schedule
+            for _, _, appointment_id in schedule.intervals():
+                self._day_of[(user_id, appointment_id)] = key
+            max_days = int(_get_setting('APPOINTMENT_SCHEDULE_MAX_DAYS', DEFAULT_MAX_DAYS))
+            while len(self._days) > max_days:
+                self._drop(next(iter(self._days)))
+        return schedule
+
+    def month_counts(self, user_id: str, month: str) -> Optional[List[List[int]]]:
+        # The counted month if it is within the TTL; never counts
+        ttl = float(_get_setting('APPOINTMENT_CALENDAR_TTL', DEFAULT_CALENDAR_TTL))
+        key = (user_id, month)
+        with self._lock:
+            entry = self._months.get(key)
+            if entry is None or not ttl or time_module.monotonic() - entry[0] >= ttl:
+                return None
+            self._months.move_to_end(key)
+            return entry[1]
+
+    def store_month_counts(self, user_id: str, month: str, counts: List[List[int]]) -> List[List[int]]:
+        if not float(_get_setting('APPOINTMENT_CALENDAR_TTL', DEFAULT_CALENDAR_TTL)):
+            return counts
+        with self._lock:
+            self._months[(user_id, month)] = (time_module.monotonic(), counts)
+            self._months.move_to_end((user_id, month))
+            while len(self._months) > MAX_CACHED_MONTHS:
+                self._months.popitem(last=False)
+        return counts
+
+    def _drop_months(self, user_id: Optional[str]) -> None:
+        # All counted months of the tenant (of every tenant when the owner is unknown)
+        for key in [key for key in self._months if user_id is None or key[0] == user_id]:
+            del self._months[key]
+
+    def _drop(self, key: Tuple[str, str]) -> None:
+        schedule = self._days.pop(key, None)
+        if schedule is not None:
+            for _, _, appointment_id in schedule.intervals():
+                self._day_of.pop((key[0], appointment_id), None)
+
+    def _forget(self, user_id: str, appointment_id: str) -> Optional[Tuple[str, str]]:
+        # Take the appointment out of its loaded day; returns that day's key
+        key = self._day_of.pop((user_id, appointment_id), None)
+        if key is not None and key in self._days:
+            schedule = self._days[key].copy()
+            schedule.remove(appointment_id)
+            self._days[key] = schedule
+        return key
+
+    def appointments_changed(self, rows: Iterable[Dict[str, Any]], user_id: Optional[str] = None) -> None:
+        # Written rows as returned by PostgREST; moves them between loaded days
+        with self._lock:
+            for row in rows:
+                owner = user_id or row.get('user_id')
+                appointment_id = row.get('id')
+                self._drop_months(owner)
+                if not owner or not appointment_id:
+                    continue
+                previous = self._forget(owner, appointment_id)
+                if 'date' not in row or 'time' not in row:
+                    # Partial row: where it sits now is unknown, so its day is reloaded
+                    if previous is not None:
+                        self._drop(previous)
+                    continue
+                key = (owner, str(row['date']))
+                schedule = self._days.get(key)
+                interval = interval_of(row)
+                if schedule is not None and interval is not None:
+                    schedule = schedule.copy()
+                    schedule.add(appointment_id, *interval)
+                    self._days[key] = schedule
+                    self._day_of[(owner, appointment_id)] = key
+
+    def appointments_removed(self, appointment_ids: Iterable[str], user_id: Optional[str] = None) -> None:
+        with self._lock:
+            self._drop_months(user_id)
+            for appointment_id in appointment_ids:
+                owners = [user_id] if user_id else [owner for owner, other in self._day_of if other == appointment_id]
+                for owner in owners:
+                    self._forget(owner, appointment_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._days.clear()
+            self._day_of.clear()
+            self._months.clear()
+
+
+_registry = ScheduleRegistry()
+
+
+def get_schedule_registry() -> ScheduleRegistry:
+    return _registry
+
+
+def reset_schedules() -> None:
+    _registry.clear()
@@ -0,0 +1,177 @@
+# Lightweight per-request tracing.
+# TracingMiddleware opens a Trace for each request; span() records timed stages
+# inside it (JWT decode, serializer validation, every Supabase query and
+# Storage call via record_query()). When the request finishes:
+# - the response gets a Server-Timing header summing span time per category,
+#   plus X-Request-ID (the incoming one if the client sent it)
+# - with TRACE_EXPORT_FILE set, spans are appended to that file as JSON lines
+#   shaped like OpenTelemetry (OTLP/JSON) spans
+# Outside a request (management commands, shell) span() is a no-op.
+
+
+import contextvars
+import json
+import logging
+import os
+import re
+import threading
+import time as time_module
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Incoming X-Request-ID values are echoed back, so only accept plain tokens
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+# Server-Timing entries, in header order
+SERVER_TIMING_CATEGORIES = ('auth', 'validate', 'db', 'storage')
+
+
+class Span:
+
+    def __init__(self, trace: 'Trace', name: str, category: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.category = category
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_ns = time_module.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time_module.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_otel(self) -> Dict[str, Any]:
+        return {
+            'traceId': self.trace.trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent_id or '',
+            'name': self.name,
+            'kind': 'SPAN_KIND_SERVER' if self.parent_id is None else 'SPAN_KIND_INTERNAL',
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns or self.start_ns),
+            'attributes': [
+                {'key': key, 'value': _otel_value(value)}
+                for key, value in dict(self.attributes, category=self.category).items()
+            ],
+            'status': {'code': 'STATUS_CODE_ERROR', 'message': self.error} if self.error else {'code': 'STATUS_CODE_OK'},
+        }
+
+
+def _otel_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class Trace:
+    # Spans of one request; shared with gather() worker threads, hence the lock
+
+    def __init__(self, request_id: Optional[str] = None):
+        self.trace_id = uuid.uuid4().hex
+        self.request_id = request_id or self.trace_id
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def server_timing(self, total_ms: float) -> str:
+        totals: Dict[str, List[float]] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            if span.category in SERVER_TIMING_CATEGORIES:
+                entry = totals.setdefault(span.category, [0.0, 0])
+                entry[0] += span.duration_ms
+                entry[1] += 1
+        parts = []
+        for category in SERVER_TIMING_CATEGORIES:
+            if category in totals:
+                duration, count = totals[category]
+                parts.append(f'{category};dur={duration:.1f};desc="{count} calls"')
+        parts.append(f'total;dur={total_ms:.1f}')
+        return ', '.join(parts)
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar('trace', default=None)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar('trace_span', default=None)
+
+
+def get_current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str, category: str = 'app', **attributes: Any) -> Iterator[Optional[Span]]:
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    parent = _current_span.get()
+    current = Span(trace, name, category, parent.span_id if parent else None, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end_ns = time_module.time_ns()
+        _current_span.reset(token)
+        trace.add(current)
+
+
+@contextmanager
+def trace_scope(name: str, request_id: Optional[str] = None, **attributes: Any) -> Iterator[Trace]:
+    # Opens a trace plus its root span; the root's parent_id is None
+    if request_id and not REQUEST_ID_PATTERN.match(request_id):
+        request_id = None
+    trace = Trace(request_id)
+    token = _current_trace.set(trace)
+    try:
+        with span(name, category='request', **dict(attributes, **{'request.id': trace.request_id})):
+            yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+_export_lock = threading.Lock()
+
+
+def get_export_path() -> Optional[str]:
+    path = os.getenv('TRACE_EXPORT_FILE')
+    if path is None:
+        try:
+            from django.conf import settings
+            path = getattr(settings, 'TRACE_EXPORT_FILE', None)
+        except Exception:
+            path = None
+    return path or None
+
+
+def export_trace(trace: Trace, path: Optional[str] = None) -> None:
+    path = path or get_export_path()
+    if not path:
+        return
+    with trace._lock:
+        lines = [json.dumps(span.to_otel(), default=str) for span in trace.spans]
+    try:
+        with _export_lock, open(path, 'a', encoding='utf-8') as handle:
+            handle.write('\n'.join(lines) + '\n')
+    except OSError as e:
+        logger.warning(f"Could not export trace {trace.trace_id} to {path}: {e}")
@@ -2,11 +2,13 @@
 
 from decimal import Decimal
 from typing import Dict, List, Any, Optional
-from .base import BaseSupabaseService
+from .base import BaseSupabaseService, operation
+from .async_base import AsyncBaseSupabaseService
 
 
 class TreatmentService(BaseSupabaseService):    
     table_name = 'treatments'
+    cache_ttl = 300
     
     def _convert_decimal_in_result(self, treatment: Dict[str, Any]) -> Dict[str, Any]:
         if treatment and 'cost' in treatment and treatment['cost'] is not None:
@@ -25,23 +27,40 @@ class TreatmentService(BaseSupabaseService):
             converted_results.append(treatment_copy)
         return converted_results
     
-    def create_treatment(self, treatment_data: Dict[str, Any]) -> str:
-        return self.create(treatment_data)
+    @operation
+    def create_treatment(self, treatment_data: Dict[str, Any]) -> Dict[str, Any]:
+        treatment = yield from self.create.steps(treatment_data)
+        return self._convert_decimal_in_result(treatment)
     
-    def get_treatment(self, treatment_id: str) -> Optional[Dict[str, Any]]:
-        treatment = self.get(treatment_id)
+    @operation
+    def get_treatment(self, treatment_id: str, columns: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        treatment = yield from self.get.steps(treatment_id, columns=columns)
         return self._convert_decimal_in_result(treatment) if treatment else None
     
+    @operation
     def get_all_treatments(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
-        results = self.get_all(limit=limit, order_by='date')
+        results = yield from self.get_all.steps(limit=limit, order_by='date')
         return self._convert_decimals_in_results(results)
     
-    def get_patient_treatments(self, patient_id: str) -> List[Dict[str, Any]]:
-        results = self.query_by_field('patient_id', patient_id)
+    @operation
+    def get_treatments_page(self, limit: int, cursor: Optional[str] = None, columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        page = yield from self.get_page.steps(limit, order_by='date', cursor=cursor, columns=columns)
+        page['results'] = self._convert_decimals_in_results(page['results'])
+        return page
+    
+    @operation
+    def get_patient_treatments(self, patient_id: str, columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        results = yield from self.query_by_field.steps('patient_id', patient_id, columns=columns)
         return self._convert_decimals_in_results(results)
     
-    def update_treatment(self, treatment_id: str, treatment_data: Dict[str, Any]) -> bool:
-        return self.update(treatment_id, treatment_data)
+    @operation
+    def update_treatment(self, treatment_id: str, treatment_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        treatment = yield from self.update.steps(treatment_id, treatment_data)
+        return self._convert_decimal_in_result(treatment) if treatment else None
     
     def delete_treatment(self, treatment_id: str) -> bool:
         return self.delete(treatment_id)
+
+
+class AsyncTreatmentService(AsyncBaseSupabaseService, TreatmentService):
+    pass
@@ -6,16 +6,30 @@ import uuid
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from .base import BaseSupabaseService, SupabaseServiceError
+from .metrics import record_query
+from .resilience import call_with_resilience
 
 logger = logging.getLogger(__name__)
 
 # Storage bucket name for X-ray images
 XRAY_BUCKET = 'x_rays'
+# Table label for Storage calls in the metrics and circuit breakers
+XRAY_STORAGE_METRIC = f'storage:{XRAY_BUCKET}'
 
 
 class XrayService(BaseSupabaseService):
     table_name = 'xrays'
     
+    def _storage_call(self, operation: str, func):
+        """
+        Run a Storage request with metrics, retries (idempotent operations only)
+        and the bucket's circuit breaker.
+        """
+        def attempt():
+            with record_query(XRAY_STORAGE_METRIC, operation):
+                return func()
+        return call_with_resilience(XRAY_STORAGE_METRIC, operation, attempt)
+    
     def _get_storage_path(self, patient_id: str, filename: str) -> str:
         """Generate a unique storage path for the image."""
         # Structure: patient_id/uuid_filename
@@ -56,11 +70,11 @@ class XrayService(BaseSupabaseService):
             # Upload to Supabase Storage
             logger.info(f"Uploading image to storage bucket '{XRAY_BUCKET}': {storage_path}")
             try:
-                self.client.storage.from_(XRAY_BUCKET).upload(
+                self._storage_call('upload', lambda: self.client.storage.from_(XRAY_BUCKET).upload(
                     path=storage_path,
                     file=file_data,
                     file_options={"content-type": content_type}
-                )
+                ))
             except Exception as storage_error:
                 error_msg = str(storage_error)
                 logger.error(f"Storage upload error: {error_msg}")
@@ -87,7 +101,7 @@ class XrayService(BaseSupabaseService):
             # Save metadata to database
             logger.info(f"Saving metadata to database: {record_data}")
             try:
-                response = self.client.table(self.table_name).insert(record_data).execute()
+                response = self._execute(self.client.table(self.table_name).insert(record_data), 'insert')
             except Exception as db_error:
                 # Rollback: delete uploaded file if DB insert fails
                 logger.error(f"Database insert error: {db_error}")
@@ -119,17 +133,44 @@ class XrayService(BaseSupabaseService):
     def _delete_from_storage(self, storage_path: str) -> None:
         """Helper to delete a file from storage."""
         try:
-            self.client.storage.from_(XRAY_BUCKET).remove([storage_path])
+            self._storage_call('remove', lambda: self.client.storage.from_(XRAY_BUCKET).remove([storage_path]))
         except Exception as e:
             logger.warning(f"Could not delete from storage: {e}")
     
+    def delete_many(
+        self,
+        ids: Optional[List[str]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        chunk_size: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Delete image records in bulk, then remove their files from Storage.
+        
+        Files are removed with one Storage request per chunk, after the rows are gone,
+        so a failed Storage call can only leave orphaned files, never dangling records.
+        
+        Returns:
+            The deleted xray records
+        """
+        deleted = super().delete_many(ids=ids, filters=filters, chunk_size=chunk_size)
+        paths = [
+            record['image_url'] for record in deleted
+            if record.get('image_url') and isinstance(record.get('image_url'), str)
+        ]
+        for chunk in self._chunked(paths, chunk_size):
+            try:
+                self._storage_call('remove', lambda: self.client.storage.from_(XRAY_BUCKET).remove(chunk))
+            except Exception as e:
+                logger.warning(f"Could not delete {len(chunk)} files from storage: {e}")
+        return deleted
+    
     def _get_signed_url(self, storage_path: str, expires_in: int = 3600) -> str:
         """Generate a signed URL for secure image access."""
         try:
-            response = self.client.storage.from_(XRAY_BUCKET).create_signed_url(
+            response = self._storage_call('sign_url', lambda: self.client.storage.from_(XRAY_BUCKET).create_signed_url(
                 path=storage_path,
                 expires_in=expires_in
-            )
+            ))
             logger.info(f"Signed URL response for {storage_path}: {response} (type: {type(response)})")
             
             # Handle different response formats from supabase-py
@@ -199,11 +240,11 @@ class XrayService(BaseSupabaseService):
             List of xray records with signed URLs
         """
         try:
-            response = self.client.table(self.table_name)\
+            query = self.client.table(self.table_name)\
                 .select("*")\
                 .eq('patient_id', patient_id)\
-                .order('date_taken', desc=True)\
-                .execute()
+                .order('date_taken', desc=True)
+            response = self._execute(self._apply_scope(query), 'query')
             
             raw_results = response.data or []
             results: List[Dict[str, Any]] = []
@@ -220,17 +261,56 @@ class XrayService(BaseSupabaseService):
             logger.debug(f"Retrieved {len(results)} images for patient {patient_id}")
             return results
             
+        except SupabaseServiceError:
+            raise
         except Exception as e:
             logger.error(f"Failed to get patient images: {e}", exc_info=True)
             raise SupabaseServiceError(f"Failed to retrieve images: {str(e)}")
     
-    def get_image(self, image_id: str) -> Optional[Dict[str, Any]]:
-        """Get a single image by ID with signed URL."""
+    def get_images_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        patient_id: Optional[str] = None,
+        columns: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Get one keyset page of images with signed URLs.
+        
+        Args:
+            limit: Page size
+            cursor: Opaque cursor returned as next/previous by a previous page
+            patient_id: Optional patient filter (pages by date_taken instead of created_at)
+            columns: Optional column projection; images are only signed when image_url is selected
+            
+        Returns:
+            Dict with results, next and previous
+        """
+        if patient_id:
+            page = self.get_page(
+                limit, order_by='date_taken', cursor=cursor,
+                filters={'patient_id': patient_id}, columns=columns,
+            )
+        else:
+            page = self.get_page(limit, order_by='created_at', cursor=cursor, columns=columns)
+        
+        results: List[Dict[str, Any]] = []
+        for item in page['results']:
+            record: Dict[str, Any] = dict(item)
+            image_url = record.get('image_url')
+            if image_url and isinstance(image_url, str):
+                record['signed_url'] = self._get_signed_url(image_url)
+            results.append(record)
+        page['results'] = results
+        return page
+    
+    def get_image(self, image_id: str, columns: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """Get a single image by ID with signed URL (only signed when image_url is selected)."""
         try:
-            response = self.client.table(self.table_name)\
-                .select("*")\
-                .eq('id', image_id)\
-                .execute()
+            query = self.client.table(self.table_name)\
+                .select(self._select_columns(columns))\
+                .eq('id', image_id)
+            response = self._execute(self._apply_scope(query), 'get')
             
             if response.data and len(response.data) > 0:
                 item = response.data[0]
@@ -242,6 +322,8 @@ class XrayService(BaseSupabaseService):
                     return record
             return None
             
+        except SupabaseServiceError:
+            raise
         except Exception as e:
             logger.error(f"Failed to get image {image_id}: {e}")
             raise SupabaseServiceError(f"Failed to retrieve image: {str(e)}")
@@ -257,30 +339,26 @@ class XrayService(BaseSupabaseService):
             True if deletion was successful
         """
         try:
-            # First, get the record to find the storage path
-            record = self.get_image(image_id)
-            if not record:
+            # Delete from Database first; the deleted row carries the storage path,
+            # so no read (or URL signing) is needed beforehand
+            query = self.client.table(self.table_name)\
+                .delete()\
+                .eq('id', image_id)
+            response = self._execute(self._apply_scope(query), 'delete')
+            
+            if not response.data:
                 logger.warning(f"Image {image_id} not found for deletion")
                 return False
+            logger.info(f"Deleted xray record: {image_id}")
             
-            storage_path = record.get('image_url')
+            storage_path = response.data[0].get('image_url')
             
-            # Delete from Storage first
+            # Then delete from Storage
             if storage_path and isinstance(storage_path, str):
                 self._delete_from_storage(storage_path)
                 logger.info(f"Deleted image from storage: {storage_path}")
             
-            # Delete from Database
-            response = self.client.table(self.table_name)\
-                .delete()\
-                .eq('id', image_id)\
-                .execute()
-            
-            if response.data and len(response.data) > 0:
-                logger.info(f"Deleted xray record: {image_id}")
-                return True
-            
-            return False
+            return True
             
         except SupabaseServiceError:
             raise
@@ -301,10 +379,10 @@ class XrayService(BaseSupabaseService):
             }
             update_data['updated_at'] = datetime.utcnow().isoformat()
             
-            response = self.client.table(self.table_name)\
+            query = self.client.table(self.table_name)\
                 .update(update_data)\
-                .eq('id', image_id)\
-                .execute()
+                .eq('id', image_id)
+            response = self._execute(self._apply_scope(query), 'update')
             
             if response.data and len(response.data) > 0:
                 item = response.data[0]
@@ -316,6 +394,8 @@ class XrayService(BaseSupabaseService):
                     return record
             return None
             
+        except SupabaseServiceError:
+            raise
         except Exception as e:
             logger.error(f"Failed to update image {image_id}: {e}")
             raise SupabaseServiceError(f"Failed to update image: {str(e)}")
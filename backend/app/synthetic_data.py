@@ -0,0 +1,309 @@
+# Deterministic synthetic clinic data for load and scaling tests.
+# ClinicDatasetGenerator builds, per tenant, patients, years of appointments,
+# treatments linked to completed appointments, invoices linked to treatments,
+# inventory and x-ray metadata. Everything (ids, names, dates, amounts) comes
+# from a random.Random seeded with "<seed>:<tenant>" and from a fixed anchor
+# date, never from the clock, so the same options give the same rows on any
+# machine and each tenant's data is independent of how many tenants are generated.
+#
+#   generator = ClinicDatasetGenerator(seed=42, patients=5000, years=3)
+#   for table, rows in generator.generate('tenant-1').items(): ...
+#
+# Used by the generate_dataset and benchmark management commands.
+
+
+import json
+import math
+import os
+import random
+import uuid
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .models import APPOINTMENT_STATUS_CHOICES, GENDER_CHOICES
+
+# Insert order: every table only references tables before it
+TABLES = ('patients', 'inventory', 'appointments', 'treatments', 'invoices', 'xrays')
+
+DEFAULT_ANCHOR_DATE = date(2025, 1, 1)
+
+FIRST_NAMES = (
+    'Amina', 'Yanis', 'Lina', 'Karim', 'Sara', 'Walid', 'Nour', 'Adam', 'Ines', 'Rayan',
+    'Meriem', 'Sofiane', 'Yasmine', 'Anis', 'Salma', 'Mehdi', 'Lea', 'Omar', 'Nadia', 'Bilal',
+)
+LAST_NAMES = (
+    'Benali', 'Haddad', 'Mansouri', 'Saidi', 'Khelifi', 'Bouzid', 'Belkacem', 'Cherif', 'Hamidi',
+    'Rahmani', 'Meziane', 'Ziani', 'Amrani', 'Brahimi', 'Ould', 'Lounes', 'Taleb', 'Kaci',
+)
+REASONS = (
+    'Checkup', 'Cleaning', 'Toothache', 'Filling', 'Root canal', 'Extraction',
+    'Crown fitting', 'Orthodontic follow-up', 'Whitening', 'Emergency',
+)
+TREATMENTS = (
+    ('Scaling and polishing', 40), ('Composite filling', 80), ('Root canal treatment', 350),
+    ('Tooth extraction', 90), ('Ceramic crown', 600), ('Orthodontic adjustment', 120),
+    ('Teeth whitening', 250), ('Dental sealant', 45),
+)
+INVENTORY_ITEMS = (
+    'Nitrile gloves', 'Face masks', 'Composite resin', 'Dental floss', 'Anesthetic cartridges',
+    'Impression material', 'Suction tips', 'Cotton rolls', 'Disinfectant', 'Bite blocks',
+)
+XRAY_KINDS = (('Panoramic', 'image/png'), ('Bitewing', 'image/jpeg'), ('Periapical', 'image/jpeg'), ('CBCT', 'application/dicom'))
+APPOINTMENT_STATUSES = tuple(value for value, _ in APPOINTMENT_STATUS_CHOICES)
+
+# Smallest valid PNG, stored as the file behind generated x-rays
+PLACEHOLDER_IMAGE = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c63000100000500010d0a2db40000000049454e44ae426082'
+)
+
+
+class ClinicDatasetGenerator:
+    # Distribution knobs are plain constructor arguments:
+    # - patients: patients per tenant
+    # - years: history length before the anchor date
+    # - appointments_per_patient: Poisson mean; every patient has at least one
+    # - future_fraction: share of appointments scheduled after the anchor date
+    # - past_status_weights / future_status_weights: appointment status mix
+    # - treatment_rate: chance a completed appointment produced a treatment
+    # - invoice_rate / paid_rate: chance a treatment was invoiced / the invoice paid
+    # - xrays_per_patient: Poisson mean of x-ray images per patient
+    # - inventory_items: inventory rows per tenant
+    # - working_hours / slot_minutes: the appointment grid, one slot per appointment
+    #   (Sundays are closed)
+
+    def __init__(
+        self,
+        seed: int = 0,
+        patients: int = 1000,
+        years: float = 3,
+        appointments_per_patient: float = 4.0,
+        future_fraction: float = 0.1,
+        past_status_weights: Optional[Dict[str, float]] = None,
+        future_status_weights: Optional[Dict[str, float]] = None,
+        treatment_rate: float = 0.8,
+        invoice_rate: float = 0.9,
+        paid_rate: float = 0.75,
+        xrays_per_patient: float = 0.3,
+        inventory_items: int = 150,
+        working_hours: Tuple[int, int] = (8, 18),
+        slot_minutes: int = 30,
+        anchor_date: date = DEFAULT_ANCHOR_DATE,
+    ):
+        self.seed = seed
+        self.patients = patients
+        self.years = years
+        self.appointments_per_patient = appointments_per_patient
+        self.future_fraction = future_fraction
+        self.past_status_weights = past_status_weights or {'Completed': 0.8, 'Cancelled': 0.15, 'Confirmed': 0.05}
+        self.future_status_weights = future_status_weights or {'Pending': 0.6, 'Confirmed': 0.35, 'Cancelled': 0.05}
+        for weights in (self.past_status_weights, self.future_status_weights):
+            unknown = set(weights) - set(APPOINTMENT_STATUSES)
+            if unknown:
+                raise ValueError(f"Unknown appointment status: {', '.join(sorted(unknown))}")
+        self.treatment_rate = treatment_rate
+        self.invoice_rate = invoice_rate
+        self.paid_rate = paid_rate
+        self.xrays_per_patient = xrays_per_patient
+        self.inventory_items = inventory_items
+        self.working_hours = working_hours
+        self.slot_minutes = slot_minutes
+        self.anchor_date = anchor_date
+
+    # -- helpers -------------------------------------------------------------
+
+    @staticmethod
+    def _poisson(rng: random.Random, mean: float) -> int:
+        # Knuth's method; fine for the small means used here
+        if mean <= 0:
+            return 0
+        limit, count, product = math.exp(-mean), 0, rng.random()
+        while product > limit:
+            count += 1
+            product *= rng.random()
+        return count
+
+    @staticmethod
+    def _uuid(rng: random.Random) -> str:
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    @staticmethod
+    def _weighted(rng: random.Random, weights: Dict[str, float]) -> str:
+        return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+    def _slots_per_day(self) -> int:
+        start, end = self.working_hours
+        return (end - start) * 60 // self.slot_minutes
+
+    def _slot_time(self, slot: int) -> str:
+        minutes = self.working_hours[0] * 60 + slot * self.slot_minutes
+        return time(minutes // 60, minutes % 60).isoformat()
+
+    def _timestamp(self, day: date, rng: random.Random) -> str:
+        moment = datetime.combine(day, time(0)) + timedelta(seconds=rng.randint(8 * 3600, 18 * 3600))
+        return moment.isoformat()
+
+    def _working_days(self, total_appointments: int) -> Tuple[List[date], List[date]]:
+        # Past and future working days; the history is stretched when the
+        # requested volume would fill more than half the slots
+        past_needed = total_appointments * (1 - self.future_fraction)
+        future_needed = total_appointments * self.future_fraction
+        per_day = self._slots_per_day() * 0.5
+
+        def days(first: date, step: int, minimum: int, needed: float) -> List[date]:
+            result, day = [], first
+            while len(result) < max(minimum, math.ceil(needed / per_day)):
+                if day.weekday() != 6:
+                    result.append(day)
+                day += timedelta(days=step)
+            return result
+
+        past = days(self.anchor_date - timedelta(days=1), -1, int(self.years * 313), past_needed)
+        future = days(self.anchor_date, 1, 60, future_needed)
+        return past, future
+
+    # -- generation ----------------------------------------------------------
+
+    def generate(self, user_id: str) -> Dict[str, List[Dict[str, Any]]]:
+        # All rows of one tenant, keyed by table in insert order
+        rng = random.Random(f"{self.seed}:{user_id}")
+        rows: Dict[str, List[Dict[str, Any]]] = {table: [] for table in TABLES}
+        genders = [value for value, _ in GENDER_CHOICES]
+
+        patient_ids = []
+        for index in range(self.patients):
+            patient_id = self._uuid(rng)
+            patient_ids.append(patient_id)
+            first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            registered = self.anchor_date - timedelta(days=rng.randint(0, int(self.years * 365)))
+            stamp = self._timestamp(registered, rng)
+            rows['patients'].append({
+                'id': patient_id,
+                'user_id': user_id,
+                'first_name': first_name,
+                'last_name': last_name,
+                'gender': rng.choice(genders),
+                'birth_date': (self.anchor_date - timedelta(days=rng.randint(3 * 365, 90 * 365))).isoformat(),
+                'phone': f"0{rng.choice('567')}{rng.randint(10000000, 99999999)}",
+                'email': f"{first_name}.{last_name}{index}@example.com".lower() if rng.random() < 0.8 else None,
+                'address': f"{rng.randint(1, 200)} Rue {rng.choice(LAST_NAMES)}" if rng.random() < 0.6 else None,
+                'medical_history': rng.choice((None, None, 'Allergic to penicillin', 'Diabetes', 'Hypertension')),
+                'created_at': stamp,
+                'updated_at': stamp,
+            })
+
+        for index in range(self.inventory_items):
+            stamp = self._timestamp(self.anchor_date - timedelta(days=rng.randint(0, 365)), rng)
+            rows['inventory'].append({
+                'id': self._uuid(rng),
+                'user_id': user_id,
+                'item': f"{rng.choice(INVENTORY_ITEMS)} #{index + 1}",
+                'quantity': max(int(rng.expovariate(1 / 20)), 0),
+                'created_at': stamp,
+                'updated_at': stamp,
+            })
+
+        counts = [max(self._poisson(rng, self.appointments_per_patient), 1) for _ in patient_ids]
+        past_days, future_days = self._working_days(sum(counts))
+        slots_per_day = self._slots_per_day()
+        taken = set()
+        for patient_id, count in zip(patient_ids, counts):
+            for _ in range(count):
+                future = rng.random() < self.future_fraction
+                pool = future_days if future else past_days
+                # One appointment per slot and tenant, lasting the slot, so none overlap
+                while True:
+                    day, slot = rng.choice(pool), rng.randrange(slots_per_day)
+                    if (day, slot) not in taken:
+                        taken.add((day, slot))
+                        break
+                status = self._weighted(rng, self.future_status_weights if future else self.past_status_weights)
+                appointment_id = self._uuid(rng)
+                booked = self._timestamp(day - timedelta(days=rng.randint(1, 30)), rng)
+                rows['appointments'].append({
+                    'id': appointment_id,
+                    'user_id': user_id,
+                    'patient_id': patient_id,
+                    'date': day.isoformat(),
+                    'time': self._slot_time(slot),
+                    'duration_minutes': self.slot_minutes,
+                    'status': status,
+                    'reason': rng.choice(REASONS),
+                    'notes': None,
+                    'created_at': booked,
+                    'updated_at': booked,
+                })
+                if status != 'Completed' or rng.random() >= self.treatment_rate:
+                    continue
+
+                description, base_cost = rng.choice(TREATMENTS)
+                cost = f"{base_cost * rng.uniform(0.8, 1.3):.2f}"
+                treatment_id = self._uuid(rng)
+                done = self._timestamp(day, rng)
+                rows['treatments'].append({
+                    'id': treatment_id,
+                    'user_id': user_id,
+                    'patient_id': patient_id,
+                    'appointment_id': appointment_id,
+                    'description': description,
+                    'cost': cost,
+                    'date': day.isoformat(),
+                    'created_at': done,
+                    'updated_at': done,
+                })
+                if rng.random() < self.invoice_rate:
+                    rows['invoices'].append({
+                        'id': self._uuid(rng),
+                        'user_id': user_id,
+                        'patient_id': patient_id,
+                        'treatment_id': treatment_id,
+                        'amount': cost,
+                        'status': 'Paid' if rng.random() < self.paid_rate else 'Unpaid',
+                        'issued_at': done,
+                        'updated_at': done,
+                    })
+
+        for patient_id in patient_ids:
+            for _ in range(self._poisson(rng, self.xrays_per_patient)):
+                kind, content_type = rng.choice(XRAY_KINDS)
+                taken_on = rng.choice(past_days)
+                image_id = self._uuid(rng)
+                extension = content_type.split('/')[-1].replace('jpeg', 'jpg')
+                image_name = f"{kind.lower()}_{taken_on.isoformat()}.{extension}"
+                stamp = self._timestamp(taken_on, rng)
+                rows['xrays'].append({
+                    'id': image_id,
+                    'user_id': user_id,
+                    'patient_id': patient_id,
+                    # Same layout as XrayService._get_storage_path
+                    'image_url': f"{patient_id}/{image_id[:8]}_{image_name}",
+                    'image_name': image_name,
+                    'image_type': content_type,
+                    'description': f"{kind} x-ray",
+                    'date_taken': taken_on.isoformat(),
+                    'created_at': stamp,
+                    'updated_at': stamp,
+                })
+
+        return rows
+
+
+def write_ndjson(directory: str, tables: Dict[str, Iterable[Dict[str, Any]]], append: bool = False) -> Dict[str, str]:
+    # One <table>.ndjson file per table; returns the paths written
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for table, table_rows in tables.items():
+        path = os.path.join(directory, f"{table}.ndjson")
+        with open(path, 'a' if append else 'w') as handle:
+            for row in table_rows:
+                handle.write(json.dumps(row, sort_keys=True))
+                handle.write('\n')
+        paths[table] = path
+    return paths
+
+
+def read_ndjson(path: str) -> Iterable[Dict[str, Any]]:
+    with open(path) as handle:
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,63 @@
+from django.test import SimpleTestCase
+from rest_framework.test import APIClient
+
+from app_backend.fake_supabase import FakeStore, get_fake_store, reset_fake_store
+from app_backend.supabase_utils import reset_supabase_client
+from app.supabase_service import (
+    BaseSupabaseService,
+    reset_autocomplete_indexes,
+    reset_breakers,
+    reset_metrics,
+    reset_schedules,
+    set_record_cache,
+)
+
+PATIENT = {
+    'first_name': 'Ann',
+    'last_name': 'Smith',
+    'gender': 'F',
+    'birth_date': '1990-01-01',
+    'phone': '0550000000',
+}
+
+
+class TestUser:
+    # What the viewsets read from request.user
+
+    def __init__(self, user_id):
+        self.id = user_id
+        self.is_authenticated = True
+
+
+def api_client(user_id):
+    client = APIClient()
+    client.force_authenticate(TestUser(user_id))
+    return client
+
+
+class FakeBackendTestCase(SimpleTestCase):
+    # Runs against app_backend/test_settings.py (SUPABASE_BACKEND=fake) with a
+    # fresh store, client and in-process state per test
+
+    def setUp(self):
+        reset_fake_store(FakeStore())
+        reset_supabase_client()
+        BaseSupabaseService.reset_client()
+        reset_breakers()
+        reset_metrics()
+        reset_autocomplete_indexes()
+        reset_schedules()
+        set_record_cache(None)
+        self.addCleanup(set_record_cache, None)
+        self.store = get_fake_store()
+        self.alice = api_client('alice')
+        self.bob = api_client('bob')
+
+    def create_patient(self, client, **fields):
+        response = client.post('/api/patients/', {**PATIENT, **fields}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.data
+
+    def create_appointment(self, client, day, at, **fields):
+        body = {'patient_id': 'p1', 'date': day, 'time': at, 'reason': 'Checkup', **fields}
+        return client.post('/api/appointments/', body, format='json')
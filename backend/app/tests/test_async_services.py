@@ -0,0 +1,65 @@
+import asyncio
+from datetime import date
+
+from app.supabase_service import (
+    AppointmentConflictError,
+    AsyncBaseSupabaseService,
+    get_async_appointment_service,
+    get_async_patient_service,
+    patient_service,
+)
+from app_backend.fake_supabase import create_async_fake_client
+
+from .base import PATIENT, FakeBackendTestCase
+
+
+class AsyncServiceTests(FakeBackendTestCase):
+
+    def setUp(self):
+        super().setUp()
+        AsyncBaseSupabaseService._async_client = create_async_fake_client(self.store)
+        self.addCleanup(setattr, AsyncBaseSupabaseService, '_async_client', None)
+        self.patients = get_async_patient_service().for_user('alice')
+        self.appointments = get_async_appointment_service().for_user('alice')
+
+    def test_crud_round_trip(self):
+        async def scenario():
+            patient = await self.patients.create_patient(dict(PATIENT))
+            fetched = await self.patients.get_patient(patient['id'])
+            updated = await self.patients.update_patient(patient['id'], {'phone': '0551111111'})
+            page = await self.patients.get_patients_page(10)
+            deleted = await self.patients.delete_patient(patient['id'])
+            return patient, fetched, updated, page, deleted, await self.patients.get_patient(patient['id'])
+
+        patient, fetched, updated, page, deleted, gone = asyncio.run(scenario())
+        self.assertEqual(fetched['id'], patient['id'])
+        self.assertEqual(updated['phone'], '0551111111')
+        self.assertEqual([row['id'] for row in page['results']], [patient['id']])
+        self.assertTrue(deleted)
+        self.assertIsNone(gone)
+
+    def test_sync_and_async_services_share_rows(self):
+        patient = patient_service.for_user('alice').create_patient(dict(PATIENT))
+        self.assertEqual(asyncio.run(self.patients.get_patient(patient['id']))['id'], patient['id'])
+        self.assertIsNone(asyncio.run(get_async_patient_service().for_user('bob').get_patient(patient['id'])))
+
+    def test_bulk_writes(self):
+        created = asyncio.run(self.patients.create_many([dict(PATIENT), dict(PATIENT, first_name='Ben')]))
+        self.assertEqual([row['first_name'] for row in created], ['Ann', 'Ben'])
+        deleted = asyncio.run(self.patients.delete_many(ids=[row['id'] for row in created]))
+        self.assertEqual(len(deleted), 2)
+
+    def test_schedule_and_conflicts(self):
+        booking = {'patient_id': 'p1', 'date': '2031-03-03', 'time': '09:00', 'reason': 'Checkup', 'status': 'Pending'}
+
+        async def scenario():
+            await self.appointments.create_appointment(dict(booking))
+            conflict = await self.appointments.find_conflict('2031-03-03', '09:15')
+            counts = await self.appointments.get_calendar_counts(date(2031, 3, 3), date(2031, 3, 3))
+            with self.assertRaises(AppointmentConflictError):
+                await self.appointments.create_appointment(dict(booking))
+            return conflict, counts
+
+        conflict, counts = asyncio.run(scenario())
+        self.assertIsNotNone(conflict)
+        self.assertEqual(sum(counts[0]), 1)
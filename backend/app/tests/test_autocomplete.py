@@ -0,0 +1,25 @@
+from django.test import override_settings
+
+from app.supabase_service import get_autocomplete_registry
+
+from .base import FakeBackendTestCase
+
+
+class AutocompleteTests(FakeBackendTestCase):
+
+    def lookup(self, query):
+        return [row['first_name'] for row in self.alice.get('/api/patients/autocomplete/', {'q': query}).data['results']]
+
+    def test_answers_from_the_database_by_default(self):
+        self.create_patient(self.alice, first_name='Zora')
+        self.assertEqual(self.lookup('zor'), ['Zora'])
+        self.assertIsNone(get_autocomplete_registry().peek('alice'))
+
+    @override_settings(PATIENT_AUTOCOMPLETE_INDEX=True)
+    def test_index_follows_writes(self):
+        patient_id = self.create_patient(self.alice, first_name='Zora')['id']
+        self.assertEqual(self.lookup('zor'), ['Zora'])
+        self.assertIsNotNone(get_autocomplete_registry().peek('alice'))
+        self.alice.patch(f'/api/patients/{patient_id}/', {'first_name': 'Mila'}, format='json')
+        self.assertEqual(self.lookup('zor'), [])
+        self.assertEqual(self.lookup('mil'), ['Mila'])
@@ -0,0 +1,42 @@
+from django.test import override_settings
+
+from app.views.appointments_viewset import AppointmentViewSet
+
+from .base import PATIENT, FakeBackendTestCase
+
+
+@override_settings(SUPABASE_BULK_CHUNK_SIZE=2, APPOINTMENT_CONFLICT_PRECHECK=False)
+class BulkCreateTests(FakeBackendTestCase):
+
+    def test_results_in_input_order(self):
+        items = [{**PATIENT, 'first_name': f'P{i}'} for i in range(3)] + [{'first_name': 'Incomplete'}]
+        response = self.alice.post('/api/patients/bulk/', {'create': items}, format='json')
+        self.assertEqual(response.status_code, 200)
+        results = response.data['create']
+        self.assertEqual([result['index'] for result in results], [0, 1, 2, 3])
+        self.assertEqual([result['status'] for result in results], [201, 201, 201, 400])
+        self.assertEqual(self.alice.get('/api/patients/').data['count'], 3)
+
+    def test_partial_failure_reports_each_item(self):
+        # Skip the serializer's slot check so the conflict reaches the database
+        original = AppointmentViewSet.get_bulk_serializer_context
+        AppointmentViewSet.get_bulk_serializer_context = lambda self, service: {}
+        self.addCleanup(setattr, AppointmentViewSet, 'get_bulk_serializer_context', original)
+        self.assertEqual(self.create_appointment(self.alice, '2032-01-01', '10:00').status_code, 201)
+        items = [
+            {'patient_id': 'p1', 'date': '2032-01-02', 'time': '09:00', 'reason': 'r'},
+            {'patient_id': 'p1', 'date': '2032-01-02', 'time': '10:00', 'reason': 'r'},
+            # Same chunk: one taken slot, one innocent row
+            {'patient_id': 'p1', 'date': '2032-01-01', 'time': '10:00', 'reason': 'r'},
+            {'patient_id': 'p1', 'date': '2032-01-03', 'time': '10:00', 'reason': 'r'},
+        ]
+        response = self.alice.post('/api/appointments/bulk/', {'create': items}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['status'] for result in response.data['create']], [201, 201, 400, 201])
+        self.assertEqual(self.alice.get('/api/appointments/').data['count'], 4)
+
+    def test_bulk_delete_is_scoped(self):
+        patient_id = self.create_patient(self.alice)['id']
+        response = self.bob.post('/api/patients/bulk/', {'delete': {'ids': [patient_id]}}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.alice.get('/api/patients/').data['count'], 1)
@@ -0,0 +1,75 @@
+from django.test import override_settings
+
+from app.supabase_service import LRURecordCache, RecordCache, patient_service, set_record_cache
+from app.supabase_service.cache import limit_ttl
+
+from .base import PATIENT, FakeBackendTestCase
+
+
+class RecordCacheBackendTests(FakeBackendTestCase):
+
+    def test_incomplete_backend_fails_when_instantiated(self):
+        class NoClear(RecordCache):
+            def _get(self, key):
+                return None
+
+            def _set(self, key, row, ttl):
+                pass
+
+            def _delete(self, key):
+                pass
+
+        with self.assertRaises(TypeError):
+            NoClear()
+
+    def test_rows_are_copied(self):
+        cache = LRURecordCache()
+        row = {'id': '1', 'name': 'a'}
+        cache.set(('patients', '1', None), row, 60)
+        row['name'] = 'b'
+        cached = cache.get(('patients', '1', None))
+        cached['name'] = 'c'
+        self.assertEqual(cache.get(('patients', '1', None))['name'], 'a')
+
+    def test_eviction_beyond_max_entries(self):
+        cache = LRURecordCache(max_entries=2)
+        for i in range(3):
+            cache.set(('patients', str(i), None), {'id': str(i)}, 60)
+        self.assertIsNone(cache.get(('patients', '0', None)))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    @override_settings(SUPABASE_RECORD_CACHE_LOCAL_MAX_TTL=5)
+    def test_local_cache_ttl_is_capped(self):
+        self.assertEqual(limit_ttl(LRURecordCache(), 600), 5)
+
+
+class CacheInvalidationTests(FakeBackendTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache = LRURecordCache()
+        set_record_cache(self.cache)
+
+    def test_update_invalidates_cached_row(self):
+        patient_id = self.create_patient(self.alice)['id']
+        self.assertEqual(self.alice.get(f'/api/patients/{patient_id}/').data['phone'], PATIENT['phone'])
+        self.alice.patch(f'/api/patients/{patient_id}/', {'phone': '0551111111'}, format='json')
+        self.assertEqual(self.alice.get(f'/api/patients/{patient_id}/').data['phone'], '0551111111')
+
+    def test_delete_invalidates_cached_row(self):
+        patient_id = self.create_patient(self.alice)['id']
+        self.alice.get(f'/api/patients/{patient_id}/')
+        self.assertEqual(self.alice.delete(f'/api/patients/{patient_id}/').status_code, 204)
+        self.assertEqual(self.alice.get(f'/api/patients/{patient_id}/').status_code, 404)
+
+    def test_repeated_reads_hit_the_cache(self):
+        patient_id = self.create_patient(self.alice)['id']
+        service = patient_service.for_user('alice')
+        service.get(patient_id)
+        service.get(patient_id)
+        self.assertGreaterEqual(self.cache.stats()['hits'], 1)
+
+    def test_cached_row_is_not_served_to_another_tenant(self):
+        patient_id = self.create_patient(self.alice)['id']
+        self.alice.get(f'/api/patients/{patient_id}/')
+        self.assertEqual(self.bob.get(f'/api/patients/{patient_id}/').status_code, 403)
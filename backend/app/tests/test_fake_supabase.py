@@ -0,0 +1,43 @@
+from app_backend.fake_supabase import APIError, FakeStore, create_fake_client
+from app_backend.supabase_utils import uses_fake_backend
+
+from .base import FakeBackendTestCase
+
+
+class FakeSupabaseTests(FakeBackendTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = create_fake_client(self.store)
+
+    def test_tests_run_on_the_fake_backend(self):
+        self.assertTrue(uses_fake_backend())
+
+    def test_filters_order_and_count(self):
+        table = self.client.table('items')
+        table.insert([{'id': str(i), 'n': i, 'tag': None if i % 2 else 'x'} for i in range(5)]).execute()
+        response = (
+            self.client.table('items').select('id', count='exact')
+            .gte('n', 1).or_('tag.is.null,n.eq.4').order('n', desc=True).execute()
+        )
+        self.assertEqual([row['id'] for row in response.data], ['4', '3', '1'])
+        self.assertEqual(response.count, 3)
+
+    def test_partial_unique_constraint(self):
+        row = {'user_id': 'u', 'date': '2031-01-01', 'time': '10:00:00', 'status': 'Pending'}
+        self.client.table('appointments').insert({**row, 'id': 'a'}).execute()
+        with self.assertRaises(APIError) as raised:
+            self.client.table('appointments').insert({**row, 'id': 'b'}).execute()
+        self.assertEqual(raised.exception.code, '23505')
+        # Cancelled rows are outside the constraint
+        self.client.table('appointments').insert({**row, 'id': 'c', 'status': 'Cancelled'}).execute()
+
+    def test_store_without_constraints(self):
+        client = create_fake_client(FakeStore(unique={}))
+        row = {'user_id': 'u', 'date': '2031-01-01', 'time': '10:00:00', 'status': 'Pending'}
+        client.table('appointments').insert([{**row, 'id': 'a'}, {**row, 'id': 'b'}]).execute()
+
+    def test_rpc_is_missing(self):
+        with self.assertRaises(APIError) as raised:
+            self.client.rpc('search_patients', {}).execute()
+        self.assertEqual(raised.exception.code, 'PGRST202')
@@ -0,0 +1,32 @@
+from app.supabase_service import identity_map_scope, patient_service
+
+from .base import PATIENT, FakeBackendTestCase
+
+
+class IdentityMapTests(FakeBackendTestCase):
+
+    def test_writes_in_the_same_request_are_seen(self):
+        patient_id = self.create_patient(self.alice)['id']
+        service = patient_service.for_user('alice')
+        with identity_map_scope() as identity_map:
+            self.assertEqual(service.get(patient_id)['phone'], PATIENT['phone'])
+            self.assertIn(service._cache_key(patient_id), identity_map)
+            service.update(patient_id, {'phone': '0552222222'})
+            self.assertEqual(service.get(patient_id)['phone'], '0552222222')
+            service.delete(patient_id)
+            self.assertIsNone(service.get(patient_id))
+
+    def test_repeated_reads_are_served_from_the_map(self):
+        patient_id = self.create_patient(self.alice)['id']
+        service = patient_service.for_user('alice')
+        with identity_map_scope():
+            service.get(patient_id)
+            requests = self.store.requests
+            service.get(patient_id)
+            self.assertEqual(self.store.requests, requests)
+
+    def test_load_many_returns_known_and_missing(self):
+        first = self.create_patient(self.alice)['id']
+        second = self.create_patient(self.alice, first_name='Ben')['id']
+        rows = patient_service.for_user('alice').load_many([first, second, 'missing'])
+        self.assertEqual(set(rows), {first, second})
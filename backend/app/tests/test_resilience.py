@@ -0,0 +1,106 @@
+import time
+
+import httpx
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from app.supabase_service import (
+    SupabaseConnectionError,
+    SupabaseDeadlineExceededError,
+    deadline_scope,
+    get_breaker,
+)
+from app.supabase_service import resilience
+
+from .base import FakeBackendTestCase
+
+
+@override_settings(
+    SUPABASE_BREAKER_FAILURE_THRESHOLD=2,
+    SUPABASE_BREAKER_RESET_TIMEOUT=0,
+    SUPABASE_READ_RETRIES=0,
+)
+class CircuitBreakerTests(FakeBackendTestCase):
+
+    @staticmethod
+    def fail():
+        raise httpx.ConnectError('connection refused')
+
+    def trip(self, name):
+        for _ in range(2):
+            with self.assertRaises(httpx.ConnectError):
+                resilience.call_with_resilience(name, 'get', self.fail)
+
+    def test_opens_after_threshold_and_closes_on_success(self):
+        self.trip('patients')
+        self.assertEqual(get_breaker('patients').state, 'open')
+        # Reset timeout 0: the next call is the half-open probe
+        self.assertEqual(resilience.call_with_resilience('patients', 'get', lambda: 'ok'), 'ok')
+        self.assertEqual(get_breaker('patients').state, 'closed')
+
+    def test_failed_probe_reopens(self):
+        self.trip('patients')
+        with self.assertRaises(httpx.ConnectError):
+            resilience.call_with_resilience('patients', 'get', self.fail)
+        self.assertEqual(get_breaker('patients').state, 'open')
+        self.assertEqual(get_breaker('patients').times_opened, 2)
+
+    @override_settings(SUPABASE_BREAKER_RESET_TIMEOUT=60)
+    def test_open_circuit_rejects_without_calling(self):
+        self.trip('patients')
+        calls = []
+        with self.assertRaises(SupabaseConnectionError):
+            resilience.call_with_resilience('patients', 'get', lambda: calls.append(1))
+        self.assertEqual(calls, [])
+
+    def test_probe_cut_short_by_deadline_is_released(self):
+        self.trip('patients')
+
+        def slow_failure():
+            time.sleep(0.05)
+            raise httpx.ReadTimeout('timed out')
+
+        with deadline_scope(0.01):
+            with self.assertRaises(SupabaseDeadlineExceededError):
+                resilience.call_with_resilience('patients', 'get', slow_failure)
+        # Still half-open, and the next call may probe
+        self.assertEqual(resilience.call_with_resilience('patients', 'get', lambda: 'ok'), 'ok')
+
+    def test_probe_interrupted_by_exception_is_released(self):
+        self.trip('patients')
+
+        def interrupted():
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            resilience.call_with_resilience('patients', 'get', interrupted)
+        self.assertEqual(resilience.call_with_resilience('patients', 'get', lambda: 'ok'), 'ok')
+
+
+@override_settings(SUPABASE_BREAKER_FAILURE_THRESHOLD=1, SUPABASE_BREAKER_RESET_TIMEOUT=60, SUPABASE_READ_RETRIES=0)
+class HealthCheckTests(FakeBackendTestCase):
+
+    INTERNALS = ('record_cache', 'http_pool', 'circuit_breakers')
+
+    def deep_check(self, **headers):
+        return APIClient().get('/api/health/', {'deep': 'true'}, **headers)
+
+    def test_internals_hidden_without_token(self):
+        response = self.deep_check()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('supabase', response.data)
+        for key in self.INTERNALS:
+            self.assertNotIn(key, response.data)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_internals_need_the_metrics_token(self):
+        for key in self.INTERNALS:
+            self.assertNotIn(key, self.deep_check(HTTP_AUTHORIZATION='Bearer wrong').data)
+            self.assertIn(key, self.deep_check(HTTP_AUTHORIZATION='Bearer secret').data)
+
+    def test_open_breaker_degrades_status_without_details(self):
+        with self.assertRaises(httpx.ConnectError):
+            resilience.call_with_resilience('patients', 'get', CircuitBreakerTests.fail)
+        response = self.deep_check()
+        self.assertEqual(response.data['status'], 'degraded')
+        self.assertNotIn('circuit_breakers', response.data)
@@ -0,0 +1,129 @@
+from datetime import date, datetime
+
+from django.test import override_settings
+
+from app.supabase_service import appointment_service, appointments
+
+from .base import FakeBackendTestCase
+
+
+class AppointmentConflictTests(FakeBackendTestCase):
+
+    def test_overlap_is_rejected(self):
+        self.assertEqual(self.create_appointment(self.alice, '2031-03-03', '10:00', duration_minutes=60).status_code, 201)
+        response = self.create_appointment(self.alice, '2031-03-03', '10:30')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('non_field_errors', response.data)
+        # Back to back and other tenants are fine
+        self.assertEqual(self.create_appointment(self.alice, '2031-03-03', '11:00').status_code, 201)
+        self.assertEqual(self.create_appointment(self.bob, '2031-03-03', '10:30').status_code, 201)
+
+    def test_cancelled_appointment_frees_its_slot(self):
+        appointment_id = self.create_appointment(self.alice, '2031-03-03', '10:00').data['id']
+        self.alice.patch(f'/api/appointments/{appointment_id}/', {'status': 'Cancelled'}, format='json')
+        self.assertEqual(self.create_appointment(self.alice, '2031-03-03', '10:00').status_code, 201)
+
+    def test_slot_freed_by_another_worker_can_be_booked(self):
+        appointment_id = self.create_appointment(self.alice, '2031-03-03', '10:00').data['id']
+        # Cancelled behind this worker's back: its loaded day still shows the booking
+        for row in self.store.rows('appointments'):
+            if row['id'] == appointment_id:
+                row['status'] = 'Cancelled'
+        self.assertEqual(self.create_appointment(self.alice, '2031-03-03', '10:00').status_code, 201)
+
+    def test_slot_taken_by_another_worker_is_rejected(self):
+        self.assertEqual(self.create_appointment(self.alice, '2031-03-03', '09:00').status_code, 201)
+        # Booked behind this worker's back: the write itself is refused
+        self.store.rows('appointments').append({
+            'id': 'other-worker', 'user_id': 'alice', 'patient_id': 'p1', 'date': '2031-03-03',
+            'time': '10:00:00', 'status': 'Pending', 'reason': 'Checkup',
+        })
+        self.assertEqual(self.create_appointment(self.alice, '2031-03-03', '10:00').status_code, 400)
+
+
+@override_settings(
+    APPOINTMENT_WORKING_HOURS={'mon': ['09:00-11:00']},
+    APPOINTMENT_DEFAULT_DURATION=30,
+    APPOINTMENT_SLOT_STEP=30,
+)
+class FreeSlotTests(FakeBackendTestCase):
+
+    def test_free_slots(self):
+        # 2031-03-03 is a Monday
+        self.create_appointment(self.alice, '2031-03-03', '09:30')
+        service = appointment_service.for_user('alice')
+        days = service.find_free_slots(date(2031, 3, 3), date(2031, 3, 4))
+        self.assertEqual(days, [
+            {'date': '2031-03-03', 'slots': ['09:00', '10:00', '10:30']},
+            {'date': '2031-03-04', 'slots': []},
+        ])
+        # A booking through the API shows up without waiting for a reload
+        self.create_appointment(self.alice, '2031-03-03', '10:00')
+        days = service.find_free_slots(date(2031, 3, 3), date(2031, 3, 3), not_before=datetime(2031, 3, 3, 9, 15))
+        self.assertEqual(days, [{'date': '2031-03-03', 'slots': ['10:30']}])
+
+    @override_settings(APPOINTMENT_SCHEDULE_TTL=0)
+    def test_other_workers_bookings_without_cache(self):
+        service = appointment_service.for_user('alice')
+        service.find_free_slots(date(2031, 3, 3), date(2031, 3, 3))
+        self.store.rows('appointments').append({
+            'id': 'other-worker', 'user_id': 'alice', 'patient_id': 'p1', 'date': '2031-03-03',
+            'time': '09:00:00', 'status': 'Pending', 'reason': 'Checkup',
+        })
+        days = service.find_free_slots(date(2031, 3, 3), date(2031, 3, 3))
+        self.assertEqual(days, [{'date': '2031-03-03', 'slots': ['09:30', '10:00', '10:30']}])
+
+
+class CalendarTests(FakeBackendTestCase):
+
+    def test_calendar_counts(self):
+        self.create_appointment(self.alice, '2031-03-03', '09:00')
+        self.create_appointment(self.alice, '2031-03-03', '10:00', status='Confirmed')
+        self.create_appointment(self.alice, '2031-03-31', '10:00')
+        self.create_appointment(self.bob, '2031-03-03', '09:00')
+        response = self.alice.get('/api/appointments/calendar/', {'month': '2031-03'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['from'], '2031-03-01')
+        self.assertEqual(response.data['to'], '2031-03-31')
+        self.assertEqual(response.data['days'][2], [1, 1, 0, 0])
+        self.assertEqual(response.data['days'][30], [1, 0, 0, 0])
+        self.assertEqual(response.data['totals'], [2, 1, 0, 0])
+        # Writes invalidate the cached month
+        self.create_appointment(self.alice, '2031-03-04', '09:00')
+        response = self.alice.get('/api/appointments/calendar/', {'month': '2031-03'})
+        self.assertEqual(response.data['totals'], [3, 1, 0, 0])
+
+    def test_calendar_week_spans_months(self):
+        self.create_appointment(self.alice, '2031-03-31', '10:00')
+        self.create_appointment(self.alice, '2031-04-01', '10:00')
+        response = self.alice.get('/api/appointments/calendar/', {'week': '2031-04-02'})
+        self.assertEqual(response.data['from'], '2031-03-31')
+        self.assertEqual(len(response.data['days']), 7)
+        self.assertEqual(response.data['totals'], [2, 0, 0, 0])
+
+
+class MissingDurationColumnTests(FakeBackendTestCase):
+    # Before sql/appointment_slots.sql has run
+
+    def setUp(self):
+        super().setUp()
+        self.store.drop_column('appointments', 'duration_minutes')
+        self.addCleanup(appointments._missing_columns.clear)
+
+    def test_appointments_last_the_default_duration(self):
+        response = self.create_appointment(self.alice, '2031-03-03', '10:00', duration_minutes=90)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.create_appointment(self.alice, '2031-03-03', '10:15').status_code, 400)
+        self.assertEqual(self.create_appointment(self.alice, '2031-03-03', '10:30').status_code, 201)
+        patched = self.alice.patch(f"/api/appointments/{response.data['id']}/", {'time': '11:00'}, format='json')
+        self.assertEqual(patched.status_code, 200)
+
+    def test_schedule_reads_fall_back(self):
+        self.store.rows('appointments').append({
+            'id': 'a1', 'user_id': 'alice', 'patient_id': 'p1', 'date': '2031-03-03',
+            'time': '10:00:00', 'status': 'Pending', 'reason': 'Checkup',
+        })
+        response = self.alice.get('/api/appointments/free_slots/', {'from': '2031-03-03', 'to': '2031-03-03'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('10:00', response.data['days'][0]['slots'])
+        self.assertEqual(self.alice.get('/api/appointments/', {'fields': 'id,duration_minutes'}).status_code, 200)
@@ -0,0 +1,37 @@
+from .base import PATIENT, FakeBackendTestCase
+
+
+class TenantScopingTests(FakeBackendTestCase):
+
+    def test_lists_only_own_rows(self):
+        self.create_patient(self.alice)
+        self.create_patient(self.bob, first_name='Bob')
+        self.assertEqual(self.alice.get('/api/patients/').data['count'], 1)
+        self.assertEqual(self.bob.get('/api/patients/').data['results'][0]['first_name'], 'Bob')
+
+    def test_other_tenant_is_forbidden(self):
+        patient_id = self.create_patient(self.alice)['id']
+        self.assertEqual(self.bob.get(f'/api/patients/{patient_id}/').status_code, 403)
+        self.assertEqual(self.bob.patch(f'/api/patients/{patient_id}/', {'phone': '1'}, format='json').status_code, 403)
+        self.assertEqual(self.bob.delete(f'/api/patients/{patient_id}/').status_code, 403)
+        self.assertEqual(self.alice.get(f'/api/patients/{patient_id}/').data['phone'], PATIENT['phone'])
+
+    def test_unknown_id_is_not_found(self):
+        self.assertEqual(self.alice.get('/api/patients/missing/').status_code, 404)
+
+    def test_other_entities_are_scoped(self):
+        for resource, body in (
+            ('treatments', {'patient_id': 'p1', 'description': 'Filling', 'cost': '80.00', 'date': '2031-01-01'}),
+            ('invoices', {'patient_id': 'p1', 'treatment_id': 't1', 'amount': '80.00'}),
+            ('inventory', {'item': 'Gloves', 'quantity': 5}),
+        ):
+            record_id = self.alice.post(f'/api/{resource}/', body, format='json').data['id']
+            self.assertEqual(self.bob.get(f'/api/{resource}/').data['count'], 0)
+            self.assertEqual(self.bob.get(f'/api/{resource}/{record_id}/').status_code, 403)
+            self.assertEqual(self.bob.delete(f'/api/{resource}/{record_id}/').status_code, 403)
+            self.assertEqual(self.alice.get(f'/api/{resource}/').data['count'], 1)
+
+    def test_search_is_scoped(self):
+        self.create_patient(self.alice)
+        self.assertEqual(self.alice.get('/api/patients/search/', {'q': 'ann'}).data['count'], 1)
+        self.assertEqual(self.bob.get('/api/patients/search/', {'q': 'ann'}).data['count'], 0)
@@ -0,0 +1,27 @@
+from .base import FakeBackendTestCase
+
+
+class PatientSearchTests(FakeBackendTestCase):
+
+    def search(self, **params):
+        return self.alice.get('/api/patients/search/', params)
+
+    def test_cursors_page_through_matches(self):
+        for i in range(5):
+            self.create_patient(self.alice, last_name=f'Smith{i}')
+        first = self.search(q='smith', limit=2).data
+        self.assertIsNone(first['previous'])
+        second = self.search(q='smith', limit=2, cursor=first['next']).data
+        third = self.search(q='smith', limit=2, cursor=second['next']).data
+        self.assertIsNone(third['next'])
+        pages = [first, second, third]
+        self.assertEqual(len({row['id'] for page in pages for row in page['results']}), 5)
+        back = self.search(q='smith', limit=2, cursor=second['previous']).data
+        self.assertEqual(back['results'], first['results'])
+
+    def test_cursor_belongs_to_its_query(self):
+        for i in range(3):
+            self.create_patient(self.alice, last_name=f'Smith{i}')
+        cursor = self.search(q='smith', limit=2).data['next']
+        self.assertEqual(self.search(q='ann', cursor=cursor).status_code, 400)
+        self.assertEqual(self.search(q='smith', cursor='garbage').status_code, 400)
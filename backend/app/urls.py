@@ -1,7 +1,10 @@
+import hmac
 import logging
-from django.urls import path, include
+from django.conf import settings
+from django.http import HttpResponse
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from .views import (
@@ -17,7 +20,18 @@ from .views.auth_viewset import AuthViewSet
 logger = logging.getLogger(__name__)
 
 
+def _has_metrics_token(request) -> bool:
+    # True for requests bearing METRICS_TOKEN ("Authorization: Bearer <token>"); never while it is empty
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if not token:
+        return False
+    scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+    return scheme.lower() == 'bearer' and hmac.compare_digest(credentials.strip().encode(), token.encode())
+
+
 @api_view(['GET'])
+# No JWT authentication: the metrics bearer token is not a user token
+@authentication_classes([])
 @permission_classes([AllowAny])
 def health_check(request):
 
@@ -63,10 +77,39 @@ def health_check(request):
                 'error': 'supabase package not installed',
             }
             response_data['status'] = 'degraded'
+        
+        from .supabase_service import get_breaker_states
+        breakers = get_breaker_states()
+        if any(breaker['state'] != 'closed' for breaker in breakers.values()):
+            response_data['status'] = 'degraded'
+        
+        # Cache, pool and breaker internals only for the metrics scraper's token
+        if _has_metrics_token(request):
+            from .supabase_service import get_record_cache
+            record_cache = get_record_cache()
+            response_data['record_cache'] = record_cache.stats() if record_cache else {'backend': None}
+            
+            from app_backend.supabase_utils import get_http_pool_stats
+            response_data['http_pool'] = get_http_pool_stats()
+            
+            response_data['circuit_breakers'] = breakers
     
     return Response(response_data)
 
 
+def metrics(request):
+    # Prometheus scrape endpoint for this process's Supabase and request metrics.
+    # Off unless METRICS_TOKEN is set, and then only for requests bearing it.
+    if not getattr(settings, 'METRICS_TOKEN', ''):
+        return HttpResponse(status=404)
+    if not _has_metrics_token(request):
+        response = HttpResponse('Unauthorized', status=401, content_type='text/plain')
+        response['WWW-Authenticate'] = 'Bearer'
+        return response
+    from .supabase_service.metrics import render_metrics
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 router = DefaultRouter()
 # Register viewsets with explicit basenames since we're using ViewSet (not ModelViewSet)
 router.register(r'auth', AuthViewSet, basename='auth')
@@ -77,7 +120,28 @@ router.register(r'invoices', InvoiceViewSet, basename='invoice')
 router.register(r'inventory', InventoryViewSet, basename='inventory')
 router.register(r'xrays', XraysViewSet, basename='xray')
 
+def _with_async_reads(patterns):
+    # Swap the router's list/detail routes for the async views; the async views
+    # hand every non-GET method back to the same viewset
+    from .views.async_views import ASYNC_READ_VIEWS
+    
+    swapped = []
+    for pattern in patterns:
+        basename, _, kind = (pattern.name or '').rpartition('-')
+        view_class = ASYNC_READ_VIEWS.get(basename)
+        if view_class is not None and kind in ('list', 'detail'):
+            view = view_class.as_view(detail=(kind == 'detail'))
+            pattern = re_path(str(pattern.pattern), view, name=pattern.name)
+        swapped.append(pattern)
+    return swapped
+
+
+router_urls = router.urls
+if getattr(settings, 'ASYNC_API_VIEWS', False):
+    router_urls = _with_async_reads(router_urls)
+
 urlpatterns = [
     path('health/', health_check, name='health-check'),
-    path('', include(router.urls)),
+    re_path(r'^metrics/?$', metrics, name='metrics'),
+    path('', include(router_urls)),
 ]
@@ -1,18 +1,57 @@
 
 #Provides CRUD operations for appointments
 
+from datetime import date, timedelta
+from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from ..serializers import AppointmentSerializer
-from ..supabase_service import appointment_service
-from ..views_utils import SupabaseEnabledViewSetMixin, handle_supabase_exception
+from ..supabase_service import appointment_service, AppointmentConflictError, AppointmentSlots
+from ..supabase_service.schedule import CALENDAR_STATUSES, default_duration
+from ..views_utils import (
+    SupabaseEnabledViewSetMixin,
+    BulkActionsMixin,
+    handle_supabase_exception,
+    not_found_or_forbidden,
+    create_list_response,
+    get_requested_fields,
+)
 from rest_framework.permissions import AllowAny
 
-class AppointmentViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
+
+def get_date_param(request, name):
+    # Optional YYYY-MM-DD query parameter
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be a date (YYYY-MM-DD)")
+
+
+def get_month_param(request, name):
+    # Optional YYYY-MM query parameter, as the first day of the month
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(f"{value}-01")
+    except ValueError:
+        raise ValueError(f"'{name}' must be a month (YYYY-MM)")
+
+
+class AppointmentViewSet(SupabaseEnabledViewSetMixin, BulkActionsMixin, viewsets.ViewSet):
     permission_classes = [AllowAny]
     serializer_class = AppointmentSerializer
     basename = 'appointment'
+    bulk_service = appointment_service
+    
+    def get_bulk_serializer_context(self, service):
+        # Validate a whole import against the booked slots of the dates it touches,
+        # read once per date instead of one conflict query per row
+        return {'appointment_slots': AppointmentSlots(service)}
     
     def list(self, request, *args, **kwargs):
         try:
@@ -25,15 +64,24 @@ class AppointmentViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             limit = int(request.query_params.get('limit', 100))
             limit = min(max(limit, 1), 500)
             
-            # Get all appointments and filter by user_id
-            all_appointments = appointment_service.get_all_appointments(limit=limit)
-            appointments = [a for a in all_appointments if a.get('user_id') == user_id]
+            # Only this user's appointments are fetched (filtered in the database);
+            # pass the returned next/previous cursor back to move between pages
+            cursor = request.query_params.get('cursor')
+            fields, columns = get_requested_fields(request, AppointmentSerializer)
+            appointments = appointment_service.for_user(user_id)
+            start, end = get_date_param(request, 'from'), get_date_param(request, 'to')
+            if start or end:
+                # ?from=&to= (inclusive): only those dates, in calendar order
+                page = appointments.get_appointments_in_range(start, end, limit, cursor=cursor, columns=columns)
+            else:
+                page = appointments.get_appointments_page(limit, cursor=cursor, columns=columns)
             
-            serializer = AppointmentSerializer(appointments, many=True)
-            return Response({
-                'count': len(serializer.data),
-                'results': serializer.data
-            })
+            serializer = AppointmentSerializer(page['results'], many=True, fields=fields)
+            return create_list_response(
+                serializer.data,
+                next_cursor=page['next'],
+                previous_cursor=page['previous'],
+            )
         except Exception as e:
             return handle_supabase_exception(e)
     
@@ -53,9 +101,12 @@ class AppointmentViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             if not serializer.is_valid():
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
-            appointment_id = appointment_service.create_appointment(serializer.validated_data)
-            appointment = appointment_service.get_appointment(appointment_id)
+            appointments = appointment_service.for_user(user_id)
+            appointment = appointments.create_appointment(serializer.validated_data)
             return Response(appointment, status=status.HTTP_201_CREATED)
+        except AppointmentConflictError as e:
+            # The slot's unique index caught it; answer like the serializer's check
+            return Response({'non_field_errors': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return handle_supabase_exception(e)
     
@@ -67,15 +118,12 @@ class AppointmentViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             if not user_id:
                 return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
             
-            appointment = appointment_service.get_appointment(pk)
+            fields, columns = get_requested_fields(request, AppointmentSerializer)
+            appointment = appointment_service.for_user(user_id).get_appointment(pk, columns=columns)
             if not appointment:
-                return Response({'error': 'Appointment not found'}, status=status.HTTP_404_NOT_FOUND)
+                return not_found_or_forbidden(appointment_service, pk, 'Appointment not found')
             
-            # Check if appointment belongs to current user
-            if appointment.get('user_id') != user_id:
-                return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
-            
-            serializer = AppointmentSerializer(appointment)
+            serializer = AppointmentSerializer(appointment, fields=fields)
             return Response(serializer.data)
         except Exception as e:
             return handle_supabase_exception(e)
@@ -88,16 +136,13 @@ class AppointmentViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             if not user_id:
                 return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
             
-            # Get existing appointment for validation context and ownership check
-            existing_appointment = appointment_service.get_appointment(pk)
-            if not existing_appointment:
-                return Response({'error': 'Appointment not found'}, status=status.HTTP_404_NOT_FOUND)
-            
-            # Check if appointment belongs to current user
-            if existing_appointment.get('user_id') != user_id:
-                return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
+            appointments = appointment_service.for_user(user_id)
             
-            serializer = AppointmentSerializer(instance=existing_appointment, data=request.data, partial=True)
+            # Ownership is enforced by the scoped UPDATE; the instance only tells the
+            # conflict check whose schedule to search and which row to skip (and, when
+            # only the date or the time changes, which row holds the other half)
+            instance = {'id': pk, 'user_id': user_id}
+            serializer = AppointmentSerializer(instance=instance, data=request.data, partial=True)
             if not serializer.is_valid():
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
@@ -105,12 +150,13 @@ class AppointmentViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             validated_data = serializer.validated_data.copy() if isinstance(serializer.validated_data, dict) else dict(serializer.validated_data)
             validated_data.pop('user_id', None)
             
-            success = appointment_service.update_appointment(pk, validated_data)
-            if not success:
-                return Response({'error': 'Appointment not found'}, status=status.HTTP_404_NOT_FOUND)
+            appointment = appointments.update_appointment(pk, validated_data)
+            if not appointment:
+                return not_found_or_forbidden(appointment_service, pk, 'Appointment not found')
             
-            appointment = appointment_service.get_appointment(pk)
             return Response(appointment)
+        except AppointmentConflictError as e:
+            return Response({'non_field_errors': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return handle_supabase_exception(e)
     
@@ -125,17 +171,11 @@ class AppointmentViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             if not user_id:
                 return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
             
-            # Check if appointment exists and belongs to user
-            appointment = appointment_service.get_appointment(pk)
-            if not appointment:
-                return Response({'error': 'Appointment not found'}, status=status.HTTP_404_NOT_FOUND)
-            
-            if appointment.get('user_id') != user_id:
-                return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
+            appointments = appointment_service.for_user(user_id)
             
-            success = appointment_service.delete_appointment(pk)
-            if not success:
-                return Response({'error': 'Appointment not found'}, status=status.HTTP_404_NOT_FOUND)
+            # The owner filter rides on the DELETE itself; only a miss costs a second lookup
+            if not appointments.delete_appointment(pk):
+                return not_found_or_forbidden(appointment_service, pk, 'Appointment not found')
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Exception as e:
             return handle_supabase_exception(e)
@@ -143,12 +183,19 @@ class AppointmentViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def by_status(self, request):
         try:
+            # Get current user from token
+            user_id = request.user.id if hasattr(request.user, 'id') else None
+            
+            if not user_id:
+                return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
+            
             status_filter = request.query_params.get('status')
             if not status_filter:
                 return Response({'error': 'Status parameter required'}, status=status.HTTP_400_BAD_REQUEST)
             
-            appointments = appointment_service.get_appointments_by_status(status_filter)
-            serializer = AppointmentSerializer(appointments, many=True)
+            fields, columns = get_requested_fields(request, AppointmentSerializer)
+            appointments = appointment_service.for_user(user_id).get_appointments_by_status(status_filter, columns=columns)
+            serializer = AppointmentSerializer(appointments, many=True, fields=fields)
             return Response(serializer.data)
         except Exception as e:
             return handle_supabase_exception(e)
@@ -156,12 +203,100 @@ class AppointmentViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def by_patient(self, request):
         try:
+            # Get current user from token
+            user_id = request.user.id if hasattr(request.user, 'id') else None
+            
+            if not user_id:
+                return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
+            
             patient_id = request.query_params.get('patient_id')
             if not patient_id:
                 return Response({'error': 'Patient ID required'}, status=status.HTTP_400_BAD_REQUEST)
             
-            appointments = appointment_service.get_patient_appointments(patient_id)
-            serializer = AppointmentSerializer(appointments, many=True)
+            fields, columns = get_requested_fields(request, AppointmentSerializer)
+            appointments = appointment_service.for_user(user_id).get_patient_appointments(patient_id, columns=columns)
+            serializer = AppointmentSerializer(appointments, many=True, fields=fields)
             return Response(serializer.data)
         except Exception as e:
             return handle_supabase_exception(e)
+    
+    @action(detail=False, methods=['get'])
+    def upcoming(self, request):
+        try:
+            # Get current user from token
+            user_id = request.user.id if hasattr(request.user, 'id') else None
+            
+            if not user_id:
+                return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
+            
+            # The next ?limit= (default 10, max 100) appointments that are not cancelled
+            limit = int(request.query_params.get('limit', 10))
+            limit = min(max(limit, 1), 100)
+            fields, columns = get_requested_fields(request, AppointmentSerializer)
+            appointments = appointment_service.for_user(user_id).get_upcoming(
+                limit, now=timezone.localtime().replace(tzinfo=None), columns=columns,
+            )
+            serializer = AppointmentSerializer(appointments, many=True, fields=fields)
+            return create_list_response(serializer.data)
+        except Exception as e:
+            return handle_supabase_exception(e)
+    
+    @action(detail=False, methods=['get'])
+    def free_slots(self, request):
+        try:
+            # Get current user from token
+            user_id = request.user.id if hasattr(request.user, 'id') else None
+            
+            if not user_id:
+                return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
+            
+            # ?from=YYYY-MM-DD (default today) &to=YYYY-MM-DD (default a week) &duration=minutes.
+            # Days come from this worker's schedule cache: bookings made through other
+            # workers show up within APPOINTMENT_SCHEDULE_TTL seconds (5 by default)
+            now = timezone.localtime()
+            start = get_date_param(request, 'from') or now.date()
+            end = get_date_param(request, 'to') or start + timedelta(days=6)
+            duration = request.query_params.get('duration')
+            if duration is not None:
+                duration = int(duration)
+                if not 5 <= duration <= 720:
+                    raise ValueError("'duration' must be between 5 and 720 minutes")
+            
+            days = appointment_service.for_user(user_id).find_free_slots(
+                start, end, duration_minutes=duration, not_before=now.replace(tzinfo=None),
+            )
+            return Response({'duration_minutes': duration or default_duration(), 'days': days})
+        except Exception as e:
+            return handle_supabase_exception(e)
+    
+    @action(detail=False, methods=['get'])
+    def calendar(self, request):
+        try:
+            # Get current user from token
+            user_id = request.user.id if hasattr(request.user, 'id') else None
+            
+            if not user_id:
+                return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
+            
+            # ?month=YYYY-MM (default this month) or ?week=YYYY-MM-DD (Monday to Sunday of
+            # that day's week). 'days' holds one row per day from 'from' to 'to', with
+            # one count per status in the order of 'statuses'. Counts are cached per
+            # worker: writes through other workers show up within
+            # APPOINTMENT_CALENDAR_TTL seconds (5 by default).
+            service = appointment_service.for_user(user_id)
+            week = get_date_param(request, 'week')
+            if week is not None:
+                start = week - timedelta(days=week.weekday())
+                days = service.get_calendar_counts(start, start + timedelta(days=6))
+            else:
+                start = get_month_param(request, 'month') or timezone.localdate().replace(day=1)
+                days = service.get_month_counts(start)
+            return Response({
+                'from': str(start),
+                'to': str(start + timedelta(days=len(days) - 1)),
+                'statuses': CALENDAR_STATUSES,
+                'days': days,
+                'totals': [sum(counts) for counts in zip(*days)],
+            })
+        except Exception as e:
+            return handle_supabase_exception(e)
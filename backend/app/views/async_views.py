@@ -0,0 +1,221 @@
+# Async read endpoints for the entity collections, served natively under ASGI.
+# list and retrieve await the Async*Service layer, so a slow Supabase call no
+# longer holds a worker thread. Every other method on the same URL is handed to
+# the regular DRF viewset on a worker thread, so writes, validation and bulk
+# actions keep a single implementation. Those threads come from the executor pool
+# (thread_sensitive=False) rather than the one thread asgiref reserves for
+# thread-sensitive code, so concurrent writes run in parallel like under WSGI; the
+# viewsets hold no per-thread state and the ORM is not used. Enabled with
+# ASYNC_API_VIEWS (see urls.py).
+
+import logging
+
+from asgiref.sync import sync_to_async
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+
+from ..serializers import (
+    PatientSerializer,
+    AppointmentSerializer,
+    TreatmentSerializer,
+    InvoiceSerializer,
+    InventorySerializer,
+)
+from ..supabase_service import (
+    async_patient_service,
+    async_appointment_service,
+    async_treatment_service,
+    async_invoice_service,
+    async_inventory_service,
+)
+from ..views_utils import (
+    handle_supabase_exception,
+    not_found_or_forbidden_async,
+    create_list_response,
+    get_requested_fields,
+)
+from .patients_viewset import PatientViewSet
+from .appointments_viewset import AppointmentViewSet, get_date_param
+from .treatments_viewset import TreatmentViewSet
+from .invoices_viewset import InvoiceViewSet
+from .inventory_viewset import InventoryViewSet
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncEntityView(View):
+    viewset_class = None
+    service = None
+    serializer_class = None
+    page_method = None
+    get_method = None
+    not_found_message = 'Not found'
+    forbidden_message = 'Access denied'
+    detail = False
+
+    http_method_names = ['get', 'post', 'put', 'patch', 'delete', 'head', 'options']
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        # DRF views are CSRF-exempt (token auth); keep the same contract here
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    def _finalize(self, response):
+        response.accepted_renderer = JSONRenderer()
+        response.accepted_media_type = JSONRenderer.media_type
+        response.renderer_context = {'view': self}
+        return response
+
+    def _drf_request(self, request):
+        return Request(
+            request,
+            authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+        )
+
+    def _sync_view(self):
+        # Cached per class/kind: the DRF viewset view that serves every non-GET method
+        cache_attr = '_detail_view' if self.detail else '_list_view'
+        view = self.__class__.__dict__.get(cache_attr)
+        if view is None:
+            if self.detail:
+                actions = {'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}
+            else:
+                actions = {'get': 'list', 'post': 'create'}
+            view = self.viewset_class.as_view(actions)
+            setattr(self.__class__, cache_attr, view)
+        return view
+
+    async def _delegate(self, request, *args, **kwargs):
+        view = sync_to_async(self._sync_view(), thread_sensitive=False)
+        return await view(request, *args, **kwargs)
+
+    post = put = patch = delete = options = _delegate
+
+    async def get(self, request, *args, **kwargs):
+        drf_request = self._drf_request(request)
+        try:
+            # Get current user from token
+            user = drf_request.user
+            user_id = user.id if hasattr(user, 'id') else None
+
+            if not user_id:
+                return self._finalize(
+                    Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
+                )
+
+            service = self.service.for_user(user_id)
+            fields, columns = get_requested_fields(drf_request, self.serializer_class)
+            if self.detail:
+                response = await self._retrieve(service, kwargs['pk'], fields, columns)
+            else:
+                response = await self._list(drf_request, service, fields, columns)
+        except APIException as e:
+            # Authentication failures and the like, shaped exactly as DRF would
+            response = exception_handler(e, {'view': self, 'request': drf_request})
+        except Exception as e:
+            response = handle_supabase_exception(e)
+        return self._finalize(response)
+
+    async def _list(self, request, service, fields, columns):
+        # Support limit query parameter for pagination (default 100, max 500)
+        limit = int(request.query_params.get('limit', 100))
+        limit = min(max(limit, 1), 500)
+        cursor = request.query_params.get('cursor')
+        page = await getattr(service, self.page_method)(limit, cursor=cursor, columns=columns)
+
+        serializer = self.serializer_class(page['results'], many=True, fields=fields)
+        return create_list_response(
+            serializer.data,
+            next_cursor=page['next'],
+            previous_cursor=page['previous'],
+        )
+
+    async def _retrieve(self, service, pk, fields, columns):
+        record = await getattr(service, self.get_method)(pk, columns=columns)
+        if not record:
+            return await not_found_or_forbidden_async(
+                self.service, pk, self.not_found_message, self.forbidden_message
+            )
+        serializer = self.serializer_class(record, fields=fields)
+        return Response(serializer.data)
+
+
+class AsyncPatientView(AsyncEntityView):
+    viewset_class = PatientViewSet
+    service = async_patient_service
+    serializer_class = PatientSerializer
+    page_method = 'get_patients_page'
+    get_method = 'get_patient'
+    not_found_message = 'Patient not found'
+
+
+class AsyncAppointmentView(AsyncEntityView):
+    viewset_class = AppointmentViewSet
+    service = async_appointment_service
+    serializer_class = AppointmentSerializer
+    page_method = 'get_appointments_page'
+    get_method = 'get_appointment'
+    not_found_message = 'Appointment not found'
+
+    async def _list(self, request, service, fields, columns):
+        start, end = get_date_param(request, 'from'), get_date_param(request, 'to')
+        if not (start or end):
+            return await super()._list(request, service, fields, columns)
+        # ?from=&to= (inclusive): only those dates, in calendar order
+        limit = int(request.query_params.get('limit', 100))
+        limit = min(max(limit, 1), 500)
+        page = await service.get_appointments_in_range(
+            start, end, limit, cursor=request.query_params.get('cursor'), columns=columns,
+        )
+        serializer = self.serializer_class(page['results'], many=True, fields=fields)
+        return create_list_response(
+            serializer.data,
+            next_cursor=page['next'],
+            previous_cursor=page['previous'],
+        )
+
+
+class AsyncTreatmentView(AsyncEntityView):
+    viewset_class = TreatmentViewSet
+    service = async_treatment_service
+    serializer_class = TreatmentSerializer
+    page_method = 'get_treatments_page'
+    get_method = 'get_treatment'
+    not_found_message = 'Treatment not found'
+    forbidden_message = 'Not authorized to access this treatment'
+
+
+class AsyncInvoiceView(AsyncEntityView):
+    viewset_class = InvoiceViewSet
+    service = async_invoice_service
+    serializer_class = InvoiceSerializer
+    page_method = 'get_invoices_page'
+    get_method = 'get_invoice'
+    not_found_message = 'Invoice not found'
+
+
+class AsyncInventoryView(AsyncEntityView):
+    viewset_class = InventoryViewSet
+    service = async_inventory_service
+    serializer_class = InventorySerializer
+    page_method = 'get_items_page'
+    get_method = 'get_item'
+    not_found_message = 'Item not found'
+
+
+# Router URL names whose list/detail GETs these views take over
+ASYNC_READ_VIEWS = {
+    'patient': AsyncPatientView,
+    'appointment': AsyncAppointmentView,
+    'treatment': AsyncTreatmentView,
+    'invoice': AsyncInvoiceView,
+    'inventory': AsyncInventoryView,
+}
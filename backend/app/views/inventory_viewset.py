@@ -4,13 +4,21 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from ..serializers import InventorySerializer
 from ..supabase_service import inventory_service
-from ..views_utils import SupabaseEnabledViewSetMixin, handle_supabase_exception
+from ..views_utils import (
+    SupabaseEnabledViewSetMixin,
+    BulkActionsMixin,
+    handle_supabase_exception,
+    not_found_or_forbidden,
+    create_list_response,
+    get_requested_fields,
+)
 from rest_framework.permissions import AllowAny
 
-class InventoryViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
+class InventoryViewSet(SupabaseEnabledViewSetMixin, BulkActionsMixin, viewsets.ViewSet):
     permission_classes = [AllowAny]
     serializer_class = InventorySerializer
     basename = 'inventory'
+    bulk_service = inventory_service
     
     def list(self, request, *args, **kwargs):
         try:
@@ -23,16 +31,18 @@ class InventoryViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             limit = int(request.query_params.get('limit', 100))
             limit = min(max(limit, 1), 500)  
             
-            # Get all items and filter by user_id
-            all_items = inventory_service.get_all_items(limit=limit)
-            items = [i for i in all_items if i.get('user_id') == user_id]
-            
-            serializer = InventorySerializer(items, many=True)
-            # Return consistent format with results and count for frontend compatibility
-            return Response({
-                'count': len(serializer.data),
-                'results': serializer.data
-            })
+            # Only this user's items are fetched (filtered in the database);
+            # pass the returned next/previous cursor back to move between pages
+            cursor = request.query_params.get('cursor')
+            fields, columns = get_requested_fields(request, InventorySerializer)
+            page = inventory_service.for_user(user_id).get_items_page(limit, cursor=cursor, columns=columns)
+            
+            serializer = InventorySerializer(page['results'], many=True, fields=fields)
+            return create_list_response(
+                serializer.data,
+                next_cursor=page['next'],
+                previous_cursor=page['previous'],
+            )
         except Exception as e:
             return handle_supabase_exception(e)
     
@@ -51,8 +61,8 @@ class InventoryViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             serializer = InventorySerializer(data=data)
             serializer.is_valid(raise_exception=True)
             
-            item_id = inventory_service.create_item(serializer.validated_data)
-            item = inventory_service.get_item(item_id)
+            items = inventory_service.for_user(user_id)
+            item = items.create_item(serializer.validated_data)
             return Response(item, status=status.HTTP_201_CREATED)
         except Exception as e:
             return handle_supabase_exception(e)
@@ -65,15 +75,12 @@ class InventoryViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             if not user_id:
                 return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
             
-            item = inventory_service.get_item(pk)
+            fields, columns = get_requested_fields(request, InventorySerializer)
+            item = inventory_service.for_user(user_id).get_item(pk, columns=columns)
             if not item:
-                return Response({'error': 'Item not found'}, status=status.HTTP_404_NOT_FOUND)
+                return not_found_or_forbidden(inventory_service, pk, 'Item not found')
             
-            # Check if item belongs to current user
-            if item.get('user_id') != user_id:
-                return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
-            
-            serializer = InventorySerializer(item)
+            serializer = InventorySerializer(item, fields=fields)
             return Response(serializer.data)
         except Exception as e:
             return handle_supabase_exception(e)
@@ -86,13 +93,7 @@ class InventoryViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             if not user_id:
                 return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
             
-            # Check if item exists and belongs to user
-            item = inventory_service.get_item(pk)
-            if not item:
-                return Response({'error': 'Item not found'}, status=status.HTTP_404_NOT_FOUND)
-            
-            if item.get('user_id') != user_id:
-                return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
+            items = inventory_service.for_user(user_id)
             
             serializer = InventorySerializer(data=request.data, partial=True)
             serializer.is_valid(raise_exception=True)
@@ -101,11 +102,10 @@ class InventoryViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             validated_data = serializer.validated_data.copy() if isinstance(serializer.validated_data, dict) else dict(serializer.validated_data)
             validated_data.pop('user_id', None)
             
-            success = inventory_service.update_item(pk, validated_data)
-            if not success:
-                return Response({'error': 'Item not found'}, status=status.HTTP_404_NOT_FOUND)
+            item = items.update_item(pk, validated_data)
+            if not item:
+                return not_found_or_forbidden(inventory_service, pk, 'Item not found')
             
-            item = inventory_service.get_item(pk)
             return Response(item)
         except Exception as e:
             return handle_supabase_exception(e)
@@ -121,17 +121,11 @@ class InventoryViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             if not user_id:
                 return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
             
-            # Check if item exists and belongs to user
-            item = inventory_service.get_item(pk)
-            if not item:
-                return Response({'error': 'Item not found'}, status=status.HTTP_404_NOT_FOUND)
+            items = inventory_service.for_user(user_id)
             
-            if item.get('user_id') != user_id:
-                return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
-            
-            success = inventory_service.delete_item(pk)
-            if not success:
-                return Response({'error': 'Item not found'}, status=status.HTTP_404_NOT_FOUND)
+            # The owner filter rides on the DELETE itself; only a miss costs a second lookup
+            if not items.delete_item(pk):
+                return not_found_or_forbidden(inventory_service, pk, 'Item not found')
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Exception as e:
             return handle_supabase_exception(e)
@@ -139,7 +133,13 @@ class InventoryViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def low_stock(self, request):
         try:
-            items = inventory_service.get_low_stock_items()
+            # Get current user from token
+            user_id = request.user.id if hasattr(request.user, 'id') else None
+            
+            if not user_id:
+                return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
+            
+            items = inventory_service.for_user(user_id).get_low_stock_items()
             serializer = InventorySerializer(items, many=True)
             return Response({
                 'count': len(serializer.data),
@@ -150,6 +150,12 @@ class InventoryViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
     
     @action(detail=True, methods=['post'])
     def update_quantity(self, request, pk=None):
+        # Get current user from token
+        user_id = request.user.id if hasattr(request.user, 'id') else None
+        
+        if not user_id:
+            return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
+        
         quantity = request.data.get('quantity')
         if quantity is None:
             return Response({'error': 'quantity is required'}, status=status.HTTP_400_BAD_REQUEST)
@@ -162,10 +168,10 @@ class InventoryViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             return Response({'error': 'quantity must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            success = inventory_service.update_quantity(pk, quantity)
-            if not success:
-                return Response({'error': 'Item not found'}, status=status.HTTP_404_NOT_FOUND)
-            item = inventory_service.get_item(pk)
+            items = inventory_service.for_user(user_id)
+            item = items.update_quantity(pk, quantity)
+            if not item:
+                return not_found_or_forbidden(inventory_service, pk, 'Item not found')
             return Response(item)
         except Exception as e:
             return handle_supabase_exception(e)
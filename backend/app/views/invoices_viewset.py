@@ -4,14 +4,22 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from ..serializers import InvoiceSerializer
 from ..supabase_service import invoice_service
-from ..views_utils import SupabaseEnabledViewSetMixin, handle_supabase_exception
+from ..views_utils import (
+    SupabaseEnabledViewSetMixin,
+    BulkActionsMixin,
+    handle_supabase_exception,
+    not_found_or_forbidden,
+    create_list_response,
+    get_requested_fields,
+)
 from rest_framework.permissions import AllowAny
 
-class InvoiceViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
+class InvoiceViewSet(SupabaseEnabledViewSetMixin, BulkActionsMixin, viewsets.ViewSet):
     
     permission_classes = [AllowAny]
     serializer_class = InvoiceSerializer
     basename = 'invoice'
+    bulk_service = invoice_service
     
     def list(self, request, *args, **kwargs):
         #List all invoices with optional pagination limit.
@@ -25,16 +33,18 @@ class InvoiceViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             limit = int(request.query_params.get('limit', 100))
             limit = min(max(limit, 1), 500) 
             
-            # Get all invoices and filter by user_id
-            all_invoices = invoice_service.get_all_invoices(limit=limit)
-            invoices = [i for i in all_invoices if i.get('user_id') == user_id]
-            
-            serializer = InvoiceSerializer(invoices, many=True)
-            # Return consistent format with results and count for frontend compatibility
-            return Response({
-                'count': len(serializer.data),
-                'results': serializer.data
-            })
+            # Only this user's invoices are fetched (filtered in the database);
+            # pass the returned next/previous cursor back to move between pages
+            cursor = request.query_params.get('cursor')
+            fields, columns = get_requested_fields(request, InvoiceSerializer)
+            page = invoice_service.for_user(user_id).get_invoices_page(limit, cursor=cursor, columns=columns)
+            
+            serializer = InvoiceSerializer(page['results'], many=True, fields=fields)
+            return create_list_response(
+                serializer.data,
+                next_cursor=page['next'],
+                previous_cursor=page['previous'],
+            )
         except Exception as e:
             return handle_supabase_exception(e)
     
@@ -54,8 +64,8 @@ class InvoiceViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             serializer = InvoiceSerializer(data=data)
             serializer.is_valid(raise_exception=True)
             
-            invoice_id = invoice_service.create_invoice(serializer.validated_data)
-            invoice = invoice_service.get_invoice(invoice_id)
+            invoices = invoice_service.for_user(user_id)
+            invoice = invoices.create_invoice(serializer.validated_data)
             return Response(invoice, status=status.HTTP_201_CREATED)
         except Exception as e:
             return handle_supabase_exception(e)
@@ -68,15 +78,12 @@ class InvoiceViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             if not user_id:
                 return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
             
-            invoice = invoice_service.get_invoice(pk)
+            fields, columns = get_requested_fields(request, InvoiceSerializer)
+            invoice = invoice_service.for_user(user_id).get_invoice(pk, columns=columns)
             if not invoice:
-                return Response({'error': 'Invoice not found'}, status=status.HTTP_404_NOT_FOUND)
-            
-            # Check if invoice belongs to current user
-            if invoice.get('user_id') != user_id:
-                return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
+                return not_found_or_forbidden(invoice_service, pk, 'Invoice not found')
             
-            serializer = InvoiceSerializer(invoice)
+            serializer = InvoiceSerializer(invoice, fields=fields)
             return Response(serializer.data)
         except Exception as e:
             return handle_supabase_exception(e)
@@ -89,13 +96,7 @@ class InvoiceViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             if not user_id:
                 return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
             
-            # Check if invoice exists and belongs to user
-            invoice = invoice_service.get_invoice(pk)
-            if not invoice:
-                return Response({'error': 'Invoice not found'}, status=status.HTTP_404_NOT_FOUND)
-            
-            if invoice.get('user_id') != user_id:
-                return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
+            invoices = invoice_service.for_user(user_id)
             
             serializer = InvoiceSerializer(data=request.data, partial=True)
             serializer.is_valid(raise_exception=True)
@@ -104,11 +105,10 @@ class InvoiceViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             validated_data = serializer.validated_data.copy() if isinstance(serializer.validated_data, dict) else dict(serializer.validated_data)
             validated_data.pop('user_id', None)
             
-            success = invoice_service.update_invoice(pk, validated_data)
-            if not success:
-                return Response({'error': 'Invoice not found'}, status=status.HTTP_404_NOT_FOUND)
+            invoice = invoices.update_invoice(pk, validated_data)
+            if not invoice:
+                return not_found_or_forbidden(invoice_service, pk, 'Invoice not found')
             
-            invoice = invoice_service.get_invoice(pk)
             return Response(invoice)
         except Exception as e:
             return handle_supabase_exception(e)
@@ -124,17 +124,11 @@ class InvoiceViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             if not user_id:
                 return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
             
-            # Check if invoice exists and belongs to user
-            invoice = invoice_service.get_invoice(pk)
-            if not invoice:
-                return Response({'error': 'Invoice not found'}, status=status.HTTP_404_NOT_FOUND)
-            
-            if invoice.get('user_id') != user_id:
-                return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
+            invoices = invoice_service.for_user(user_id)
             
-            success = invoice_service.delete_invoice(pk)
-            if not success:
-                return Response({'error': 'Invoice not found'}, status=status.HTTP_404_NOT_FOUND)
+            # The owner filter rides on the DELETE itself; only a miss costs a second lookup
+            if not invoices.delete_invoice(pk):
+                return not_found_or_forbidden(invoice_service, pk, 'Invoice not found')
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Exception as e:
             return handle_supabase_exception(e)
@@ -142,12 +136,19 @@ class InvoiceViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def by_status(self, request):
         try:
+            # Get current user from token
+            user_id = request.user.id if hasattr(request.user, 'id') else None
+            
+            if not user_id:
+                return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
+            
             status_filter = request.query_params.get('status')
             if not status_filter:
                 return Response({'error': 'Status parameter required'}, status=status.HTTP_400_BAD_REQUEST)
             
-            invoices = invoice_service.get_invoices_by_status(status_filter)
-            serializer = InvoiceSerializer(invoices, many=True)
+            fields, columns = get_requested_fields(request, InvoiceSerializer)
+            invoices = invoice_service.for_user(user_id).get_invoices_by_status(status_filter, columns=columns)
+            serializer = InvoiceSerializer(invoices, many=True, fields=fields)
             return Response(serializer.data)
         except Exception as e:
             return handle_supabase_exception(e)
@@ -155,12 +156,19 @@ class InvoiceViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def by_patient(self, request):
         try:
+            # Get current user from token
+            user_id = request.user.id if hasattr(request.user, 'id') else None
+            
+            if not user_id:
+                return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
+            
             patient_id = request.query_params.get('patient_id')
             if not patient_id:
                 return Response({'error': 'Patient ID required'}, status=status.HTTP_400_BAD_REQUEST)
             
-            invoices = invoice_service.get_patient_invoices(patient_id)
-            serializer = InvoiceSerializer(invoices, many=True)
+            fields, columns = get_requested_fields(request, InvoiceSerializer)
+            invoices = invoice_service.for_user(user_id).get_patient_invoices(patient_id, columns=columns)
+            serializer = InvoiceSerializer(invoices, many=True, fields=fields)
             return Response(serializer.data)
         except Exception as e:
             return handle_supabase_exception(e)
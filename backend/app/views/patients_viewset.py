@@ -3,15 +3,39 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
-from ..serializers import PatientSerializer
-from ..supabase_service import patient_service
-from ..views_utils import SupabaseEnabledViewSetMixin, handle_supabase_exception
+from ..serializers import (
+    PatientSerializer,
+    AppointmentSerializer,
+    TreatmentSerializer,
+    InvoiceSerializer,
+    XraySerializer,
+)
+from ..supabase_service import (
+    patient_service,
+    appointment_service,
+    treatment_service,
+    invoice_service,
+    xray_service,
+    call,
+    gather,
+    is_autocomplete_enabled,
+    AUTOCOMPLETE_FIELDS,
+)
+from ..views_utils import (
+    SupabaseEnabledViewSetMixin,
+    BulkActionsMixin,
+    handle_supabase_exception,
+    not_found_or_forbidden,
+    create_list_response,
+    get_requested_fields,
+)
 
 
-class PatientViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
+class PatientViewSet(SupabaseEnabledViewSetMixin, BulkActionsMixin, viewsets.ViewSet):
     permission_classes = [AllowAny]
     serializer_class = PatientSerializer
     basename = 'patient'
+    bulk_service = patient_service
     
     def list(self, request, *args, **kwargs):
         try:
@@ -25,16 +49,18 @@ class PatientViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             limit = int(request.query_params.get('limit', 100))
             limit = min(max(limit, 1), 500) 
             
-            # Get all patients and filter by user_id
-            all_patients = patient_service.get_all_patients(limit=limit)
-            patients = [p for p in all_patients if p.get('user_id') == user_id]
-            
-            serializer = PatientSerializer(patients, many=True)
-            # Return consistent format with results and count for frontend compatibility
-            return Response({
-                'count': len(serializer.data),
-                'results': serializer.data
-            })
+            # Only this user's patients are fetched (filtered in the database);
+            # pass the returned next/previous cursor back to move between pages
+            cursor = request.query_params.get('cursor')
+            fields, columns = get_requested_fields(request, PatientSerializer)
+            page = patient_service.for_user(user_id).get_patients_page(limit, cursor=cursor, columns=columns)
+            
+            serializer = PatientSerializer(page['results'], many=True, fields=fields)
+            return create_list_response(
+                serializer.data,
+                next_cursor=page['next'],
+                previous_cursor=page['previous'],
+            )
         except Exception as e:
             return handle_supabase_exception(e)
     
@@ -60,8 +86,8 @@ class PatientViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             
             logger.info(f"Validated data: {serializer.validated_data}")
             
-            patient_id = patient_service.create_patient(serializer.validated_data)
-            patient = patient_service.get_patient(patient_id)
+            patients = patient_service.for_user(user_id)
+            patient = patients.create_patient(serializer.validated_data)
             return Response(patient, status=status.HTTP_201_CREATED)
         except Exception as e:
             return handle_supabase_exception(e)
@@ -74,15 +100,12 @@ class PatientViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             if not user_id:
                 return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
             
-            patient = patient_service.get_patient(pk)
+            fields, columns = get_requested_fields(request, PatientSerializer)
+            patient = patient_service.for_user(user_id).get_patient(pk, columns=columns)
             if not patient:
-                return Response({'error': 'Patient not found'}, status=status.HTTP_404_NOT_FOUND)
+                return not_found_or_forbidden(patient_service, pk, 'Patient not found')
             
-            # Check if patient belongs to current user
-            if patient.get('user_id') != user_id:
-                return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
-            
-            serializer = PatientSerializer(patient)
+            serializer = PatientSerializer(patient, fields=fields)
             return Response(serializer.data)
         except Exception as e:
             return handle_supabase_exception(e)
@@ -95,22 +118,15 @@ class PatientViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             if not user_id:
                 return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
             
-            # Check if patient exists and belongs to current user
-            patient = patient_service.get_patient(pk)
-            if not patient:
-                return Response({'error': 'Patient not found'}, status=status.HTTP_404_NOT_FOUND)
-            
-            if patient.get('user_id') != user_id:
-                return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
+            patients = patient_service.for_user(user_id)
             
             serializer = PatientSerializer(data=request.data, partial=True)
             serializer.is_valid(raise_exception=True)
             
-            success = patient_service.update_patient(pk, serializer.validated_data)
-            if not success:
-                return Response({'error': 'Patient not found'}, status=status.HTTP_404_NOT_FOUND)
+            patient = patients.update_patient(pk, serializer.validated_data)
+            if not patient:
+                return not_found_or_forbidden(patient_service, pk, 'Patient not found')
             
-            patient = patient_service.get_patient(pk)
             return Response(patient)
         except Exception as e:
             return handle_supabase_exception(e)
@@ -126,30 +142,103 @@ class PatientViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             if not user_id:
                 return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
             
-            # Check if patient belongs to current user
-            patient = patient_service.get_patient(pk)
-            if not patient:
-                return Response({'error': 'Patient not found'}, status=status.HTTP_404_NOT_FOUND)
-            
-            if patient.get('user_id') != user_id:
-                return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
+            patients = patient_service.for_user(user_id)
             
-            success = patient_service.delete_patient(pk)
-            if not success:
-                return Response({'error': 'Patient not found'}, status=status.HTTP_404_NOT_FOUND)
+            # The owner filter rides on the DELETE itself; only a miss costs a second lookup
+            if not patients.delete_patient(pk):
+                return not_found_or_forbidden(patient_service, pk, 'Patient not found')
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Exception as e:
             return handle_supabase_exception(e)
     
     @action(detail=False, methods=['get'])
     def search(self, request):
+        # ?q= words are matched against name, phone and email in the database;
+        # ?limit= (default 20, max 100) and ?cursor= page through the matches,
+        # like the list endpoints: next/previous are opaque cursors
         try:
+            # Get current user from token
+            user_id = request.user.id if hasattr(request.user, 'id') else None
+            
+            if not user_id:
+                return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
+            
             search_term = request.query_params.get('q', '')
-            if not search_term:
+            if not search_term.strip():
                 return Response({'error': 'Search term required'}, status=status.HTTP_400_BAD_REQUEST)
             
-            patients = patient_service.search_patients(search_term)
-            serializer = PatientSerializer(patients, many=True)
-            return Response(serializer.data)
+            limit = int(request.query_params.get('limit', 20))
+            limit = min(max(limit, 1), 100)
+            cursor = request.query_params.get('cursor')
+            fields, columns = get_requested_fields(request, PatientSerializer)
+            
+            page = patient_service.for_user(user_id).search_patients(
+                search_term, limit=limit, cursor=cursor, columns=columns,
+            )
+            serializer = PatientSerializer(page['results'], many=True, fields=fields)
+            return create_list_response(
+                serializer.data,
+                next_cursor=page['next'],
+                previous_cursor=page['previous'],
+            )
+        except Exception as e:
+            return handle_supabase_exception(e)
+    
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        # Lookup for the patient picker: ?q= matches name, email and phone, ?limit=
+        # (default 10, max 50). Answered from the database search unless
+        # PATIENT_AUTOCOMPLETE_INDEX turns on the tenant's in-memory index.
+        try:
+            # Get current user from token
+            user_id = request.user.id if hasattr(request.user, 'id') else None
+            
+            if not user_id:
+                return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
+            
+            query = request.query_params.get('q', '')
+            limit = int(request.query_params.get('limit', 10))
+            limit = min(max(limit, 1), 50)
+            if not query.strip():
+                return create_list_response([])
+            
+            patients = patient_service.for_user(user_id)
+            if is_autocomplete_enabled():
+                results = patients.autocomplete_patients(query, limit=limit)
+            else:
+                results = patients.search_patients(query, limit=limit, columns=list(AUTOCOMPLETE_FIELDS))['results']
+            
+            serializer = PatientSerializer(results, many=True, fields=list(AUTOCOMPLETE_FIELDS))
+            return create_list_response(serializer.data)
+        except Exception as e:
+            return handle_supabase_exception(e)
+    
+    @action(detail=True, methods=['get'])
+    def overview(self, request, pk=None):
+        try:
+            # Get current user from token
+            user_id = request.user.id if hasattr(request.user, 'id') else None
+            
+            if not user_id:
+                return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
+            
+            # The patient and everything linked to it, fetched in parallel
+            patient, appointments, treatments, invoices, xrays = gather(
+                call(patient_service.for_user(user_id).get_patient, pk),
+                call(appointment_service.for_user(user_id).get_patient_appointments, pk),
+                call(treatment_service.for_user(user_id).get_patient_treatments, pk),
+                call(invoice_service.for_user(user_id).get_patient_invoices, pk),
+                call(xray_service.for_user(user_id).get_patient_images, pk),
+            )
+            if not patient:
+                return not_found_or_forbidden(patient_service, pk, 'Patient not found')
+            
+            return Response({
+                'patient': PatientSerializer(patient).data,
+                'appointments': AppointmentSerializer(appointments, many=True).data,
+                'treatments': TreatmentSerializer(treatments, many=True).data,
+                'invoices': InvoiceSerializer(invoices, many=True).data,
+                'xrays': XraySerializer(xrays, many=True).data,
+            })
         except Exception as e:
             return handle_supabase_exception(e)
@@ -4,14 +4,22 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from ..serializers import TreatmentSerializer
 from ..supabase_service import treatment_service
-from ..views_utils import SupabaseEnabledViewSetMixin, handle_supabase_exception
+from ..views_utils import (
+    SupabaseEnabledViewSetMixin,
+    BulkActionsMixin,
+    handle_supabase_exception,
+    not_found_or_forbidden,
+    create_list_response,
+    get_requested_fields,
+)
 from rest_framework.permissions import AllowAny
 
-class TreatmentViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
+class TreatmentViewSet(SupabaseEnabledViewSetMixin, BulkActionsMixin, viewsets.ViewSet):
     
     permission_classes = [AllowAny]
     serializer_class = TreatmentSerializer
     basename = 'treatment'
+    bulk_service = treatment_service
     
     def list(self, request, *args, **kwargs):
         try:
@@ -25,15 +33,18 @@ class TreatmentViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             limit = int(request.query_params.get('limit', 100))
             limit = min(max(limit, 1), 500)  
             
-            # Get all treatments and filter by user_id
-            all_treatments = treatment_service.get_all_treatments(limit=limit)
-            treatments = [t for t in all_treatments if t.get('user_id') == user_id]
-            
-            serializer = TreatmentSerializer(treatments, many=True)
-            return Response({
-                'count': len(serializer.data),
-                'results': serializer.data
-            })
+            # Only this user's treatments are fetched (filtered in the database);
+            # pass the returned next/previous cursor back to move between pages
+            cursor = request.query_params.get('cursor')
+            fields, columns = get_requested_fields(request, TreatmentSerializer)
+            page = treatment_service.for_user(user_id).get_treatments_page(limit, cursor=cursor, columns=columns)
+            
+            serializer = TreatmentSerializer(page['results'], many=True, fields=fields)
+            return create_list_response(
+                serializer.data,
+                next_cursor=page['next'],
+                previous_cursor=page['previous'],
+            )
         except Exception as e:
             return handle_supabase_exception(e)
     
@@ -52,8 +63,8 @@ class TreatmentViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             serializer = TreatmentSerializer(data=data)
             serializer.is_valid(raise_exception=True)
             
-            treatment_id = treatment_service.create_treatment(serializer.validated_data)
-            treatment = treatment_service.get_treatment(treatment_id)
+            treatments = treatment_service.for_user(user_id)
+            treatment = treatments.create_treatment(serializer.validated_data)
             return Response(treatment, status=status.HTTP_201_CREATED)
         except Exception as e:
             return handle_supabase_exception(e)
@@ -66,15 +77,12 @@ class TreatmentViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             if not user_id:
                 return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
             
-            treatment = treatment_service.get_treatment(pk)
+            fields, columns = get_requested_fields(request, TreatmentSerializer)
+            treatment = treatment_service.for_user(user_id).get_treatment(pk, columns=columns)
             if not treatment:
-                return Response({'error': 'Treatment not found'}, status=status.HTTP_404_NOT_FOUND)
-            
-            # Check if treatment belongs to user
-            if treatment.get('user_id') != user_id:
-                return Response({'error': 'Not authorized to access this treatment'}, status=status.HTTP_403_FORBIDDEN)
+                return not_found_or_forbidden(treatment_service, pk, 'Treatment not found', 'Not authorized to access this treatment')
             
-            serializer = TreatmentSerializer(treatment)
+            serializer = TreatmentSerializer(treatment, fields=fields)
             return Response(serializer.data)
         except Exception as e:
             return handle_supabase_exception(e)
@@ -87,13 +95,7 @@ class TreatmentViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             if not user_id:
                 return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
             
-            # Check if treatment exists and belongs to user
-            treatment = treatment_service.get_treatment(pk)
-            if not treatment:
-                return Response({'error': 'Treatment not found'}, status=status.HTTP_404_NOT_FOUND)
-            
-            if treatment.get('user_id') != user_id:
-                return Response({'error': 'Not authorized to access this treatment'}, status=status.HTTP_403_FORBIDDEN)
+            treatments = treatment_service.for_user(user_id)
             
             serializer = TreatmentSerializer(data=request.data, partial=True)
             serializer.is_valid(raise_exception=True)
@@ -102,11 +104,10 @@ class TreatmentViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             validated_data = serializer.validated_data.copy() if isinstance(serializer.validated_data, dict) else dict(serializer.validated_data)
             validated_data.pop('user_id', None)
             
-            success = treatment_service.update_treatment(pk, validated_data)
-            if not success:
-                return Response({'error': 'Treatment not found'}, status=status.HTTP_404_NOT_FOUND)
+            treatment = treatments.update_treatment(pk, validated_data)
+            if not treatment:
+                return not_found_or_forbidden(treatment_service, pk, 'Treatment not found', 'Not authorized to access this treatment')
             
-            treatment = treatment_service.get_treatment(pk)
             return Response(treatment)
         except Exception as e:
             return handle_supabase_exception(e)
@@ -123,17 +124,11 @@ class TreatmentViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             if not user_id:
                 return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
             
-            # Check if treatment exists and belongs to user
-            treatment = treatment_service.get_treatment(pk)
-            if not treatment:
-                return Response({'error': 'Treatment not found'}, status=status.HTTP_404_NOT_FOUND)
-            
-            if treatment.get('user_id') != user_id:
-                return Response({'error': 'Not authorized to access this treatment'}, status=status.HTTP_403_FORBIDDEN)
+            treatments = treatment_service.for_user(user_id)
             
-            success = treatment_service.delete_treatment(pk)
-            if not success:
-                return Response({'error': 'Treatment not found'}, status=status.HTTP_404_NOT_FOUND)
+            # The owner filter rides on the DELETE itself; only a miss costs a second lookup
+            if not treatments.delete_treatment(pk):
+                return not_found_or_forbidden(treatment_service, pk, 'Treatment not found', 'Not authorized to access this treatment')
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Exception as e:
             return handle_supabase_exception(e)
@@ -141,12 +136,19 @@ class TreatmentViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def by_patient(self, request):
         try:
+            # Get current user from token
+            user_id = request.user.id if hasattr(request.user, 'id') else None
+            
+            if not user_id:
+                return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
+            
             patient_id = request.query_params.get('patient_id')
             if not patient_id:
                 return Response({'error': 'Patient ID required'}, status=status.HTTP_400_BAD_REQUEST)
             
-            treatments = treatment_service.get_patient_treatments(patient_id)
-            serializer = TreatmentSerializer(treatments, many=True)
+            fields, columns = get_requested_fields(request, TreatmentSerializer)
+            treatments = treatment_service.for_user(user_id).get_patient_treatments(patient_id, columns=columns)
+            serializer = TreatmentSerializer(treatments, many=True, fields=fields)
             return Response(serializer.data)
         except Exception as e:
             return handle_supabase_exception(e)
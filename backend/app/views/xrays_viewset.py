@@ -6,14 +6,25 @@ from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from ..serializers import XraySerializer
 from ..supabase_service import xray_service
-from ..views_utils import SupabaseEnabledViewSetMixin, handle_supabase_exception
+from ..views_utils import (
+    SupabaseEnabledViewSetMixin,
+    BulkActionsMixin,
+    handle_supabase_exception,
+    not_found_or_forbidden,
+    create_list_response,
+    get_requested_fields,
+)
 
 
-class XraysViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
+class XraysViewSet(SupabaseEnabledViewSetMixin, BulkActionsMixin, viewsets.ViewSet):
     """ViewSet for X-ray image CRUD operations with file upload support."""
     permission_classes = [AllowAny]
     serializer_class = XraySerializer
     basename = 'xray'
+    bulk_service = xray_service
+    # Files are uploaded one at a time through create(); bulk covers metadata and deletes
+    bulk_operations = ('update', 'delete')
+    bulk_update_fields = ('description', 'date_taken')
     parser_classes = [MultiPartParser, FormParser, JSONParser]
     
     def list(self, request, *args, **kwargs):
@@ -23,6 +34,8 @@ class XraysViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
         Query Parameters:
             patient_id: Filter images by patient ID (optional but recommended)
             limit: Maximum number of results (default 100, max 500)
+            cursor: Opaque cursor from a previous page's next/previous field
+            fields: Comma-separated fields to return (e.g. id,image_name,signed_url)
         """
         try:
             # Get current user from token
@@ -35,21 +48,19 @@ class XraysViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             limit = int(request.query_params.get('limit', 100))
             limit = min(max(limit, 1), 500)
             
-            if patient_id:
-                xrays = xray_service.get_patient_images(patient_id)
-            else:
-                # Get all images (use base service method)
-                xrays = xray_service.get_all()
-            
-            # Filter by user_id and apply limit
-            xrays = [x for x in (xrays or []) if x.get('user_id') == user_id]
-            xrays = xrays[:limit] if xrays else []
-            
-            serializer = XraySerializer(xrays, many=True)
-            return Response({
-                'count': len(serializer.data),
-                'results': serializer.data
-            })
+            cursor = request.query_params.get('cursor')
+            fields, columns = get_requested_fields(request, XraySerializer)
+            
+            # Only this user's images are fetched (filtered in the database);
+            # pass the returned next/previous cursor back to move between pages
+            page = xray_service.for_user(user_id).get_images_page(limit, cursor=cursor, patient_id=patient_id, columns=columns)
+            
+            serializer = XraySerializer(page['results'], many=True, fields=fields)
+            return create_list_response(
+                serializer.data,
+                next_cursor=page['next'],
+                previous_cursor=page['previous'],
+            )
         except Exception as e:
             return handle_supabase_exception(e)
     
@@ -140,18 +151,12 @@ class XraysViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             if not user_id:
                 return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
             
-            xray = xray_service.get_image(pk)
+            fields, columns = get_requested_fields(request, XraySerializer)
+            xray = xray_service.for_user(user_id).get_image(pk, columns=columns)
             if not xray:
-                return Response(
-                    {'error': 'X-ray image not found'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
+                return not_found_or_forbidden(xray_service, pk, 'X-ray image not found')
             
-            # Check if xray belongs to current user
-            if xray.get('user_id') != user_id:
-                return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
-            
-            serializer = XraySerializer(xray)
+            serializer = XraySerializer(xray, fields=fields)
             return Response(serializer.data)
         except Exception as e:
             return handle_supabase_exception(e)
@@ -171,16 +176,7 @@ class XraysViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             if not user_id:
                 return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
             
-            # Check if xray exists and belongs to user
-            xray = xray_service.get_image(pk)
-            if not xray:
-                return Response(
-                    {'error': 'X-ray image not found'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
-            
-            if xray.get('user_id') != user_id:
-                return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
+            xrays_scope = xray_service.for_user(user_id)
             
             # Only allow updating metadata, not the image itself
             update_data = {}
@@ -197,14 +193,10 @@ class XraysViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            success = xray_service.update(pk, update_data)
-            if not success:
-                return Response(
-                    {'error': 'X-ray image not found'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
+            xray = xrays_scope.update_image_metadata(pk, update_data)
+            if not xray:
+                return not_found_or_forbidden(xray_service, pk, 'X-ray image not found')
             
-            xray = xray_service.get_image(pk)
             serializer = XraySerializer(xray)
             return Response(serializer.data)
             
@@ -224,23 +216,11 @@ class XraysViewSet(SupabaseEnabledViewSetMixin, viewsets.ViewSet):
             if not user_id:
                 return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
             
-            # Check if xray exists and belongs to user
-            xray = xray_service.get_image(pk)
-            if not xray:
-                return Response(
-                    {'error': 'X-ray image not found'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
-            
-            if xray.get('user_id') != user_id:
-                return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
+            xrays_scope = xray_service.for_user(user_id)
             
-            success = xray_service.delete_image(pk)
-            if not success:
-                return Response(
-                    {'error': 'X-ray image not found'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
+            # The owner filter rides on the DELETE itself; only a miss costs a second lookup
+            if not xrays_scope.delete_image(pk):
+                return not_found_or_forbidden(xray_service, pk, 'X-ray image not found')
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Exception as e:
             return handle_supabase_exception(e)
@@ -1,5 +1,6 @@
 import logging
 from rest_framework import status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError as DRFValidationError
 
@@ -8,7 +9,10 @@ from .supabase_service import (
     SupabaseDatabaseError,
     SupabaseConnectionError,
     SupabaseDocumentNotFoundError,
+    SupabaseDeadlineExceededError,
+    BulkWriteError,
 )
+from .supabase_service.base import is_unique_violation
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +28,136 @@ class SupabaseEnabledViewSetMixin:
         return None
 
 
+class BulkActionsMixin:
+    # Adds POST /api/<resource>/bulk/ accepting any of:
+    #   {"create": [{...}, ...], "update": {"ids": [...], "data": {...}}, "delete": {"ids": [...]}}
+    # Creates are validated per item and written as chunked array inserts; updates and
+    # deletes go out as chunked in_('id', ...) filters. The response has one result per item,
+    # including the rows of a chunk the database rejected after earlier chunks were written.
+    bulk_service = None
+    bulk_operations = ('create', 'update', 'delete')
+    bulk_update_fields = None  # Optional whitelist of fields a bulk update may change
+    bulk_max_items = 5000
+    
+    def get_bulk_serializer_context(self, service):
+        return {}
+    
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        try:
+            # Get current user from token
+            user_id = request.user.id if hasattr(request.user, 'id') else None
+            
+            if not user_id:
+                return Response({'error': 'User not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
+            
+            if not isinstance(request.data, dict) or not request.data:
+                return Response(
+                    {'error': f"Expected an object with any of: {', '.join(self.bulk_operations)}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            unsupported = [op for op in request.data if op not in self.bulk_operations]
+            if unsupported:
+                return Response(
+                    {'error': f"Unsupported bulk operation(s): {', '.join(unsupported)}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            total = len(request.data.get('create') or [])
+            for op in ('update', 'delete'):
+                spec = request.data.get(op)
+                if spec is not None:
+                    if not isinstance(spec, dict) or not isinstance(spec.get('ids'), list) or not spec['ids']:
+                        raise ValueError(f"'{op}' must be an object with a non-empty 'ids' list")
+                    total += len(spec['ids'])
+            if total > self.bulk_max_items:
+                return Response(
+                    {'error': f'Too many items in one bulk request (max {self.bulk_max_items})'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            service = self.bulk_service.for_user(user_id)
+            results = {}
+            if 'create' in request.data:
+                results['create'] = self._bulk_create(service, request.data['create'], user_id)
+            if 'update' in request.data:
+                results['update'] = self._bulk_update(service, request.data['update'])
+            if 'delete' in request.data:
+                results['delete'] = self._bulk_delete(service, request.data['delete'])
+            return Response(results)
+        except Exception as e:
+            return handle_supabase_exception(e)
+    
+    def _bulk_create(self, service, items, user_id):
+        if not isinstance(items, list):
+            raise ValueError("'create' must be a list")
+        
+        context = self.get_bulk_serializer_context(service)
+        results = [None] * len(items)
+        valid_rows, positions = [], []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results[index] = {'index': index, 'status': 400, 'errors': 'Expected an object'}
+                continue
+            data = dict(item)
+            data['user_id'] = user_id
+            serializer = self.serializer_class(data=data, context=context)
+            if serializer.is_valid():
+                valid_rows.append(dict(serializer.validated_data))
+                positions.append(index)
+            else:
+                results[index] = {'index': index, 'status': 400, 'errors': serializer.errors}
+        
+        try:
+            created = service.create_many(valid_rows) if valid_rows else []
+        except BulkWriteError as e:
+            created = e.results
+        for index, row in zip(positions, created):
+            if isinstance(row, Exception):
+                results[index] = {'index': index, **self.get_bulk_error_result(row)}
+            else:
+                results[index] = {'index': index, 'status': 201, 'id': row.get('id')}
+        return results
+    
+    def get_bulk_error_result(self, exception):
+        # Status and errors of an item whose chunk failed to write
+        if isinstance(exception, ValueError):
+            return {'status': 400, 'errors': {'non_field_errors': [str(exception)]}}
+        if is_unique_violation(exception):
+            return {'status': 409, 'errors': {'non_field_errors': ['A record with these values already exists.']}}
+        return {'status': 503, 'errors': {'non_field_errors': ['Not written: database service error. Please try again.']}}
+    
+    def _bulk_update(self, service, spec):
+        ids, data = spec['ids'], spec.get('data')
+        if not isinstance(data, dict) or not data:
+            raise ValueError("'update' requires a non-empty 'data' object")
+        if self.bulk_update_fields is not None:
+            data = {key: value for key, value in data.items() if key in self.bulk_update_fields}
+            if not data:
+                raise ValueError('No valid fields to update')
+        
+        serializer = self.serializer_class(
+            data=data, partial=True, context=self.get_bulk_serializer_context(service)
+        )
+        serializer.is_valid(raise_exception=True)
+        validated_data = dict(serializer.validated_data)
+        validated_data.pop('user_id', None)
+        
+        updated_ids = {row.get('id') for row in service.update_many(validated_data, ids=ids)}
+        return [
+            {'id': record_id, 'status': 200 if record_id in updated_ids else 404}
+            for record_id in ids
+        ]
+    
+    def _bulk_delete(self, service, spec):
+        ids = spec['ids']
+        deleted_ids = {row.get('id') for row in service.delete_many(ids=ids)}
+        return [
+            {'id': record_id, 'status': 204 if record_id in deleted_ids else 404}
+            for record_id in ids
+        ]
+
+
 def handle_supabase_exception(exception):
     error_message = str(exception)
     
@@ -64,6 +198,18 @@ def handle_supabase_exception(exception):
             status=status.HTTP_503_SERVICE_UNAVAILABLE
         )
     
+    # Handle request deadline overruns - 504
+    if isinstance(exception, SupabaseDeadlineExceededError):
+        logger.error(f"Request deadline exceeded: {error_message}")
+        return Response(
+            {
+                'error': 'The request took too long. Please try again.',
+                'detail': 'Request deadline exceeded while waiting for Supabase.',
+                'error_code': 'DEADLINE_EXCEEDED',
+            },
+            status=status.HTTP_504_GATEWAY_TIMEOUT
+        )
+    
     # Handle Supabase connection errors - 503
     if isinstance(exception, SupabaseConnectionError):
         logger.error(f"Supabase connection error: {error_message}")
@@ -162,6 +308,34 @@ def handle_supabase_error(func):
     return wrapper
 
 
+def get_requested_fields(request, serializer_class):
+    # Parse ?fields=id,first_name into the fields to render and the columns to select.
+    # Returns (None, None) when the client wants full rows.
+    raw = request.query_params.get('fields')
+    if not raw:
+        return None, None
+    fields = [field.strip() for field in raw.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in serializer_class._declared_fields]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return fields, serializer_class.columns_for(fields)
+
+
+def not_found_or_forbidden(service, record_id, not_found_message, forbidden_message='Access denied'):
+    # A tenant-scoped lookup or write matched nothing: the row is either missing
+    # or owned by another user. Only this miss path pays for the extra probe.
+    if service.exists(record_id):
+        return Response({'error': forbidden_message}, status=status.HTTP_403_FORBIDDEN)
+    return Response({'error': not_found_message}, status=status.HTTP_404_NOT_FOUND)
+
+
+async def not_found_or_forbidden_async(service, record_id, not_found_message, forbidden_message='Access denied'):
+    # not_found_or_forbidden() for the Async*Service layer
+    if await service.exists(record_id):
+        return Response({'error': forbidden_message}, status=status.HTTP_403_FORBIDDEN)
+    return Response({'error': not_found_message}, status=status.HTTP_404_NOT_FOUND)
+
+
 def create_success_response(data, message=None, status_code=status.HTTP_200_OK):
     response_data = {'data': data}
     if message:
@@ -169,8 +343,10 @@ def create_success_response(data, message=None, status_code=status.HTTP_200_OK):
     return Response(response_data, status=status_code)
 
 
-def create_list_response(results, count=None):
+def create_list_response(results, count=None, next_cursor=None, previous_cursor=None):
     return Response({
         'count': count if count is not None else len(results),
+        'next': next_cursor,
+        'previous': previous_cursor,
         'results': results
     })
@@ -0,0 +1,824 @@
+# In-memory stand-in for the Supabase client, selected with SUPABASE_BACKEND=fake.
+# It covers the parts of supabase-py the service layer uses, so the API and the
+# services run offline (laptop, CI, benchmarks) with no Supabase project:
+# - table(): the PostgREST builder chain (select/insert/upsert/update/delete,
+#   eq/neq/gt/gte/lt/lte/like/ilike/is_/in_/or_/match filters, order/limit/
+#   offset/range) returning responses with .data and .count
+# - storage.from_(bucket): upload/download/remove/list/create_signed_url/get_public_url
+# - auth: sign_up/sign_in_with_password/update_user and friends, enough for the
+#   auth endpoints to issue tokens
+# - rpc(): no SQL functions exist, so every call fails with PostgREST's
+#   "function not found" error (PGRST202), as before the sql/ scripts are applied
+# - drop_column(): makes a column missing, as before the sql/ script adding it ran;
+#   selecting it fails with 42703 and writing it with PGRST204, like PostgREST
+# Rows are kept as JSON-compatible dicts. The primary key and the constraints in
+# UNIQUE_CONSTRAINTS (optionally partial) are enforced; violations raise
+# postgrest's APIError with code 23505, like PostgreSQL. SUPABASE_FAKE_LATENCY_MS
+# ("5" or "2-20") adds a delay to every call to mimic network round-trips.
+# Data lives in one process-wide FakeStore and is lost on restart.
+
+
+import asyncio
+import copy
+import functools
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+logger = logging.getLogger(__name__)
+
+try:
+    from postgrest.exceptions import APIError
+except ImportError:  # pragma: no cover - postgrest ships with supabase
+    class APIError(Exception):
+        def __init__(self, error):
+            self.code = error.get('code')
+            self.message = error.get('message')
+            self.hint = error.get('hint')
+            self.details = error.get('details')
+            super().__init__(str(error))
+
+try:
+    from storage3.exceptions import StorageApiError
+except ImportError:  # pragma: no cover - storage3 ships with supabase
+    class StorageApiError(Exception):
+        def __init__(self, message, code, status):
+            self.message = message
+            self.code = code
+            self.status = status
+            super().__init__(message)
+
+FAKE_SUPABASE_URL = 'http://fake-supabase.local'
+# Unique constraints enforced on top of the primary key, per table (mirroring sql/;
+# the appointment overlap constraint can't be modelled, only its same-start-time case)
+UNIQUE_CONSTRAINTS = {
+    'appointments': [{'columns': ['user_id', 'date', 'time'], 'unless': {'status': 'Cancelled'}}],
+}
+
+
+def _parse_latency(value):
+    # "5" -> (0.005, 0.005); "2-20" -> (0.002, 0.02); empty/0 -> None
+    if not value:
+        return None
+    if isinstance(value, (int, float)):
+        low = high = float(value)
+    else:
+        parts = str(value).split('-', 1)
+        low = float(parts[0])
+        high = float(parts[1]) if len(parts) > 1 else low
+    if high <= 0:
+        return None
+    return (low / 1000.0, high / 1000.0)
+
+
+def _json_row(row):
+    # What PostgREST would hand back: JSON types only
+    return json.loads(json.dumps(row, default=str))
+
+
+def _unique_constraint(constraint):
+    # ['col', ...] or {'columns': [...], 'unless': {'col': value}} (a partial index)
+    if isinstance(constraint, dict):
+        return tuple(constraint['columns']), dict(constraint.get('unless') or {})
+    return tuple(constraint), {}
+
+
+def _excluded(row, unless):
+    return any(str(row.get(column)) == str(value) for column, value in unless.items())
+
+
+class FakeStore:
+    # Tables, files and users shared by every fake client in the process
+
+    def __init__(self, latency_ms=None, unique=None):
+        # unique: per-table constraints replacing UNIQUE_CONSTRAINTS ({} for none)
+        self.tables = {}
+        if unique is None:
+            unique = UNIQUE_CONSTRAINTS
+        self.unique = {table: [_unique_constraint(constraint) for constraint in constraints]
+                       for table, constraints in unique.items()}
+        self.files = {}
+        self.users = {}
+        # table -> columns that do not exist (see drop_column())
+        self.missing_columns = {}
+        self.latency = _parse_latency(latency_ms)
+        self.requests = 0
+        self.lock = threading.RLock()
+
+    def _delay_seconds(self):
+        self.requests += 1
+        if self.latency is None:
+            return 0
+        low, high = self.latency
+        return random.uniform(low, high)
+
+    def delay(self):
+        seconds = self._delay_seconds()
+        if seconds:
+            time.sleep(seconds)
+
+    async def async_delay(self):
+        seconds = self._delay_seconds()
+        if seconds:
+            await asyncio.sleep(seconds)
+
+    def add_unique(self, table, *columns, unless=None):
+        # unless={'status': 'Cancelled'} leaves matching rows out, like a partial index
+        with self.lock:
+            self.unique.setdefault(table, []).append((tuple(columns), dict(unless or {})))
+
+    def drop_column(self, table, column):
+        with self.lock:
+            self.missing_columns.setdefault(table, set()).add(column)
+            for row in self.rows(table):
+                row.pop(column, None)
+
+    def rows(self, table):
+        return self.tables.setdefault(table, [])
+
+    def clear(self):
+        with self.lock:
+            self.tables.clear()
+            self.files.clear()
+            self.users.clear()
+            self.requests = 0
+
+
+# ---------------------------------------------------------------------------
+# Filtering
+# ---------------------------------------------------------------------------
+
+def _comparable(value, other):
+    # Coerce a filter value (usually a string off the query string) to the row value's type
+    if isinstance(value, bool):
+        if isinstance(other, str):
+            return value, other.lower() in ('true', 't', '1')
+        return value, bool(other)
+    if isinstance(value, (int, float)):
+        if isinstance(other, (int, float)) and not isinstance(other, bool):
+            return value, other
+        try:
+            return value, float(other)
+        except (TypeError, ValueError):
+            return str(value), str(other)
+    return str(value), str(other)
+
+
+@functools.lru_cache(maxsize=1024)
+def _like_regex(pattern, case_insensitive):
+    # % and * match any run, _ one character, a backslash escapes the next one
+    parts, escaped = [], False
+    for char in pattern:
+        if escaped:
+            parts.append(re.escape(char))
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char in '%*':
+            parts.append('.*')
+        elif char == '_':
+            parts.append('.')
+        else:
+            parts.append(re.escape(char))
+    flags = re.IGNORECASE | re.DOTALL if case_insensitive else re.DOTALL
+    return re.compile(''.join(parts) + r'\Z', flags)
+
+
+def _like(pattern, value, case_insensitive):
+    if value is None:
+        return False
+    return _like_regex(str(pattern), case_insensitive).match(str(value)) is not None
+
+
+def _matches(row, column, op, expected):
+    value = row.get(column)
+    if op == 'is':
+        if expected is None or str(expected).lower() == 'null':
+            return value is None
+        if value is None:
+            return False
+        return _comparable(value, expected)[0] == _comparable(value, expected)[1]
+    if op == 'in':
+        if value is None:
+            return False
+        return any(left == right for left, right in (_comparable(value, item) for item in expected))
+    if op in ('like', 'ilike'):
+        return _like(expected, value, op == 'ilike')
+    if value is None or expected is None:
+        # SQL comparisons with NULL are never true
+        return False
+    left, right = _comparable(value, expected)
+    try:
+        if op == 'eq':
+            return left == right
+        if op == 'neq':
+            return left != right
+        if op == 'gt':
+            return left > right
+        if op == 'gte':
+            return left >= right
+        if op == 'lt':
+            return left < right
+        if op == 'lte':
+            return left <= right
+    except TypeError:
+        return False
+    raise APIError({'code': 'PGRST100', 'message': f'Unsupported operator: {op}', 'hint': None, 'details': None})
+
+
+def _split_top_level(text):
+    # Split a PostgREST logic tree on commas outside parentheses and quotes
+    parts, depth, current, quoted, escaped = [], 0, [], False, False
+    for char in text:
+        if escaped:
+            current.append(char)
+            escaped = False
+            continue
+        if char == '\\' and quoted:
+            current.append(char)
+            escaped = True
+            continue
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == '(':
+            depth += 1
+        elif not quoted and char == ')':
+            depth -= 1
+        if char == ',' and depth == 0 and not quoted:
+            parts.append(''.join(current))
+            current = []
+        else:
+            current.append(char)
+    if current:
+        parts.append(''.join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _unquote(value):
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        return re.sub(r'\\(.)', r'\1', value[1:-1])
+    return value
+
+
+def _parse_logic(expression):
+    # "a.eq.1,and(b.gt.2,c.is.null)" -> list of predicates (combined by the caller)
+    predicates = []
+    for part in _split_top_level(expression):
+        group = re.match(r'^(not\.)?(and|or)\((.*)\)$', part, re.DOTALL)
+        if group:
+            negate, kind, inner = group.group(1), group.group(2), group.group(3)
+            children = _parse_logic(inner)
+            combine = all if kind == 'and' else any
+
+            def predicate(row, children=children, combine=combine, negate=negate):
+                result = combine(child(row) for child in children)
+                return not result if negate else result
+            predicates.append(predicate)
+            continue
+        column, rest = part.split('.', 1)
+        negate = rest.startswith('not.')
+        if negate:
+            rest = rest[4:]
+        op, value = rest.split('.', 1)
+        if op == 'in':
+            expected = [_unquote(item) for item in _split_top_level(value.strip()[1:-1])]
+        else:
+            expected = _unquote(value)
+
+        def predicate(row, column=column, op=op, expected=expected, negate=negate):
+            result = _matches(row, column, op, expected)
+            return not result if negate else result
+        predicates.append(predicate)
+    return predicates
+
+
+def _sort_key(value):
+    # Nulls sort last ascending (first descending), as in PostgreSQL
+    if value is None:
+        return (1, 0, '')
+    if isinstance(value, bool):
+        return (0, 0, int(value))
+    if isinstance(value, (int, float)):
+        return (0, 0, value)
+    return (0, 1, str(value))
+
+
+# ---------------------------------------------------------------------------
+# PostgREST builder
+# ---------------------------------------------------------------------------
+
+class FakeResponse:
+
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+    def __repr__(self):
+        return f"FakeResponse(data={self.data!r}, count={self.count!r})"
+
+
+class FakeQueryBuilder:
+
+    def __init__(self, store, table):
+        self._store = store
+        self._table = table
+        self._method = 'select'
+        self._columns = '*'
+        self._count = None
+        self._payload = None
+        self._returning = 'representation'
+        self._on_conflict = None
+        self._filters = []
+        self._orders = []
+        self._limit = None
+        self._offset = 0
+
+    # -- verbs ---------------------------------------------------------------
+
+    def select(self, *columns, count=None, **kwargs):
+        self._columns = ','.join(columns) if columns else '*'
+        self._count = count
+        return self
+
+    def insert(self, json, *, count=None, returning='representation', upsert=False, **kwargs):
+        self._method = 'upsert' if upsert else 'insert'
+        self._payload = json
+        self._count = count
+        self._returning = str(returning)
+        return self
+
+    def upsert(self, json, *, count=None, returning='representation', on_conflict='', **kwargs):
+        self._method = 'upsert'
+        self._payload = json
+        self._count = count
+        self._returning = str(returning)
+        self._on_conflict = tuple(column.strip() for column in on_conflict.split(',') if column.strip()) or None
+        return self
+
+    def update(self, json, *, count=None, returning='representation', **kwargs):
+        self._method = 'update'
+        self._payload = json
+        self._count = count
+        self._returning = str(returning)
+        return self
+
+    def delete(self, *, count=None, returning='representation', **kwargs):
+        self._method = 'delete'
+        self._count = count
+        self._returning = str(returning)
+        return self
+
+    # -- filters -------------------------------------------------------------
+
+    def _filter(self, column, op, value, negate=False):
+        def predicate(row):
+            result = _matches(row, column, op, value)
+            return not result if negate else result
+        self._filters.append(predicate)
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, 'eq', value)
+
+    def neq(self, column, value):
+        return self._filter(column, 'neq', value)
+
+    def gt(self, column, value):
+        return self._filter(column, 'gt', value)
+
+    def gte(self, column, value):
+        return self._filter(column, 'gte', value)
+
+    def lt(self, column, value):
+        return self._filter(column, 'lt', value)
+
+    def lte(self, column, value):
+        return self._filter(column, 'lte', value)
+
+    def like(self, column, pattern):
+        return self._filter(column, 'like', pattern)
+
+    def ilike(self, column, pattern):
+        return self._filter(column, 'ilike', pattern)
+
+    def is_(self, column, value):
+        return self._filter(column, 'is', value)
+
+    def in_(self, column, values):
+        return self._filter(column, 'in', list(values))
+
+    def match(self, query):
+        for column, value in query.items():
+            self.eq(column, value)
+        return self
+
+    def or_(self, filters, reference_table=None):
+        predicates = _parse_logic(filters)
+        self._filters.append(lambda row: any(predicate(row) for predicate in predicates))
+        return self
+
+    def filter(self, column, operator, criteria):
+        expression = f"{column}.{operator}.{criteria}"
+        predicates = _parse_logic(expression)
+        self._filters.append(lambda row: all(predicate(row) for predicate in predicates))
+        return self
+
+    # -- modifiers -----------------------------------------------------------
+
+    def order(self, column, *, desc=False, nullsfirst=None, **kwargs):
+        self._orders.append((column, desc, nullsfirst))
+        return self
+
+    def limit(self, size, **kwargs):
+        self._limit = size
+        return self
+
+    def offset(self, size):
+        self._offset = size
+        return self
+
+    def range(self, start, end, **kwargs):
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    def retry(self, enabled):
+        return self
+
+    # -- execution -----------------------------------------------------------
+
+    def execute(self):
+        self._store.delay()
+        return self._run()
+
+    def _project(self, row):
+        if self._columns.strip() == '*':
+            return _json_row(row)
+        columns = [column.strip() for column in self._columns.split(',') if column.strip()]
+        return _json_row({column: row.get(column) for column in columns})
+
+    def _result(self, rows, total=None):
+        if self._returning == 'minimal' or self._returning.endswith('.minimal'):
+            return FakeResponse([], count=total if self._count else None)
+        return FakeResponse([self._project(row) for row in rows], count=total if self._count else None)
+
+    def _matching(self, rows):
+        return [row for row in rows if all(predicate(row) for predicate in self._filters)]
+
+    def _check_unique(self, table_rows, candidate, ignore=None):
+        constraints = [(('id',), {})] + self._store.unique.get(self._table, [])
+        for columns, unless in constraints:
+            values = [candidate.get(column) for column in columns]
+            if any(value is None for value in values) or _excluded(candidate, unless):
+                continue
+            keys = [(column, str(value)) for column, value in zip(columns, values)]
+            for row in table_rows:
+                if row is ignore or not all(str(row.get(column)) == key for column, key in keys):
+                    continue
+                if not _excluded(row, unless):
+                    raise APIError({
+                        'code': '23505',
+                        'message': f'duplicate key value violates unique constraint "{self._table}_{"_".join(columns)}_key"',
+                        'hint': None,
+                        'details': f'Key ({", ".join(columns)})=({", ".join(str(v) for v in values)}) already exists.',
+                    })
+
+    def _check_columns(self):
+        missing = self._store.missing_columns.get(self._table)
+        if not missing:
+            return
+        selected = {column.strip() for column in self._columns.split(',')}
+        for column in sorted(missing & selected):
+            raise APIError({
+                'code': '42703',
+                'message': f'column {self._table}.{column} does not exist',
+                'hint': None,
+                'details': None,
+            })
+        records = self._payload if isinstance(self._payload, list) else [self._payload or {}]
+        written = {column for record in records for column in record}
+        for column in sorted(missing & written):
+            raise APIError({
+                'code': 'PGRST204',
+                'message': f"Could not find the '{column}' column of '{self._table}' in the schema cache",
+                'hint': None,
+                'details': None,
+            })
+
+    def _run(self):
+        store = self._store
+        with store.lock:
+            self._check_columns()
+            table_rows = store.rows(self._table)
+            if self._method in ('insert', 'upsert'):
+                return self._run_insert(table_rows)
+            matched = self._matching(table_rows)
+            if self._method == 'update':
+                updated = []
+                for row in matched:
+                    candidate = dict(row, **_json_row(self._payload))
+                    self._check_unique(table_rows, candidate, ignore=row)
+                    updated.append((row, candidate))
+                for row, candidate in updated:
+                    row.clear()
+                    row.update(candidate)
+                return self._result(matched, total=len(matched))
+            if self._method == 'delete':
+                doomed = {id(row) for row in matched}
+                table_rows[:] = [row for row in table_rows if id(row) not in doomed]
+                return self._result(matched, total=len(matched))
+
+            for column, descending, nulls_first in reversed(self._orders):
+                matched.sort(key=lambda row: _sort_key(row.get(column)), reverse=descending)
+                if nulls_first is not None:
+                    nulls = [row for row in matched if row.get(column) is None]
+                    values = [row for row in matched if row.get(column) is not None]
+                    matched = nulls + values if nulls_first else values + nulls
+            total = len(matched)
+            page = matched[self._offset:]
+            if self._limit is not None:
+                page = page[:self._limit]
+            return self._result(page, total=total)
+
+    def _run_insert(self, table_rows):
+        records = self._payload if isinstance(self._payload, list) else [self._payload]
+        written = []
+        staged = list(table_rows)
+        for record in records:
+            row = _json_row(record)
+            row.setdefault('id', str(uuid.uuid4()))
+            if self._method == 'upsert':
+                conflict = self._on_conflict or ('id',)
+                existing = next((
+                    current for current in staged
+                    if all(str(current.get(column)) == str(row.get(column)) for column in conflict)
+                ), None)
+                if existing is not None:
+                    merged = dict(existing, **row)
+                    self._check_unique(staged, merged, ignore=existing)
+                    existing.update(merged)
+                    written.append(existing)
+                    continue
+            self._check_unique(staged, row)
+            staged.append(row)
+            written.append(row)
+        # All-or-nothing, like a single INSERT statement
+        table_rows[:] = staged
+        return self._result(written, total=len(written))
+
+
+class AsyncFakeQueryBuilder(FakeQueryBuilder):
+
+    async def execute(self):
+        await self._store.async_delay()
+        return self._run()
+
+
+class FakeRpcCall:
+
+    def __init__(self, store, function):
+        self._store = store
+        self._function = function
+
+    def _missing(self):
+        return APIError({
+            'code': 'PGRST202',
+            'message': f'Could not find the function public.{self._function} in the schema cache',
+            'hint': None,
+            'details': None,
+        })
+
+    def execute(self):
+        self._store.delay()
+        raise self._missing()
+
+
+class AsyncFakeRpcCall(FakeRpcCall):
+
+    async def execute(self):
+        await self._store.async_delay()
+        raise self._missing()
+
+
+# ---------------------------------------------------------------------------
+# Storage
+# ---------------------------------------------------------------------------
+
+def _read_file(file):
+    if isinstance(file, (bytes, bytearray)):
+        return bytes(file)
+    if isinstance(file, str) and os.path.exists(file):
+        with open(file, 'rb') as handle:
+            return handle.read()
+    if hasattr(file, 'read'):
+        return file.read()
+    return str(file).encode()
+
+
+class FakeBucket:
+
+    def __init__(self, store, bucket):
+        self._store = store
+        self._bucket = bucket
+
+    def _key(self, path):
+        return (self._bucket, path.lstrip('/'))
+
+    def _url(self, kind, path):
+        return f"{FAKE_SUPABASE_URL}/storage/v1/object/{kind}/{self._bucket}/{path.lstrip('/')}"
+
+    def upload(self, path, file, file_options=None):
+        self._store.delay()
+        options = file_options or {}
+        upsert = str(options.get('upsert', options.get('x-upsert', 'false'))).lower() == 'true'
+        with self._store.lock:
+            key = self._key(path)
+            if key in self._store.files and not upsert:
+                raise StorageApiError('The resource already exists', 'Duplicate', 409)
+            self._store.files[key] = {
+                'data': _read_file(file),
+                'content_type': options.get('content-type', 'application/octet-stream'),
+            }
+        return SimpleNamespace(path=path, full_path=f"{self._bucket}/{path}")
+
+    def download(self, path, options=None):
+        self._store.delay()
+        entry = self._store.files.get(self._key(path))
+        if entry is None:
+            raise StorageApiError('Object not found', 'not_found', 404)
+        return entry['data']
+
+    def remove(self, paths):
+        self._store.delay()
+        removed = []
+        with self._store.lock:
+            for path in paths:
+                if self._store.files.pop(self._key(path), None) is not None:
+                    removed.append({'name': path, 'bucket_id': self._bucket})
+        return removed
+
+    def list(self, path=None, options=None):
+        self._store.delay()
+        prefix = (path or '').strip('/')
+        names = []
+        for bucket, key in list(self._store.files):
+            if bucket == self._bucket and (not prefix or key.startswith(prefix + '/')):
+                names.append({'name': key[len(prefix) + 1:] if prefix else key})
+        return names
+
+    def create_signed_url(self, path, expires_in, options=None):
+        self._store.delay()
+        if self._key(path) not in self._store.files:
+            raise StorageApiError('Object not found', 'not_found', 404)
+        token = hashlib.sha256(f"{self._bucket}/{path}:{expires_in}".encode()).hexdigest()[:32]
+        url = f"{self._url('sign', path)}?token={token}"
+        return {'signedURL': url, 'signedUrl': url}
+
+    def get_public_url(self, path, options=None):
+        return self._url('public', path)
+
+
+class FakeStorage:
+
+    def __init__(self, store):
+        self._store = store
+
+    def from_(self, bucket):
+        return FakeBucket(self._store, bucket)
+
+
+# ---------------------------------------------------------------------------
+# Auth
+# ---------------------------------------------------------------------------
+
+class FakeAuth:
+    # Email/password users only; tokens are issued by the backend itself
+
+    def __init__(self, store):
+        self._store = store
+        self._current = None
+
+    @staticmethod
+    def _hash(password):
+        return hashlib.sha256(password.encode()).hexdigest()
+
+    def _response(self, user):
+        self._current = user
+        return SimpleNamespace(user=user, session=SimpleNamespace(access_token=uuid.uuid4().hex, user=user))
+
+    def sign_up(self, credentials):
+        self._store.delay()
+        email = credentials['email'].lower()
+        with self._store.lock:
+            if email in self._store.users:
+                raise Exception('User already registered')
+            user = SimpleNamespace(id=str(uuid.uuid4()), email=email)
+            self._store.users[email] = {'user': user, 'password': self._hash(credentials['password'])}
+        return self._response(user)
+
+    def sign_in_with_password(self, credentials):
+        self._store.delay()
+        entry = self._store.users.get(credentials['email'].lower())
+        if entry is None or entry['password'] != self._hash(credentials['password']):
+            raise Exception('Invalid login credentials')
+        return self._response(entry['user'])
+
+    def update_user(self, attributes):
+        self._store.delay()
+        if self._current is None:
+            raise Exception('No session')
+        with self._store.lock:
+            entry = self._store.users.pop(self._current.email)
+            if 'password' in attributes:
+                entry['password'] = self._hash(attributes['password'])
+            if 'email' in attributes:
+                self._current.email = attributes['email'].lower()
+            self._store.users[self._current.email] = entry
+        return SimpleNamespace(user=self._current)
+
+    def reset_password_for_email(self, email, options=None):
+        self._store.delay()
+        return None
+
+    def verify_otp(self, params):
+        self._store.delay()
+        raise Exception('Token has expired or is invalid')
+
+    def sign_out(self, options=None):
+        self._current = None
+
+
+# ---------------------------------------------------------------------------
+# Clients
+# ---------------------------------------------------------------------------
+
+class FakeSupabaseClient:
+    query_builder_class = FakeQueryBuilder
+    rpc_call_class = FakeRpcCall
+
+    def __init__(self, store):
+        self.store = store
+        self.supabase_url = FAKE_SUPABASE_URL
+        self.storage = FakeStorage(store)
+        # One auth session per client, as with the real client
+        self.auth = FakeAuth(store)
+
+    def table(self, table_name):
+        return self.query_builder_class(self.store, table_name)
+
+    from_ = table
+
+    def rpc(self, fn, params=None, **kwargs):
+        return self.rpc_call_class(self.store, fn)
+
+
+class AsyncFakeSupabaseClient(FakeSupabaseClient):
+    query_builder_class = AsyncFakeQueryBuilder
+    rpc_call_class = AsyncFakeRpcCall
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _setting(name, default=None):
+    value = os.getenv(name)
+    if value is not None:
+        return value
+    try:
+        from django.conf import settings
+        return getattr(settings, name, default)
+    except Exception:
+        return default
+
+
+def get_fake_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = FakeStore(latency_ms=_setting('SUPABASE_FAKE_LATENCY_MS'))
+                logger.info("Using the in-memory fake Supabase backend")
+    return _store
+
+
+def reset_fake_store(store=None):
+    # Swap in a fresh (or the given) store; clients created afterwards use it
+    global _store
+    with _store_lock:
+        _store = store
+
+
+def create_fake_client(store=None):
+    return FakeSupabaseClient(store or get_fake_store())
+
+
+def create_async_fake_client(store=None):
+    return AsyncFakeSupabaseClient(store or get_fake_store())
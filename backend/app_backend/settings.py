@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import json
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -49,6 +50,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'app.middleware.MetricsMiddleware',
+    'app.middleware.TracingMiddleware',
+    'app.middleware.DeadlineMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -57,6 +61,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'app.middleware.IdentityMapMiddleware',
 ]
 
 ROOT_URLCONF = 'app_backend.urls'
@@ -133,17 +138,126 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_KEY = os.getenv('SUPABASE_KEY')
 
-if not SUPABASE_URL:
-    raise ValueError(
-        "SUPABASE_URL environment variable is not set. "
-        "Please set it in your .env file or environment."
-    )
-
-if not SUPABASE_KEY:
-    raise ValueError(
-        "SUPABASE_KEY environment variable is not set. "
-        "Please set it in your .env file or environment."
-    )
+# 'supabase' (default) or 'fake': an in-memory stand-in (app_backend/fake_supabase.py)
+# for running the API, tests and benchmarks without a Supabase project
+SUPABASE_BACKEND = os.getenv('SUPABASE_BACKEND', 'supabase')
+# Latency injected into every fake call, in ms: a fixed value ('5') or a range ('2-20')
+SUPABASE_FAKE_LATENCY_MS = os.getenv('SUPABASE_FAKE_LATENCY_MS', '')
+
+# The fake backend needs no credentials
+if SUPABASE_BACKEND != 'fake':
+    if not SUPABASE_URL:
+        raise ValueError(
+            "SUPABASE_URL environment variable is not set. "
+            "Please set it in your .env file or environment."
+        )
+
+    if not SUPABASE_KEY:
+        raise ValueError(
+            "SUPABASE_KEY environment variable is not set. "
+            "Please set it in your .env file or environment."
+        )
+
+# Serve entity list/retrieve through async views (needs an ASGI server, see Procfile)
+ASYNC_API_VIEWS = os.getenv('ASYNC_API_VIEWS', 'False') == 'True'
+
+# Read-through cache for single-record lookups (BaseSupabaseService.get), off by default.
+# Backend: 'none', 'django' (CACHES alias below, shared by all workers) or 'lru'
+# (in-process, per worker). Another worker's writes never invalidate an 'lru' cache, so
+# its entries live at most SUPABASE_RECORD_CACHE_LOCAL_MAX_TTL seconds whatever the
+# table's TTL; use 'django' with a shared cache (Redis, Memcached) for longer TTLs.
+SUPABASE_RECORD_CACHE_BACKEND = os.getenv('SUPABASE_RECORD_CACHE_BACKEND', 'none')
+SUPABASE_RECORD_CACHE_MAX_ENTRIES = int(os.getenv('SUPABASE_RECORD_CACHE_MAX_ENTRIES', '10000'))
+SUPABASE_RECORD_CACHE_LOCAL_MAX_TTL = float(os.getenv('SUPABASE_RECORD_CACHE_LOCAL_MAX_TTL', '5'))
+SUPABASE_RECORD_CACHE_ALIAS = os.getenv('SUPABASE_RECORD_CACHE_ALIAS', 'default')
+# Per-table TTL overrides in seconds, e.g. {'patients': 600}; 0 disables a table
+SUPABASE_RECORD_CACHE_TTLS = {}
+
+# HTTP connection pool behind the Supabase client (see app_backend/supabase_utils.py).
+# Timeouts are in seconds; Storage gets its own read timeout for large uploads.
+SUPABASE_HTTP_MAX_CONNECTIONS = int(os.getenv('SUPABASE_HTTP_MAX_CONNECTIONS', '100'))
+SUPABASE_HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('SUPABASE_HTTP_MAX_KEEPALIVE_CONNECTIONS', '20'))
+SUPABASE_HTTP_KEEPALIVE_EXPIRY = float(os.getenv('SUPABASE_HTTP_KEEPALIVE_EXPIRY', '30'))
+SUPABASE_HTTP2 = os.getenv('SUPABASE_HTTP2', 'False') == 'True'
+SUPABASE_CONNECT_TIMEOUT = float(os.getenv('SUPABASE_CONNECT_TIMEOUT', '5'))
+SUPABASE_POSTGREST_TIMEOUT = float(os.getenv('SUPABASE_POSTGREST_TIMEOUT', '30'))
+SUPABASE_STORAGE_TIMEOUT = float(os.getenv('SUPABASE_STORAGE_TIMEOUT', '30'))
+# One client (and pool) per worker thread instead of one shared by all threads
+SUPABASE_CLIENT_PER_THREAD = os.getenv('SUPABASE_CLIENT_PER_THREAD', 'False') == 'True'
+
+# Thread pool behind supabase_service.gather() (parallel multi-table reads)
+SUPABASE_FANOUT_WORKERS = int(os.getenv('SUPABASE_FANOUT_WORKERS', '16'))
+# Default per-call timeout in seconds for gather()
+SUPABASE_FANOUT_TIMEOUT = float(os.getenv('SUPABASE_FANOUT_TIMEOUT', '10'))
+
+# Bearer token the Prometheus scraper must send to /api/metrics
+# ("Authorization: Bearer <token>"); the endpoint answers 404 while it is empty.
+# /api/health/?deep=true adds cache, pool and breaker stats only for this token.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Append every request's trace spans to this file as OpenTelemetry-style JSON lines (off when empty)
+TRACE_EXPORT_FILE = os.getenv('TRACE_EXPORT_FILE', '')
+
+# Retries for idempotent Supabase reads that hit a transient error (full-jitter backoff, seconds)
+SUPABASE_READ_RETRIES = int(os.getenv('SUPABASE_READ_RETRIES', '2'))
+SUPABASE_RETRY_BASE_DELAY = float(os.getenv('SUPABASE_RETRY_BASE_DELAY', '0.1'))
+SUPABASE_RETRY_MAX_DELAY = float(os.getenv('SUPABASE_RETRY_MAX_DELAY', '1.0'))
+# Per-table circuit breaker: opens after this many consecutive transient failures,
+# fails fast while open, and lets one probe through after the reset timeout
+SUPABASE_BREAKER_FAILURE_THRESHOLD = int(os.getenv('SUPABASE_BREAKER_FAILURE_THRESHOLD', '5'))
+SUPABASE_BREAKER_RESET_TIMEOUT = float(os.getenv('SUPABASE_BREAKER_RESET_TIMEOUT', '30'))
+
+# Deadline budget per request in seconds (0 disables). Supabase calls get at most the
+# remaining budget as their timeout, and nothing is retried once it is spent (504).
+REQUEST_DEADLINE_SECONDS = float(os.getenv('REQUEST_DEADLINE_SECONDS', '10'))
+# Per-endpoint overrides keyed by URL name; x-ray uploads go to Storage and need longer
+REQUEST_DEADLINES = {
+    'xray-list': 30,
+    'xray-detail': 30,
+}
+
+# Ranked patient search: the trigram search function from sql/patient_search.sql,
+# which orders matches by similarity across all pages. Until that function is
+# installed (or with this set to ''), search runs as ilike filters in name order and
+# exact/prefix matches are only moved up within each page.
+PATIENT_SEARCH_RPC = os.getenv('PATIENT_SEARCH_RPC', 'search_patients')
+
+# In-memory n-gram index behind /api/patients/autocomplete/, one per tenant and worker.
+# Off by default: autocomplete then answers from the database search. Each worker only
+# sees its own writes, so with several workers a patient added or renamed through
+# another one can be missing or stale in the suggestions until the index is rebuilt
+# after the TTL (seconds); least recently used tenants beyond MAX_TENANTS are dropped.
+PATIENT_AUTOCOMPLETE_INDEX = os.getenv('PATIENT_AUTOCOMPLETE_INDEX', 'False') == 'True'
+PATIENT_AUTOCOMPLETE_TTL = float(os.getenv('PATIENT_AUTOCOMPLETE_TTL', '300'))
+PATIENT_AUTOCOMPLETE_MAX_TENANTS = int(os.getenv('PATIENT_AUTOCOMPLETE_MAX_TENANTS', '100'))
+
+# Appointment bookings are checked for overlaps against the day's schedule before
+# writing. Set to False to let the constraint from sql/appointment_slots.sql alone
+# reject double bookings.
+APPOINTMENT_CONFLICT_PRECHECK = os.getenv('APPOINTMENT_CONFLICT_PRECHECK', 'True') == 'True'
+# Length of appointments saved without duration_minutes (keep equal to the column default)
+APPOINTMENT_DEFAULT_DURATION = int(os.getenv('APPOINTMENT_DEFAULT_DURATION', '30'))
+# Per-tenant, per-day interval index used for overlap checks and free slots, one per
+# worker. Days are reloaded after the TTL (seconds, 0 = read the day on every check) to
+# pick up other workers' bookings, so free slots may be that much behind them; least
+# recently used days beyond MAX_DAYS are dropped.
+APPOINTMENT_SCHEDULE_TTL = float(os.getenv('APPOINTMENT_SCHEDULE_TTL', '5'))
+APPOINTMENT_SCHEDULE_MAX_DAYS = int(os.getenv('APPOINTMENT_SCHEDULE_MAX_DAYS', '10000'))
+# Opening hours per weekday for /api/appointments/free_slots/, as 'HH:MM-HH:MM' windows
+# (several per day for breaks; missing days are closed). APPOINTMENT_WORKING_HOURS takes
+# the same mapping as JSON, e.g. {"mon": ["08:00-12:00", "13:00-18:00"], ...}
+APPOINTMENT_WORKING_HOURS = json.loads(os.getenv('APPOINTMENT_WORKING_HOURS', 'null')) or {
+    weekday: ['08:00-18:00'] for weekday in ('mon', 'tue', 'wed', 'thu', 'fri', 'sat')
+}
+# Free slots start on this grid (minutes) from each opening time
+APPOINTMENT_SLOT_STEP = int(os.getenv('APPOINTMENT_SLOT_STEP', '15'))
+# Per-day status counts behind /api/appointments/calendar/ are cached per tenant and
+# month for this many seconds (0 = count on every request); any appointment write
+# drops the tenant's months on this worker, writes through other workers show up once
+# the TTL has passed. APPOINTMENT_CALENDAR_RPC names the grouped-count function
+# from sql/appointment_calendar.sql; empty reads the month's date/status columns instead.
+APPOINTMENT_CALENDAR_TTL = float(os.getenv('APPOINTMENT_CALENDAR_TTL', '5'))
+APPOINTMENT_CALENDAR_RPC = os.getenv('APPOINTMENT_CALENDAR_RPC', '')
 
 # =============================================================================
 # CORS CONFIGURATION
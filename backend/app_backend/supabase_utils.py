@@ -1,9 +1,13 @@
 import os
 import time
+import asyncio
 import logging
 import threading
+import weakref
 from functools import wraps
 
+import httpx
+
 # Configure logger
 logger = logging.getLogger(__name__)
 
@@ -12,8 +16,18 @@ _supabase_client = None
 _supabase_initialized = False
 _initialization_lock = threading.Lock()
 
+# Async clients, one per event loop: their httpx.AsyncClient is bound to the loop it was created on
+_async_supabase_clients = weakref.WeakKeyDictionary()
+
+# Per-thread clients when SUPABASE_CLIENT_PER_THREAD is on
+_thread_local = threading.local()
+
 # Configuration defaults
-DEFAULT_CONNECTION_TIMEOUT = 30
+DEFAULT_CONNECTION_TIMEOUT = 30  # Read timeout (seconds) for PostgREST and Storage calls
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
 DEFAULT_MAX_RETRIES = 3
 RETRY_DELAY_BASE = 1.0  # Base delay for exponential backoff
 
@@ -42,6 +56,10 @@ def retry_with_backoff(max_retries=None, exceptions=(Exception,)):
                     last_exception = e
                     if attempt < retries:
                         delay = RETRY_DELAY_BASE * (2 ** attempt)
+                        budget = _remaining_budget()
+                        if budget is not None and budget < delay:
+                            logger.error(f"Not retrying {func.__name__}: request deadline too close ({budget:.2f}s left)")
+                            break
                         logger.warning(
                             f"Attempt {attempt + 1}/{retries + 1} failed for {func.__name__}: {e}. "
                             f"Retrying in {delay:.1f}s..."
@@ -91,9 +109,287 @@ def get_supabase_key():
     return key
 
 
+def _get_config(name, default):
+    # Environment first, then Django settings, then the module default
+    value = os.getenv(name)
+    if value is None:
+        try:
+            from django.conf import settings
+            value = getattr(settings, name, None)
+        except Exception:
+            value = None
+    return default if value is None else value
+
+
+def _as_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+
+def uses_fake_backend():
+    # SUPABASE_BACKEND=fake swaps the real client for the in-memory one in app_backend.fake_supabase
+    return str(_get_config('SUPABASE_BACKEND', 'supabase')).strip().lower() == 'fake'
+
+
+def get_http_pool_config():
+    http2 = _as_bool(_get_config('SUPABASE_HTTP2', False))
+    if http2:
+        try:
+            import h2  # noqa: F401 - httpx needs it for HTTP/2
+        except ImportError:
+            logger.warning("SUPABASE_HTTP2 is set but the h2 package is not installed; using HTTP/1.1")
+            http2 = False
+    return {
+        'max_connections': int(_get_config('SUPABASE_HTTP_MAX_CONNECTIONS', DEFAULT_MAX_CONNECTIONS)),
+        'max_keepalive_connections': int(
+            _get_config('SUPABASE_HTTP_MAX_KEEPALIVE_CONNECTIONS', DEFAULT_MAX_KEEPALIVE_CONNECTIONS)
+        ),
+        'keepalive_expiry': float(_get_config('SUPABASE_HTTP_KEEPALIVE_EXPIRY', DEFAULT_KEEPALIVE_EXPIRY)),
+        'http2': http2,
+        'connect_timeout': float(_get_config('SUPABASE_CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT)),
+        'postgrest_timeout': float(_get_config('SUPABASE_POSTGREST_TIMEOUT', DEFAULT_CONNECTION_TIMEOUT)),
+        'storage_timeout': float(_get_config('SUPABASE_STORAGE_TIMEOUT', DEFAULT_CONNECTION_TIMEOUT)),
+        'per_thread': _as_bool(_get_config('SUPABASE_CLIENT_PER_THREAD', False)),
+    }
+
+
+class _PoolStats:
+    # Request counters shared by every transport built in this process
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+    
+    def begin(self):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+    
+    def end(self, failed=False):
+        with self._lock:
+            self.in_flight -= 1
+            if failed:
+                self.errors += 1
+
+
+_pool_stats = _PoolStats()
+_transports = weakref.WeakSet()
+
+# Called as observer(request, nbytes) once a response body has been read
+_response_observers = []
+
+# Returns the seconds left in the current request's deadline, or None (see set_budget_provider)
+_budget_provider = None
+# Floor for a clamped timeout, so an almost-spent budget still fails as a timeout
+MIN_REQUEST_TIMEOUT = 0.05
+
+
+def set_budget_provider(provider):
+    global _budget_provider
+    _budget_provider = provider
+
+
+def _remaining_budget():
+    if _budget_provider is None:
+        return None
+    try:
+        return _budget_provider()
+    except Exception:
+        return None
+
+
+def add_response_observer(observer):
+    if observer not in _response_observers:
+        _response_observers.append(observer)
+
+
+def _notify_response(request, nbytes):
+    for observer in _response_observers:
+        try:
+            observer(request, nbytes)
+        except Exception as e:
+            logger.debug(f"Response observer failed: {e}")
+
+
+class _CountingStream(httpx.SyncByteStream):
+    
+    def __init__(self, stream, request):
+        self._stream = stream
+        self._request = request
+        self._nbytes = 0
+    
+    def __iter__(self):
+        for chunk in self._stream:
+            self._nbytes += len(chunk)
+            yield chunk
+    
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            _notify_response(self._request, self._nbytes)
+
+
+class _AsyncCountingStream(httpx.AsyncByteStream):
+    
+    def __init__(self, stream, request):
+        self._stream = stream
+        self._request = request
+        self._nbytes = 0
+    
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            self._nbytes += len(chunk)
+            yield chunk
+    
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            _notify_response(self._request, self._nbytes)
+
+
+def _request_timeout(request, config):
+    # Storage uploads and downloads get their own read budget; everything else
+    # (PostgREST, auth) uses the PostgREST one
+    read = config['storage_timeout'] if request.url.path.startswith('/storage/') else config['postgrest_timeout']
+    timeout = httpx.Timeout(read, connect=config['connect_timeout']).as_dict()
+    # Never wait past the request's deadline
+    budget = _remaining_budget()
+    if budget is not None:
+        budget = max(budget, MIN_REQUEST_TIMEOUT)
+        timeout = {key: min(value, budget) if value is not None else budget for key, value in timeout.items()}
+    return timeout
+
+
+def _build_transport_pool(config, async_=False):
+    limits = httpx.Limits(
+        max_connections=config['max_connections'],
+        max_keepalive_connections=config['max_keepalive_connections'],
+        keepalive_expiry=config['keepalive_expiry'],
+    )
+    transport_class = httpx.AsyncHTTPTransport if async_ else httpx.HTTPTransport
+    return transport_class(limits=limits, http2=config['http2'])
+
+
+class SupabaseHTTPTransport(httpx.BaseTransport):
+    # Pooled keep-alive transport that applies per-service timeouts and counts requests
+    
+    def __init__(self, config):
+        self.config = config
+        self.pool = _build_transport_pool(config)
+        _transports.add(self)
+    
+    def handle_request(self, request):
+        request.extensions['timeout'] = _request_timeout(request, self.config)
+        _pool_stats.begin()
+        failed = True
+        try:
+            response = self.pool.handle_request(request)
+            failed = False
+            if _response_observers:
+                response.stream = _CountingStream(response.stream, request)
+            return response
+        finally:
+            _pool_stats.end(failed)
+    
+    def close(self):
+        self.pool.close()
+
+
+class AsyncSupabaseHTTPTransport(httpx.AsyncBaseTransport):
+    
+    def __init__(self, config):
+        self.config = config
+        self.pool = _build_transport_pool(config, async_=True)
+        _transports.add(self)
+    
+    async def handle_async_request(self, request):
+        request.extensions['timeout'] = _request_timeout(request, self.config)
+        _pool_stats.begin()
+        failed = True
+        try:
+            response = await self.pool.handle_async_request(request)
+            failed = False
+            if _response_observers:
+                response.stream = _AsyncCountingStream(response.stream, request)
+            return response
+        finally:
+            _pool_stats.end(failed)
+    
+    async def aclose(self):
+        await self.pool.aclose()
+
+
+def build_http_client(async_=False):
+    # httpx client shared by PostgREST, Storage and auth inside one Supabase client
+    config = get_http_pool_config()
+    timeout = httpx.Timeout(config['postgrest_timeout'], connect=config['connect_timeout'])
+    if async_:
+        return httpx.AsyncClient(transport=AsyncSupabaseHTTPTransport(config), timeout=timeout, follow_redirects=True)
+    return httpx.Client(transport=SupabaseHTTPTransport(config), timeout=timeout, follow_redirects=True)
+
+
+def uses_per_thread_clients():
+    return get_http_pool_config()['per_thread']
+
+
+def get_http_pool_stats():
+    # Request counters plus connection counts across every live pool
+    connections = idle = 0
+    pools = 0
+    for transport in list(_transports):
+        pool = getattr(transport.pool, '_pool', None)
+        if pool is None:
+            continue
+        pools += 1
+        for connection in pool.connections:
+            connections += 1
+            if connection.is_idle():
+                idle += 1
+    config = get_http_pool_config()
+    return {
+        'pools': pools,
+        'connections': connections,
+        'idle_connections': idle,
+        'active_connections': connections - idle,
+        'max_connections_per_pool': config['max_connections'],
+        'http2': config['http2'],
+        'per_thread': config['per_thread'],
+        'requests': _pool_stats.requests,
+        'errors': _pool_stats.errors,
+        'in_flight': _pool_stats.in_flight,
+        'peak_in_flight': _pool_stats.peak_in_flight,
+    }
+
+
+def _create_pooled_client(create_client, url, key):
+    from supabase.lib.client_options import SyncClientOptions
+    return create_client(url, key, options=SyncClientOptions(httpx_client=build_http_client()))
+
+
+def _initialize_fake_supabase():
+    global _supabase_client, _supabase_initialized
+    from app_backend.fake_supabase import create_fake_client
+    with _initialization_lock:
+        if _supabase_client is None:
+            _supabase_client = create_fake_client()
+            _supabase_initialized = True
+            logger.info("Supabase client initialized with the in-memory fake backend")
+        return _supabase_client
+
+
 def initialize_supabase():
     global _supabase_client, _supabase_initialized
     
+    if uses_fake_backend():
+        return _initialize_fake_supabase()
+    
     # Import Supabase modules here to handle cases where they're not installed
     try:
         from supabase import create_client
@@ -116,7 +412,7 @@ def initialize_supabase():
             url = get_supabase_url()
             key = get_supabase_key()
             
-            _supabase_client = create_client(url, key)
+            _supabase_client = _create_pooled_client(create_client, url, key)
             _supabase_initialized = True
             logger.info(f"Supabase client initialized successfully for: {url}")
             return _supabase_client
@@ -130,7 +426,7 @@ def initialize_supabase():
 
 def is_supabase_configured():
     # Check if already initialized
-    if _supabase_initialized:
+    if _supabase_initialized or uses_fake_backend():
         return True
     
     # Check for environment variables
@@ -156,10 +452,30 @@ def is_supabase_available():
         return False
 
 
+def _get_thread_client():
+    client = getattr(_thread_local, 'client', None)
+    if client is None:
+        from supabase import create_client
+        try:
+            client = _create_pooled_client(create_client, get_supabase_url(), get_supabase_key())
+        except SupabaseConfigurationError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to initialize Supabase: {e}")
+            raise SupabaseConnectionError(f"Failed to initialize Supabase: {e}")
+        _thread_local.client = client
+        logger.debug(f"Supabase client created for thread {threading.current_thread().name}")
+    return client
+
+
 @retry_with_backoff(exceptions=(Exception,))
 def get_supabase_client():
     global _supabase_client
     
+    # One client (and connection pool) per thread instead of one shared by all threads
+    if uses_per_thread_clients() and not uses_fake_backend():
+        return _get_thread_client()
+    
     # Return cached client if available
     if _supabase_client is not None:
         return _supabase_client
@@ -167,11 +483,54 @@ def get_supabase_client():
     return initialize_supabase()
 
 
+async def get_async_supabase_client():
+    # Async counterpart of get_supabase_client() for the asyncio service layer
+    if uses_fake_backend():
+        loop = asyncio.get_running_loop()
+        if loop not in _async_supabase_clients:
+            from app_backend.fake_supabase import create_async_fake_client
+            _async_supabase_clients[loop] = create_async_fake_client()
+        return _async_supabase_clients[loop]
+    
+    try:
+        from supabase import acreate_client
+    except ImportError as e:
+        logger.error("supabase package is not installed")
+        raise ImportError(
+            "supabase package is not installed. "
+            "Install it with: pip install supabase"
+        ) from e
+    
+    loop = asyncio.get_running_loop()
+    client = _async_supabase_clients.get(loop)
+    if client is not None:
+        return client
+    
+    try:
+        from supabase.lib.client_options import AsyncClientOptions
+        url = get_supabase_url()
+        key = get_supabase_key()
+        options = AsyncClientOptions(httpx_client=build_http_client(async_=True))
+        client = await acreate_client(url, key, options=options)
+    except SupabaseConfigurationError:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to initialize async Supabase client: {e}")
+        raise SupabaseConnectionError(f"Failed to initialize Supabase: {e}")
+    
+    # Another task on this loop may have finished first; keep a single client per loop
+    client = _async_supabase_clients.setdefault(loop, client)
+    logger.info(f"Async Supabase client initialized for: {url}")
+    return client
+
+
 def reset_supabase_client():
     global _supabase_client, _supabase_initialized
     with _initialization_lock:
         _supabase_client = None
         _supabase_initialized = False
+        _async_supabase_clients.clear()
+        _thread_local.__dict__.pop('client', None)
         logger.debug("Supabase client cache cleared")
 
 
@@ -193,7 +552,7 @@ def check_supabase_connection():
         
         return {
             'status': 'connected',
-            'url': get_supabase_url(),
+            'url': client.supabase_url if uses_fake_backend() else get_supabase_url(),
             'response_time_ms': round(elapsed * 1000, 2),
         }
     except Exception as e:
@@ -0,0 +1,18 @@
+"""
+Settings for the test suite: the in-memory Supabase stand-in
+(app_backend/fake_supabase.py) instead of a Supabase project, so the tests need
+no credentials. manage.py selects this module for the `test` command.
+"""
+
+import os
+
+os.environ['SUPABASE_BACKEND'] = 'fake'
+
+from .settings import *  # noqa: E402,F401,F403
+
+SUPABASE_BACKEND = 'fake'
+# Tests set these per case; keep a developer's .env out of them
+SUPABASE_FAKE_LATENCY_MS = ''
+SUPABASE_RECORD_CACHE_BACKEND = 'none'
+METRICS_TOKEN = ''
+TRACE_EXPORT_FILE = ''
@@ -6,6 +6,9 @@ import sys
 
 def main():
     """Run administrative tasks."""
+    # The test suite runs against the in-memory Supabase backend
+    if sys.argv[1:2] == ['test']:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app_backend.test_settings')
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app_backend.settings')
     try:
         from django.core.management import execute_from_command_line
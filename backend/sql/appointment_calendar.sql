@@ -0,0 +1,27 @@
+-- Grouped count behind AppointmentService.get_month_counts() and
+-- /api/appointments/calendar/.
+-- Run once in the Supabase SQL editor (or psql); every statement is idempotent.
+--
+-- Without it the backend reads the date and status of every appointment of the
+-- month and counts them itself. With APPOINTMENT_CALENDAR_RPC=appointment_calendar
+-- it calls the function below instead, which returns at most one row per day and
+-- status. Both read the (user_id, date, time, id) index from
+-- sql/appointment_slots.sql.
+
+create or replace function public.appointment_calendar(
+    p_user_id public.appointments.user_id%type,
+    p_start date,
+    p_end date
+)
+returns table (date date, status text, count bigint)
+language sql
+stable
+as $$
+    select a.date, a.status::text, count(*)
+    from public.appointments a
+    where a.user_id = p_user_id
+      and a.date >= p_start
+      and a.date <= p_end
+    group by a.date, a.status
+    order by a.date, a.status
+$$;
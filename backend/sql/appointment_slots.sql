@@ -0,0 +1,38 @@
+-- Appointment durations, the no-overlap rule behind
+-- AppointmentService.find_conflict() and the appointment write paths, and the
+-- index behind the calendar-ordered appointment reads.
+-- Run once in the Supabase SQL editor (or psql); every statement is idempotent.
+--
+-- An appointment occupies [date + time, date + time + duration_minutes), and a
+-- tenant's active (not Cancelled) appointments may not overlap. The exclusion
+-- constraint makes the INSERT/UPDATE itself reject a double booking (23P01),
+-- which the backend reports like the serializer's check. Existing overlaps must
+-- be resolved before it can be added; the query at the bottom lists them.
+
+create extension if not exists btree_gist;
+
+-- Keep the default equal to APPOINTMENT_DEFAULT_DURATION
+alter table public.appointments
+    add column if not exists duration_minutes integer not null default 30
+    check (duration_minutes between 5 and 720);
+
+-- Serves every tenant read in calendar order: the per-day and range schedule
+-- reads, get_appointments_in_range() (date >= .. and date <= .. ordered by
+-- date, time, id with a keyset cursor) and get_upcoming()
+create index if not exists appointments_user_date_time_idx
+    on public.appointments (user_id, date, time, id);
+
+alter table public.appointments drop constraint if exists appointments_no_overlap;
+alter table public.appointments add constraint appointments_no_overlap
+    exclude using gist (
+        user_id with =,
+        tsrange(date + time, date + time + duration_minutes * interval '1 minute') with &&
+    ) where (status <> 'Cancelled');
+
+-- select a.id, b.id
+--   from public.appointments a
+--   join public.appointments b
+--     on a.user_id = b.user_id and a.id < b.id and a.date = b.date
+--    and a.status <> 'Cancelled' and b.status <> 'Cancelled'
+--    and tsrange(a.date + a.time, a.date + a.time + a.duration_minutes * interval '1 minute')
+--     && tsrange(b.date + b.time, b.date + b.time + b.duration_minutes * interval '1 minute');
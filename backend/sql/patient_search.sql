@@ -0,0 +1,63 @@
+-- Indexes and ranked search function behind PatientService.search_patients().
+-- Run once in the Supabase SQL editor (or psql); every statement is idempotent.
+--
+-- The default search sends `first_name/last_name/phone/email ilike '%word%'`
+-- filters, which the trigram GIN indexes below serve without a table scan.
+-- With PATIENT_SEARCH_RPC=search_patients the backend calls the function at
+-- the bottom instead, which also ranks matches by trigram similarity.
+
+create extension if not exists pg_trgm;
+
+create index if not exists patients_first_name_trgm_idx
+    on public.patients using gin (first_name gin_trgm_ops);
+create index if not exists patients_last_name_trgm_idx
+    on public.patients using gin (last_name gin_trgm_ops);
+create index if not exists patients_phone_trgm_idx
+    on public.patients using gin (phone gin_trgm_ops);
+create index if not exists patients_email_trgm_idx
+    on public.patients using gin (email gin_trgm_ops);
+
+-- Tenant filter plus the name ordering used to page through matches
+create index if not exists patients_user_name_idx
+    on public.patients (user_id, last_name, first_name, id);
+
+-- Ranked search: each word must match one of the columns (like the ilike
+-- query); rows are ordered by their best similarity to the whole query.
+create or replace function public.search_patients(
+    p_user_id public.patients.user_id%type,
+    p_query text,
+    p_limit integer default 20,
+    p_offset integer default 0
+)
+returns setof public.patients
+language sql
+stable
+as $$
+    with words as (
+        select replace(replace(replace(word, '\', '\\'), '%', '\%'), '_', '\_') as pattern
+        from regexp_split_to_table(trim(p_query), '\s+') as word
+        where word <> ''
+        limit 5
+    )
+    select p.*
+    from public.patients p
+    where p.user_id = p_user_id
+      and not exists (
+          select 1 from words w
+          where not (
+              p.first_name ilike '%' || w.pattern || '%'
+              or p.last_name ilike '%' || w.pattern || '%'
+              or p.phone ilike '%' || w.pattern || '%'
+              or coalesce(p.email, '') ilike '%' || w.pattern || '%'
+          )
+      )
+    order by greatest(
+                 similarity(p.first_name || ' ' || p.last_name, p_query),
+                 similarity(p.last_name || ' ' || p.first_name, p_query),
+                 similarity(p.phone, p_query),
+                 similarity(coalesce(p.email, ''), p_query)
+             ) desc,
+             p.last_name, p.first_name, p.id
+    limit p_limit
+    offset p_offset
+$$;